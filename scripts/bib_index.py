@@ -0,0 +1,477 @@
+#!/usr/bin/env python3
+"""
+bib_index.py
+
+Local bibliographic index for detecting hallucinated references - no network
+calls and no LLM.
+
+Fabricated references are the most common failure in generated chapters, and
+asking an evaluator model whether each one exists is slow, costly and itself
+unreliable. Instead, build an index once from an offline metadata dump (Crossref,
+OpenAlex or a CSV export: DOI, authors, year, title, venue) and classify every
+reference entry of every chapter against it:
+
+    found       - the DOI, or a near-identical title with matching first author
+                  and year (±1), is in the index
+    near_match  - a similar title or a real DOI, but the title, author, year or
+                  DOI disagree (a garbled or chimeric citation)
+    not_found   - nothing close: likely fabricated, or outside the dump's coverage
+
+On disk the index is a directory holding works.sqlite3 (one row per work plus an
+FTS5 table over normalized titles for fuzzy candidate search) and two Bloom
+filters (dois.bloom, titles.bloom) that answer most exact DOI/title lookups in
+memory - a miss is definitive, so the database is only queried on likely hits.
+
+Usage:
+    # Build (JSONL, JSONL.gz, CSV or TSV dumps)
+    uv run python bib_index.py --index data/bib_index --build crossref_climate.jsonl.gz
+
+    # Per-model hallucination rates for a comparison run
+    uv run python bib_index.py --index data/bib_index --model-outputs output/ar7_model_comparison
+"""
+
+import argparse
+import csv
+import difflib
+import gzip
+import hashlib
+import json
+import math
+import re
+import sqlite3
+import struct
+import sys
+import unicodedata
+from collections import defaultdict
+from datetime import datetime
+from pathlib import Path
+from typing import Dict, Iterator, List, Optional
+
+from citation_checker import REFERENCE_YEAR_RE, YEAR_RE, find_chapters, parse_reference, split_references
+from reasoning_traces import strip_reasoning
+from output_writer import atomic_write_json, atomic_write_text
+
+DEFAULT_INDEX_DIR = "data/bib_index"
+BLOOM_ERROR_RATE = 0.001
+FOUND_TITLE_SIMILARITY = 0.9
+NEAR_TITLE_SIMILARITY = 0.75
+TITLE_CANDIDATES = 25
+MIN_TITLE_WORDS = 3  # Shorter "titles" are usually a parsing artefact, not a title
+INSERT_BATCH = 10000
+
+BLOOM_MAGIC = b"BLM1"
+TITLE_STOPWORDS = {"the", "and", "for", "with", "from", "into", "over", "under", "of", "in", "on", "a", "an", "to"}
+
+SCHEMA = [
+    """CREATE TABLE IF NOT EXISTS works (
+        id INTEGER PRIMARY KEY,
+        doi TEXT,
+        first_author TEXT,
+        authors TEXT,
+        year INTEGER,
+        title TEXT,
+        norm_title TEXT,
+        venue TEXT
+    )""",
+    "CREATE VIRTUAL TABLE IF NOT EXISTS titles USING fts5(norm_title, content='works', content_rowid='id')",
+]
+INDEXES = [
+    "CREATE INDEX IF NOT EXISTS works_doi ON works(doi)",
+    "CREATE INDEX IF NOT EXISTS works_norm_title ON works(norm_title)",
+]
+
+
+class BloomFilter:
+    """Fixed-size Bloom filter (double hashing over SHA-256)"""
+
+    def __init__(self, capacity: int, error_rate: float = BLOOM_ERROR_RATE):
+        capacity = max(capacity, 1)
+        self.size = max(8, int(-capacity * math.log(error_rate) / math.log(2) ** 2))
+        self.hashes = max(1, round(self.size / capacity * math.log(2)))
+        self.bits = bytearray((self.size + 7) // 8)
+
+    def _positions(self, key: str):
+        digest = hashlib.sha256(key.encode("utf-8")).digest()
+        h1 = int.from_bytes(digest[:8], "big")
+        h2 = int.from_bytes(digest[8:16], "big") | 1
+        return ((h1 + i * h2) % self.size for i in range(self.hashes))
+
+    def add(self, key: str):
+        for position in self._positions(key):
+            self.bits[position >> 3] |= 1 << (position & 7)
+
+    def __contains__(self, key: str) -> bool:
+        return all(self.bits[position >> 3] & (1 << (position & 7)) for position in self._positions(key))
+
+    def save(self, path: Path):
+        with open(path, "wb") as f:
+            f.write(BLOOM_MAGIC + struct.pack(">QQ", self.size, self.hashes))
+            f.write(self.bits)
+
+    @classmethod
+    def load(cls, path: Path) -> "BloomFilter":
+        data = Path(path).read_bytes()
+        if data[:4] != BLOOM_MAGIC:
+            raise ValueError(f"Not a Bloom filter file: {path}")
+        bloom = cls.__new__(cls)
+        bloom.size, bloom.hashes = struct.unpack(">QQ", data[4:20])
+        bloom.bits = bytearray(data[20:])
+        return bloom
+
+
+def normalize_doi(doi: str) -> str:
+    """Lowercase DOI without resolver prefix"""
+    doi = (doi or "").strip().lower()
+    return re.sub(r"^(?:https?://(?:dx\.)?doi\.org/|doi:\s*)", "", doi).rstrip(".,;")
+
+
+def normalize_title(title: str) -> str:
+    """Accent-free lowercase title with punctuation collapsed to single spaces"""
+    title = unicodedata.normalize("NFKD", title or "").encode("ascii", "ignore").decode().lower()
+    return " ".join(re.sub(r"[^a-z0-9]+", " ", title).split())
+
+
+def surname_key(author: str) -> str:
+    """Comparable key for a first author's surname ("Smith, J." / "J. Smith" / {"family": "Smith"})"""
+    if isinstance(author, dict):
+        author = author.get("family") or author.get("display_name") or author.get("name") or ""
+    author = (author or "").strip()
+    surname = author.split(",")[0] if "," in author else (author.split()[-1] if author.split() else "")
+    return normalize_title(surname).replace(" ", "")
+
+
+def _first(value):
+    return value[0] if isinstance(value, list) and value else value
+
+
+def _record(raw: Dict) -> Optional[Dict]:
+    """One dump row (Crossref, OpenAlex or flat) as a work record; None without a title or DOI"""
+    title = _first(raw.get("title") or raw.get("display_name")) or ""
+    doi = normalize_doi(raw.get("doi") or raw.get("DOI") or "")
+    if not title and not doi:
+        return None
+
+    authors = raw.get("authors") or raw.get("author") or raw.get("authorships") or []
+    if isinstance(authors, str):
+        authors = [a.strip() for a in re.split(r";|\band\b", authors) if a.strip()]
+    authors = [a.get("author", a) if isinstance(a, dict) and "author" in a else a for a in authors]  # OpenAlex
+    names = [a.get("family") or a.get("display_name") or a.get("name") or "" if isinstance(a, dict) else str(a)
+             for a in authors]
+
+    year = raw.get("year") or raw.get("publication_year")
+    if not year:
+        for field in ("issued", "published", "published-print", "published-online"):
+            parts = (raw.get(field) or {}).get("date-parts") if isinstance(raw.get(field), dict) else None
+            if parts and parts[0] and parts[0][0]:
+                year = parts[0][0]
+                break
+    try:
+        year = int(str(year)[:4]) if year else None
+    except ValueError:
+        year = None
+
+    venue = _first(raw.get("venue") or raw.get("journal") or raw.get("container-title")) or ""
+    return {
+        "doi": doi or None,
+        "first_author": surname_key(authors[0]) if authors else "",
+        "authors": "; ".join(n for n in names if n),
+        "year": year,
+        "title": title,
+        "norm_title": normalize_title(title),
+        "venue": venue if isinstance(venue, str) else ""
+    }
+
+
+def iter_dump(path: Path) -> Iterator[Dict]:
+    """Work records from a JSONL/CSV/TSV dump (optionally gzipped)"""
+    path = Path(path)
+    suffixes = [s.lower() for s in path.suffixes]
+    opener = gzip.open if suffixes and suffixes[-1] == ".gz" else open
+    kind = suffixes[-2] if suffixes and suffixes[-1] == ".gz" and len(suffixes) > 1 else (suffixes[-1] if suffixes else "")
+
+    with opener(path, "rt", encoding="utf-8", newline="") as f:
+        if kind in (".csv", ".tsv"):
+            rows = csv.DictReader(f, delimiter="\t" if kind == ".tsv" else ",")
+        else:
+            rows = (json.loads(line) for line in f if line.strip())
+        for raw in rows:
+            record = _record(raw) if isinstance(raw, dict) else None
+            if record:
+                yield record
+
+
+def build_index(dump_paths: List[Path], index_dir: Path) -> Dict:
+    """
+    Build (or rebuild) an index directory from one or more dumps
+
+    Returns:
+        Counts of works, DOIs and titles indexed
+    """
+    index_dir = Path(index_dir)
+    index_dir.mkdir(parents=True, exist_ok=True)
+    db_path = index_dir / "works.sqlite3"
+    if db_path.exists():
+        db_path.unlink()
+
+    db = sqlite3.connect(db_path)
+    for statement in SCHEMA:
+        db.execute(statement)
+
+    columns = ("doi", "first_author", "authors", "year", "title", "norm_title", "venue")
+    batch = []
+    for dump in dump_paths:
+        print(f"  📥 Loading {dump}")
+        for record in iter_dump(dump):
+            batch.append(tuple(record[c] for c in columns))
+            if len(batch) >= INSERT_BATCH:
+                db.executemany(f"INSERT INTO works ({', '.join(columns)}) VALUES (?, ?, ?, ?, ?, ?, ?)", batch)
+                batch = []
+    if batch:
+        db.executemany(f"INSERT INTO works ({', '.join(columns)}) VALUES (?, ?, ?, ?, ?, ?, ?)", batch)
+
+    for statement in INDEXES:
+        db.execute(statement)
+    db.execute("INSERT INTO titles(titles) VALUES ('rebuild')")
+    db.commit()
+
+    counts = {
+        "works": db.execute("SELECT COUNT(*) FROM works").fetchone()[0],
+        "dois": db.execute("SELECT COUNT(DISTINCT doi) FROM works WHERE doi IS NOT NULL").fetchone()[0],
+        "titles": db.execute("SELECT COUNT(DISTINCT norm_title) FROM works WHERE norm_title != ''").fetchone()[0]
+    }
+    for name, column, count in (("dois", "doi", counts["dois"]), ("titles", "norm_title", counts["titles"])):
+        bloom = BloomFilter(count)
+        for (value,) in db.execute(f"SELECT DISTINCT {column} FROM works WHERE {column} IS NOT NULL AND {column} != ''"):
+            bloom.add(value)
+        bloom.save(index_dir / f"{name}.bloom")
+
+    db.execute("VACUUM")
+    db.close()
+    counts["size_mb"] = sum(f.stat().st_size for f in index_dir.iterdir()) / 1e6
+    return counts
+
+
+def reference_title(entry: str) -> str:
+    """Title of an author-(year)-title reference entry ("" if it can't be located)"""
+    year = REFERENCE_YEAR_RE.search(entry) or YEAR_RE.search(entry)
+    rest = entry[year.end():] if year else entry
+    rest = rest.lstrip(" .,:)")
+    title = re.split(r"(?<=[.?!])\s", rest, maxsplit=1)[0].strip().rstrip(".")
+    return title.strip("\"'“”")
+
+
+def title_similarity(a: str, b: str) -> float:
+    """0-1 similarity of two titles after normalization"""
+    a, b = normalize_title(a), normalize_title(b)
+    if not a or not b:
+        return 0.0
+    return difflib.SequenceMatcher(None, a, b, autojunk=False).ratio()
+
+
+class BibIndex:
+    """Read-only lookups against an index directory built by build_index()"""
+
+    def __init__(self, index_dir: Path = DEFAULT_INDEX_DIR):
+        index_dir = Path(index_dir)
+        db_path = index_dir / "works.sqlite3"
+        if not db_path.exists():
+            raise FileNotFoundError(f"No bibliographic index at {index_dir} - build one with bib_index.py --build")
+        self.index_dir = index_dir
+        self.dois = BloomFilter.load(index_dir / "dois.bloom")
+        self.titles = BloomFilter.load(index_dir / "titles.bloom")
+        self._db = sqlite3.connect(f"file:{db_path}?mode=ro", uri=True, check_same_thread=False)
+        self._db.row_factory = sqlite3.Row
+
+    def lookup_doi(self, doi: str) -> Optional[Dict]:
+        """Work with this DOI, or None (without touching the database on a Bloom miss)"""
+        doi = normalize_doi(doi)
+        if not doi or doi not in self.dois:
+            return None
+        row = self._db.execute("SELECT * FROM works WHERE doi = ? LIMIT 1", (doi,)).fetchone()
+        return dict(row) if row else None
+
+    def search_title(self, title: str, limit: int = TITLE_CANDIDATES) -> List[Dict]:
+        """Candidate works for a title, best match first, each with its "similarity" """
+        norm = normalize_title(title)
+        if not norm:
+            return []
+
+        rows = []
+        if norm in self.titles:
+            rows = self._db.execute("SELECT * FROM works WHERE norm_title = ? LIMIT ?", (norm, limit)).fetchall()
+        if not rows:
+            tokens = [t for t in norm.split() if len(t) > 2 and t not in TITLE_STOPWORDS]
+            if not tokens:
+                return []
+            query = " OR ".join(f'"{t}"' for t in dict.fromkeys(tokens))
+            rows = self._db.execute(
+                "SELECT works.* FROM titles JOIN works ON works.id = titles.rowid "
+                "WHERE titles MATCH ? ORDER BY rank LIMIT ?", (query, limit)
+            ).fetchall()
+
+        candidates = [{**dict(row), "similarity": title_similarity(norm, row["norm_title"])} for row in rows]
+        return sorted(candidates, key=lambda c: c["similarity"], reverse=True)
+
+    def classify(self, entry: str) -> Dict:
+        """
+        Classify one reference entry as found / near_match / not_found
+
+        Returns:
+            Dict with "status", "reason", "title" (as parsed), "similarity" and
+            "match" (the closest indexed work, if any)
+        """
+        reference = parse_reference(entry)
+        title = reference_title(entry)
+        author = surname_key(reference["author"])
+        year = reference["year"]
+
+        def agrees(work: Dict) -> bool:
+            author_ok = not author or author == work["first_author"] or author in normalize_title(work["authors"]).split()
+            year_ok = not year or not work["year"] or abs(year - work["year"]) <= 1
+            return author_ok and year_ok
+
+        def result(status: str, reason: str, work: Optional[Dict] = None, similarity: float = 0.0) -> Dict:
+            match = {k: work[k] for k in ("doi", "title", "first_author", "year", "venue")} if work else None
+            return {"status": status, "reason": reason, "title": title, "similarity": round(similarity, 3),
+                    "match": match, "text": entry[:200]}
+
+        for doi in reference["dois"]:
+            work = self.lookup_doi(doi)
+            if work:
+                similarity = title_similarity(title, work["title"]) if title else 1.0
+                if similarity >= NEAR_TITLE_SIMILARITY and agrees(work):
+                    return result("found", "doi", work, similarity)
+                return result("near_match", "doi_belongs_to_another_work", work, similarity)
+
+        if len(normalize_title(title).split()) < MIN_TITLE_WORDS:
+            return result("not_found", "no_title" if not reference["dois"] else "doi_not_indexed")
+
+        candidates = self.search_title(title)
+        best = candidates[0] if candidates else None
+        if best and best["similarity"] >= FOUND_TITLE_SIMILARITY and agrees(best):
+            if reference["dois"]:
+                return result("near_match", "wrong_doi", best, best["similarity"])
+            return result("found", "title", best, best["similarity"])
+        if best and best["similarity"] >= NEAR_TITLE_SIMILARITY:
+            reason = "author_or_year_mismatch" if best["similarity"] >= FOUND_TITLE_SIMILARITY else "similar_title"
+            return result("near_match", reason, best, best["similarity"])
+        return result("not_found", "no_similar_title", best, best["similarity"] if best else 0.0)
+
+    def close(self):
+        self._db.close()
+
+
+def classify_references(text: str, index: BibIndex) -> Dict:
+    """
+    Classify every entry of a chapter's reference list
+
+    Returns:
+        Counts per status, "hallucination_rate" (not_found / references) and
+        "entries" (classify() result per reference)
+    """
+    _, entries = split_references(strip_reasoning(text or ""))
+    classified = [index.classify(entry) for entry in entries]
+    counts = defaultdict(int)
+    for entry in classified:
+        counts[entry["status"]] += 1
+    return {
+        "references": len(classified),
+        "found": counts["found"],
+        "near_match": counts["near_match"],
+        "not_found": counts["not_found"],
+        "hallucination_rate": counts["not_found"] / len(classified) if classified else None,
+        "entries": classified
+    }
+
+
+def summarize_models(chapter_results: Dict[str, Dict[str, Dict]]) -> Dict[str, Dict]:
+    """Per-model reference totals and hallucination rate from per-chapter classify_references()"""
+    summary = {}
+    for model_id, chapters in chapter_results.items():
+        totals = {field: sum(c[field] for c in chapters.values())
+                  for field in ("references", "found", "near_match", "not_found")}
+        totals["hallucination_rate"] = totals["not_found"] / totals["references"] if totals["references"] else None
+        totals["near_match_rate"] = totals["near_match"] / totals["references"] if totals["references"] else None
+        summary[model_id] = totals
+    return summary
+
+
+def format_rate(rate: Optional[float]) -> str:
+    return f"{rate * 100:.1f}%" if rate is not None else "-"
+
+
+def main():
+    parser = argparse.ArgumentParser(
+        description="Local bibliographic index for hallucinated-reference detection",
+        formatter_class=argparse.ArgumentDefaultsHelpFormatter
+    )
+    parser.add_argument("--index", default=DEFAULT_INDEX_DIR, help="Index directory")
+    parser.add_argument("--build", nargs="+", metavar="DUMP",
+                        help="Build the index from metadata dumps (.jsonl, .csv, .tsv, optionally .gz)")
+    parser.add_argument("--model-outputs",
+                        help="Classify the references of every chapter under this model outputs directory")
+    parser.add_argument("--output-dir", help="Where to write results (default: <model-outputs>/reference_check)")
+
+    args = parser.parse_args()
+
+    if args.build:
+        started = datetime.now()
+        counts = build_index([Path(p) for p in args.build], Path(args.index))
+        print(f"✅ Indexed {counts['works']:,} works ({counts['dois']:,} DOIs) in "
+              f"{(datetime.now() - started).total_seconds():.1f}s - {counts['size_mb']:.1f} MB at {args.index}")
+
+    if not args.model_outputs:
+        if not args.build:
+            parser.error("Give --build and/or --model-outputs")
+        return 0
+
+    model_outputs_dir = Path(args.model_outputs)
+    if not model_outputs_dir.exists():
+        print(f"❌ Error: Model outputs directory not found: {model_outputs_dir}")
+        return 1
+    try:
+        index = BibIndex(args.index)
+    except FileNotFoundError as e:
+        print(f"❌ {e}")
+        return 1
+    output_dir = Path(args.output_dir) if args.output_dir else model_outputs_dir / "reference_check"
+
+    started = datetime.now()
+    chapter_results = defaultdict(dict)
+    for model_id, chapter_key, chapter_file in find_chapters(model_outputs_dir):
+        try:
+            chapter_results[model_id][chapter_key] = classify_references(
+                chapter_file.read_text(encoding='utf-8'), index)
+        except OSError as e:
+            print(f"⚠️  {model_id}/{chapter_key}: Error reading - {e}")
+    index.close()
+    models = summarize_models(chapter_results)
+
+    atomic_write_json(output_dir / "reference_check.json", {
+        "generated_at": datetime.now().isoformat(),
+        "index": str(args.index),
+        "models": models,
+        "chapters": chapter_results
+    })
+
+    report = "# Reference Verification (local bibliographic index)\n\n"
+    report += f"**Generated**: {datetime.now().strftime('%Y-%m-%d %H:%M:%S')}\n\n"
+    report += "| Model | References | Found | Near Match | Not Found | Hallucination Rate |\n"
+    report += "|-------|------------|-------|------------|-----------|--------------------|\n"
+    for model_id, totals in sorted(models.items()):
+        report += (f"| {model_id} | {totals['references']} | {totals['found']} | {totals['near_match']} | "
+                   f"{totals['not_found']} | {format_rate(totals['hallucination_rate'])} |\n")
+    atomic_write_text(output_dir / "reference_check_report.md", report)
+
+    print(f"📚 Classified references of {sum(len(c) for c in chapter_results.values())} chapters in "
+          f"{(datetime.now() - started).total_seconds():.1f}s")
+    for model_id, totals in sorted(models.items()):
+        print(f"  {model_id}: {totals['references']} references - {totals['found']} found, "
+              f"{totals['near_match']} near, {totals['not_found']} not found "
+              f"({format_rate(totals['hallucination_rate'])} hallucinated)")
+    print(f"\nResults saved to: {output_dir}")
+    return 0
+
+
+if __name__ == "__main__":
+    sys.exit(main())
@@ -0,0 +1,279 @@
+#!/usr/bin/env python3
+"""
+calibrated_language.py
+
+Rule-based analysis of IPCC calibrated uncertainty language - a deterministic
+pre-filter so the evaluator models only look at the passages that need judgement.
+
+One multi-pattern (Aho-Corasick) pass over the chapter finds every term of the
+lexicon:
+
+    likelihood   - virtually certain ... exceptionally unlikely (AR6 scale)
+    confidence   - very low ... very high confidence
+    evidence     - limited/medium/robust evidence, low/medium/high agreement
+    nonstandard  - near-miss variants ("highly likely", "moderate confidence",
+                   "almost certain", hyphenated "high-confidence") with the
+                   calibrated term they should be
+    hedge        - uncalibrated hedges ("probably", "possibly", "it is thought")
+
+and from the matches it reports term usage, whether calibrated terms are
+italicized as IPCC style requires, sentences mixing a likelihood and a
+confidence qualifier, a deterministic 1-7 uncertainty_language sub-score and
+the flagged passages to hand to the LLM judge.
+"""
+
+import bisect
+import re
+from collections import Counter, deque
+from typing import Dict, Iterator, List, Tuple
+
+from fact_check_chunking import PARAGRAPH_SPLIT_RE, SENTENCE_SPLIT_RE
+
+LIKELIHOOD_TERMS = {
+    "virtually certain": "99-100%",
+    "extremely likely": "95-100%",
+    "very likely": "90-100%",
+    "likely": "66-100%",
+    "more likely than not": ">50-100%",
+    "about as likely as not": "33-66%",
+    "unlikely": "0-33%",
+    "very unlikely": "0-10%",
+    "extremely unlikely": "0-5%",
+    "exceptionally unlikely": "0-1%",
+}
+CONFIDENCE_TERMS = ["very low confidence", "low confidence", "medium confidence", "high confidence",
+                    "very high confidence"]
+EVIDENCE_TERMS = ["limited evidence", "medium evidence", "robust evidence",
+                  "low agreement", "medium agreement", "high agreement"]
+NONSTANDARD_TERMS = {
+    "highly likely": "very likely",
+    "quite likely": "likely",
+    "fairly likely": "likely",
+    "most likely": "likely / very likely",
+    "very probable": "very likely",
+    "highly probable": "very likely",
+    "high probability": "likely / very likely",
+    "high likelihood": "likely",
+    "low likelihood": "unlikely",
+    "almost certain": "virtually certain",
+    "almost certainly": "virtually certain",
+    "near certain": "virtually certain",
+    "highly unlikely": "very unlikely",
+    "moderate confidence": "medium confidence",
+    "strong confidence": "high confidence",
+    "extremely high confidence": "very high confidence",
+    "high certainty": "high confidence",
+    "low certainty": "low confidence",
+    **{level.replace(" confidence", "-confidence"): level for level in CONFIDENCE_TERMS},
+}
+HEDGES = ["probably", "possibly", "perhaps", "presumably", "arguably", "conceivably", "plausibly",
+          "it is thought", "it is believed", "it is possible that", "it seems", "seems to", "appears to"]
+
+# Sub-score weights (sum to 1) and targets
+USAGE_WEIGHT = 0.35
+CORRECTNESS_WEIGHT = 0.3
+ITALIC_WEIGHT = 0.15
+HEDGE_WEIGHT = 0.2
+TARGET_TERMS_PER_1K_WORDS = 3.0  # Full usage credit at this density
+MAX_HEDGES_PER_1K_WORDS = 5.0    # No hedging credit at this density
+MAX_FLAGGED_PASSAGES = 30
+MAX_PASSAGE_CHARS = 300
+
+
+class AhoCorasick:
+    """Multi-pattern matcher: every occurrence of every pattern in one pass"""
+
+    def __init__(self, patterns: Dict[str, object]):
+        """patterns: pattern (lowercase) → payload returned with each match"""
+        self.goto = [{}]
+        self.fail = [0]
+        self.output = [[]]
+        for pattern, payload in patterns.items():
+            state = 0
+            for char in pattern:
+                if char not in self.goto[state]:
+                    self.goto.append({})
+                    self.fail.append(0)
+                    self.output.append([])
+                    self.goto[state][char] = len(self.goto) - 1
+                state = self.goto[state][char]
+            self.output[state].append((pattern, payload))
+
+        queue = deque(self.goto[0].values())
+        while queue:
+            state = queue.popleft()
+            for char, child in self.goto[state].items():
+                queue.append(child)
+                fallback = self.fail[state]
+                while fallback and char not in self.goto[fallback]:
+                    fallback = self.fail[fallback]
+                self.fail[child] = self.goto[fallback].get(char, 0)
+                self.output[child] = self.output[child] + self.output[self.fail[child]]
+
+    def finditer(self, text: str) -> Iterator[Tuple[int, int, str, object]]:
+        """(start, end, pattern, payload) for every occurrence, in order of end position"""
+        state = 0
+        for i, char in enumerate(text):
+            while state and char not in self.goto[state]:
+                state = self.fail[state]
+            state = self.goto[state].get(char, 0)
+            for pattern, payload in self.output[state]:
+                yield i + 1 - len(pattern), i + 1, pattern, payload
+
+
+def _lexicon() -> Dict[str, Tuple[str, str]]:
+    """pattern → (category, canonical term or suggestion)"""
+    lexicon = {}
+    lexicon.update({term: ("likelihood", term) for term in LIKELIHOOD_TERMS})
+    lexicon.update({term: ("confidence", term) for term in CONFIDENCE_TERMS})
+    lexicon.update({term: ("evidence", term) for term in EVIDENCE_TERMS})
+    lexicon.update({term: ("nonstandard", suggestion) for term, suggestion in NONSTANDARD_TERMS.items()})
+    lexicon.update({term: ("hedge", term) for term in HEDGES})
+    return lexicon
+
+
+MATCHER = AhoCorasick(_lexicon())
+
+
+def _fold(text: str) -> str:
+    """Lowercase with whitespace as single spaces, same length as text (so offsets carry over)"""
+    lowered = text.lower()
+    if len(lowered) != len(text):
+        lowered = "".join(c.lower()[:1] or c for c in text)
+    return "".join(" " if c.isspace() else c for c in lowered)
+
+
+def _is_word_char(char: str) -> bool:
+    return char.isalnum() or char == "-"
+
+
+def find_terms(text: str) -> List[Dict]:
+    """
+    Lexicon matches on word boundaries, longest match winning where they overlap
+    ("very unlikely" over "unlikely", "most likely" over "likely")
+    """
+    folded = _fold(text)
+    matches = []
+    for start, end, pattern, (category, canonical) in MATCHER.finditer(folded):
+        if start > 0 and _is_word_char(folded[start - 1]):
+            continue
+        if end < len(folded) and _is_word_char(folded[end]):
+            continue
+        matches.append({"start": start, "end": end, "term": pattern, "category": category, "canonical": canonical})
+
+    matches.sort(key=lambda m: (m["start"], -(m["end"] - m["start"])))
+    kept, last_end = [], -1
+    for match in matches:
+        if match["start"] >= last_end:
+            kept.append(match)
+            last_end = match["end"]
+    return kept
+
+
+def _italicized(text: str, start: int, end: int) -> bool:
+    """Term wrapped in single * or _ (italic), not ** / __ (bold)"""
+    before, after = text[max(0, start - 3):start], text[end:end + 3]
+    for mark in ("*", "_"):
+        if before.endswith(mark) and after.startswith(mark):
+            if not (before.endswith(mark * 2) and after.startswith(mark * 2)) or before.endswith(mark * 3):
+                return True
+    return False
+
+
+def _sentence_spans(text: str) -> List[Tuple[int, int]]:
+    spans = []
+    boundaries = sorted({0, len(text)} | {m.end() for m in SENTENCE_SPLIT_RE.finditer(text)}
+                        | {m.end() for m in PARAGRAPH_SPLIT_RE.finditer(text)})
+    for start, end in zip(boundaries, boundaries[1:]):
+        if text[start:end].strip():
+            spans.append((start, end))
+    return spans
+
+
+def analyze_calibrated_language(text: str) -> Dict:
+    """
+    Calibrated-language usage, problems and deterministic sub-score for a chapter
+
+    Returns:
+        Dict with term counts by category, italicized share, nonstandard terms,
+        mixed likelihood/confidence statements, hedges, terms_per_1k_words,
+        uncertainty_language_score (1-7) and flagged_passages
+        ([{"passage", "issues"}]) for the LLM judge
+    """
+    text = text or ""
+    word_count = len(text.split())
+    matches = find_terms(text)
+    spans = _sentence_spans(text)
+    starts = [start for start, _ in spans]
+
+    by_category = Counter(m["category"] for m in matches)
+    calibrated = [m for m in matches if m["category"] in ("likelihood", "confidence", "evidence")]
+    italicized = sum(1 for m in calibrated if _italicized(text, m["start"], m["end"]))
+
+    sentence_issues = {}  # sentence index → issues
+    sentence_categories = {}
+    for match in matches:
+        sentence = max(0, bisect.bisect_right(starts, match["start"]) - 1)
+        sentence_categories.setdefault(sentence, set()).add(match["category"])
+        if match["category"] == "nonstandard":
+            sentence_issues.setdefault(sentence, []).append(
+                f"nonstandard term '{match['term']}' (use '{match['canonical']}')")
+        elif match["category"] == "hedge":
+            sentence_issues.setdefault(sentence, []).append(f"uncalibrated hedge '{match['term']}'")
+        elif not _italicized(text, match["start"], match["end"]):
+            sentence_issues.setdefault(sentence, []).append(f"calibrated term '{match['term']}' not italicized")
+
+    mixed = [s for s, categories in sentence_categories.items() if {"likelihood", "confidence"} <= categories]
+    for sentence in mixed:
+        sentence_issues.setdefault(sentence, []).append("mixes likelihood and confidence qualifiers")
+
+    per_1k = lambda count: count / word_count * 1000 if word_count else 0.0
+    usage = min(1.0, per_1k(len(calibrated)) / TARGET_TERMS_PER_1K_WORDS)
+    problems = by_category["nonstandard"] + len(mixed)
+    # No calibrated language at all earns no credit for using it correctly
+    correctness = 1 - min(1.0, problems / (len(calibrated) + by_category["nonstandard"])) if calibrated else 0.0
+    italic = italicized / len(calibrated) if calibrated else 0.0
+    hedging = 1 - min(1.0, per_1k(by_category["hedge"]) / MAX_HEDGES_PER_1K_WORDS)
+    score = 1 + 6 * (USAGE_WEIGHT * usage + CORRECTNESS_WEIGHT * correctness
+                     + ITALIC_WEIGHT * italic + HEDGE_WEIGHT * hedging)
+
+    flagged = []
+    for sentence in sorted(sentence_issues)[:MAX_FLAGGED_PASSAGES]:
+        start, end = spans[sentence] if spans else (0, len(text))
+        flagged.append({"passage": " ".join(text[start:end].split())[:MAX_PASSAGE_CHARS],
+                        "issues": sentence_issues[sentence]})
+
+    return {
+        "calibrated_terms": len(calibrated),
+        "likelihood_terms": by_category["likelihood"],
+        "confidence_terms": by_category["confidence"],
+        "evidence_terms": by_category["evidence"],
+        "term_counts": dict(Counter(m["canonical"] for m in calibrated).most_common()),
+        "terms_per_1k_words": per_1k(len(calibrated)),
+        "italicized": italicized,
+        "italicized_fraction": italic,
+        "nonstandard_terms": dict(Counter(m["term"] for m in matches if m["category"] == "nonstandard")),
+        "mixed_statements": len(mixed),
+        "hedges": by_category["hedge"],
+        "hedge_counts": dict(Counter(m["term"] for m in matches if m["category"] == "hedge")),
+        "uncertainty_language_score": round(score, 1),
+        "flagged_passages": flagged,
+        "flagged_total": len(sentence_issues)
+    }
+
+
+def calibrated_note(analysis: Dict, max_passages: int = 15) -> str:
+    """Summary and flagged passages of a calibrated-language analysis for an evaluator prompt"""
+    lines = [f"AUTOMATED CALIBRATED-LANGUAGE CHECK (whole chapter, deterministic): "
+             f"{analysis['calibrated_terms']} calibrated terms ({analysis['terms_per_1k_words']:.1f} per 1000 words, "
+             f"{analysis['italicized_fraction']*100:.0f}% italicized), {sum(analysis['nonstandard_terms'].values())} "
+             f"nonstandard terms, {analysis['mixed_statements']} mixed likelihood/confidence statements, "
+             f"{analysis['hedges']} uncalibrated hedges. Rule-based uncertainty_language score: "
+             f"{analysis['uncertainty_language_score']}/7."]
+    if analysis["flagged_passages"]:
+        lines.append("Only these flagged passages need review for uncertainty language:")
+        for flagged in analysis["flagged_passages"][:max_passages]:
+            lines.append(f"- \"{flagged['passage']}\" - {'; '.join(flagged['issues'])}")
+        if analysis["flagged_total"] > max_passages:
+            lines.append(f"- ... and {analysis['flagged_total'] - max_passages} more")
+    return "\n".join(lines) + "\n\n"
@@ -0,0 +1,420 @@
+#!/usr/bin/env python3
+"""
+capacity_simulator.py
+
+Discrete-event simulation of a full AR7 run for capacity planning - no network calls.
+
+Replays the pipeline's task graph for a models × chapters matrix:
+
+    generation (model's provider) → fact-check (evaluator) → scoring (evaluator)
+    → book compile (once all of a model's chapters are through)
+
+Each provider has a number of concurrent slots and a requests-per-minute limit.
+Task latencies are drawn from lognormal distributions fit per model from our
+telemetry (the "duration" fields of PRODUCTION_SUMMARY.json-style summaries and
+duration_seconds in *_metadata.json); failures are drawn from each model's
+observed error rate and retried up to a limit.
+
+Reports makespan, per-provider utilization and queueing delay, averaged over
+several replications, so the effect of more quota, more concurrency or a bigger
+matrix can be seen before paying for it.
+
+Usage:
+    # Replay the production matrix with the default settings
+    uv run python capacity_simulator.py --summary PRODUCTION_SUMMARY.json
+
+    # 7 models × 29 chapters, 4 concurrent requests per provider, 30 rpm for gemini
+    uv run python capacity_simulator.py --chapters 29 --concurrency 4 --rpm gemini=30
+
+    # Sweep concurrency to see where makespan stops improving
+    uv run python capacity_simulator.py --chapters 29 --sweep 1,2,4,8,16
+"""
+
+import argparse
+import heapq
+import json
+import math
+import random
+import statistics
+import sys
+from collections import defaultdict
+from pathlib import Path
+from typing import Dict, List, Optional
+
+from scheduler import parse_limits, provider_of
+
+DEFAULT_SUMMARIES = [Path("PRODUCTION_SUMMARY.json")]
+DEFAULT_HISTORY_ROOT = Path("output")
+DEFAULT_EVALUATOR = "gemini/gemini-2.5-pro"
+
+# Stages with no telemetry yet: (median seconds, log-space sigma)
+DEFAULT_STAGE_LATENCY = {
+    "generation": (150.0, 0.5),
+    "fact_check": (60.0, 0.4),
+    "scoring": (45.0, 0.4),
+    "book": (15.0, 0.3)
+}
+DEFAULT_ERROR_RATE = 0.05
+DEFAULT_ERROR_SECONDS = 600.0  # Provider timeout - failures are usually slow
+BOOK_PROVIDER = "local"
+
+
+def fit_lognormal(durations: List[float]) -> Optional[Dict]:
+    """Median and log-space sigma of a set of durations"""
+    durations = [d for d in durations if d and d > 0]
+    if not durations:
+        return None
+    logs = [math.log(d) for d in durations]
+    sigma = statistics.stdev(logs) if len(logs) > 1 else DEFAULT_STAGE_LATENCY["generation"][1]
+    return {"median": math.exp(statistics.mean(logs)), "sigma": sigma, "samples": len(durations)}
+
+
+def load_telemetry(summary_files: List[Path], history_root: Optional[Path] = None) -> Dict[str, Dict]:
+    """
+    Collect per-model generation outcomes from run summaries and metadata files
+
+    Returns:
+        model name → {"durations": [...], "successes": n, "failures": n}
+    """
+    telemetry = defaultdict(lambda: {"durations": [], "successes": 0, "failures": 0})
+
+    for summary_file in summary_files:
+        if not summary_file.exists():
+            continue
+        summary = json.loads(summary_file.read_text(encoding='utf-8'))
+        model_summaries = summary.get("models", [summary]) if isinstance(summary, dict) else []
+        for model_summary in model_summaries:
+            model_name = model_summary.get("model_name")
+            if not model_name:
+                continue
+            for result in model_summary.get("results", []):
+                if result.get("success"):
+                    telemetry[model_name]["successes"] += 1
+                    telemetry[model_name]["durations"].append(result.get("duration", 0))
+                else:
+                    telemetry[model_name]["failures"] += 1
+
+    if history_root and history_root.exists():
+        for metadata_file in history_root.rglob("*_metadata.json"):
+            try:
+                metadata = json.loads(metadata_file.read_text(encoding='utf-8'))
+            except (json.JSONDecodeError, OSError):
+                continue
+            if not isinstance(metadata, dict):
+                continue
+            model_name = metadata.get("requested_model") or metadata.get("model")
+            if model_name and metadata.get("duration_seconds"):
+                telemetry[model_name]["successes"] += 1
+                telemetry[model_name]["durations"].append(metadata["duration_seconds"])
+
+    return dict(telemetry)
+
+
+def fit_profiles(telemetry: Dict[str, Dict]) -> Dict[str, Dict]:
+    """Per-model latency distribution and error rate; "*" is the pooled fallback"""
+    profiles = {}
+    pooled = []
+    pooled_ok = pooled_failed = 0
+
+    for model_name, data in telemetry.items():
+        fit = fit_lognormal(data["durations"])
+        attempts = data["successes"] + data["failures"]
+        if fit:
+            profiles[model_name] = {
+                **fit,
+                # Laplace-smoothed so three clean runs don't mean "never fails"
+                "error_rate": (data["failures"] + 1) / (attempts + 2)
+            }
+        pooled.extend(data["durations"])
+        pooled_ok += data["successes"]
+        pooled_failed += data["failures"]
+
+    pooled_fit = fit_lognormal(pooled)
+    median, sigma = DEFAULT_STAGE_LATENCY["generation"]
+    profiles["*"] = {
+        **(pooled_fit or {"median": median, "sigma": sigma, "samples": 0}),
+        "error_rate": (pooled_failed / (pooled_ok + pooled_failed)) if pooled_ok + pooled_failed else DEFAULT_ERROR_RATE
+    }
+    return profiles
+
+
+class CapacitySimulator:
+    """One simulated run of the task graph under a set of scheduler settings"""
+
+    def __init__(self, models: List[str], chapters: List[str], profiles: Dict[str, Dict],
+                 evaluator: str = DEFAULT_EVALUATOR, concurrency: Optional[Dict[str, int]] = None,
+                 default_concurrency: int = 1, rpm: Optional[Dict[str, float]] = None,
+                 max_retries: int = 1, policy: str = "fifo", seed: int = 0):
+        self.models = models
+        self.chapters = chapters
+        self.profiles = profiles
+        self.evaluator = evaluator
+        self.concurrency = concurrency or {}
+        self.default_concurrency = default_concurrency
+        self.rpm = rpm or {}
+        self.max_retries = max_retries
+        self.policy = policy
+        self.rng = random.Random(seed)
+
+        self.now = 0.0
+        self._events = []
+        self._seq = 0
+        self.queues = defaultdict(list)
+        self.running = defaultdict(int)
+        self.next_start = defaultdict(float)
+        self.wake_pending = set()
+        self.busy = defaultdict(float)
+        self.queue_delays = defaultdict(list)
+        self.chapters_left = {m: len(chapters) for m in models}
+        self.chapters_done = defaultdict(int)
+        self.dropped = []
+
+    # -- model of the pipeline ------------------------------------------------
+
+    def _stage_provider(self, stage: str, model: str) -> str:
+        if stage == "generation":
+            return provider_of(model)
+        if stage == "book":
+            return BOOK_PROVIDER
+        return provider_of(self.evaluator)
+
+    def _expected_seconds(self, task: Dict) -> float:
+        if task["stage"] == "generation":
+            return self.profiles.get(task["model"], self.profiles["*"])["median"]
+        return DEFAULT_STAGE_LATENCY[task["stage"]][0]
+
+    def _sample(self, task: Dict):
+        """(duration, failed) for one attempt of a task"""
+        if task["stage"] == "generation":
+            profile = self.profiles.get(task["model"], self.profiles["*"])
+            median, sigma, error_rate = profile["median"], profile["sigma"], profile["error_rate"]
+        elif task["stage"] == "book":
+            (median, sigma), error_rate = DEFAULT_STAGE_LATENCY["book"], 0.0
+        else:
+            (median, sigma), error_rate = DEFAULT_STAGE_LATENCY[task["stage"]], DEFAULT_ERROR_RATE
+
+        if self.rng.random() < error_rate:
+            return DEFAULT_ERROR_SECONDS, True
+        return self.rng.lognormvariate(math.log(median), sigma), False
+
+    # -- event loop -----------------------------------------------------------
+
+    def _schedule(self, at: float, kind: str, payload):
+        self._seq += 1
+        heapq.heappush(self._events, (at, self._seq, kind, payload))
+
+    def _enqueue(self, task: Dict):
+        task["ready_at"] = self.now
+        provider = self._stage_provider(task["stage"], task["model"])
+        self.queues[provider].append(task)
+        self._dispatch(provider)
+
+    def _pop(self, provider: str) -> Dict:
+        queue = self.queues[provider]
+        if self.policy == "lpt":
+            # Longest expected task first
+            index = max(range(len(queue)), key=lambda i: self._expected_seconds(queue[i]))
+            return queue.pop(index)
+        return queue.pop(0)
+
+    def _dispatch(self, provider: str):
+        slots = self.concurrency.get(provider, self.default_concurrency)
+        rpm = self.rpm.get(provider)
+        while self.queues[provider] and self.running[provider] < slots:
+            if rpm and self.now < self.next_start[provider]:
+                if provider not in self.wake_pending:
+                    self.wake_pending.add(provider)
+                    self._schedule(self.next_start[provider], "wake", provider)
+                return
+            task = self._pop(provider)
+            self.running[provider] += 1
+            if rpm:
+                self.next_start[provider] = self.now + 60.0 / rpm
+            self.queue_delays[(task["stage"], provider)].append(self.now - task["ready_at"])
+            duration, failed = self._sample(task)
+            self.busy[provider] += duration
+            self._schedule(self.now + duration, "finish", (provider, task, failed))
+
+    def _finish(self, provider: str, task: Dict, failed: bool):
+        self.running[provider] -= 1
+        model = task["model"]
+
+        if failed:
+            task["attempts"] += 1
+            if task["attempts"] <= self.max_retries:
+                self._enqueue(task)
+            else:
+                self.dropped.append({"model": model, "chapter": task["chapter"], "stage": task["stage"]})
+                self._chapter_finished(model, success=False)
+        elif task["stage"] == "generation":
+            self._enqueue({**task, "stage": "fact_check", "attempts": 0})
+        elif task["stage"] == "fact_check":
+            self._enqueue({**task, "stage": "scoring", "attempts": 0})
+        elif task["stage"] == "scoring":
+            self._chapter_finished(model, success=True)
+
+        self._dispatch(provider)
+
+    def _chapter_finished(self, model: str, success: bool):
+        self.chapters_left[model] -= 1
+        if success:
+            self.chapters_done[model] += 1
+        if self.chapters_left[model] == 0 and self.chapters_done[model] > 0:
+            self._enqueue({"model": model, "chapter": None, "stage": "book", "attempts": 0})
+
+    def run(self) -> Dict:
+        """Simulate the whole matrix and return makespan, utilization and queueing"""
+        for model in self.models:
+            for chapter_key in self.chapters:
+                self._enqueue({"model": model, "chapter": chapter_key, "stage": "generation", "attempts": 0})
+
+        while self._events:
+            self.now, _, kind, payload = heapq.heappop(self._events)
+            if kind == "wake":
+                self.wake_pending.discard(payload)
+                self._dispatch(payload)
+            else:
+                self._finish(*payload)
+
+        makespan = self.now
+        utilization = {}
+        for provider, busy in self.busy.items():
+            slots = self.concurrency.get(provider, self.default_concurrency)
+            utilization[provider] = busy / (slots * makespan) if makespan else 0.0
+
+        queueing = {}
+        for (stage, provider), delays in self.queue_delays.items():
+            ordered = sorted(delays)
+            queueing[f"{stage}@{provider}"] = {
+                "mean_seconds": statistics.mean(ordered),
+                "p95_seconds": ordered[min(len(ordered) - 1, int(0.95 * len(ordered)))]
+            }
+
+        return {
+            "makespan_seconds": makespan,
+            "utilization": utilization,
+            "queueing": queueing,
+            "chapters_completed": sum(self.chapters_done.values()),
+            "chapters_dropped": len(self.dropped)
+        }
+
+
+def simulate(models: List[str], chapters: List[str], profiles: Dict[str, Dict],
+             replications: int = 20, seed: int = 0, **settings) -> Dict:
+    """Average several replications of the same settings"""
+    runs = [CapacitySimulator(models, chapters, profiles, seed=seed + i, **settings).run()
+            for i in range(replications)]
+
+    makespans = sorted(r["makespan_seconds"] for r in runs)
+    providers = {p for r in runs for p in r["utilization"]}
+    queue_keys = {k for r in runs for k in r["queueing"]}
+
+    return {
+        "settings": {k: v for k, v in settings.items()},
+        "replications": replications,
+        "makespan_mean_seconds": statistics.mean(makespans),
+        "makespan_p90_seconds": makespans[min(len(makespans) - 1, int(0.9 * len(makespans)))],
+        "utilization": {p: statistics.mean(r["utilization"].get(p, 0.0) for r in runs) for p in sorted(providers)},
+        "queueing": {k: {
+            "mean_seconds": statistics.mean(r["queueing"][k]["mean_seconds"] for r in runs if k in r["queueing"]),
+            "p95_seconds": statistics.mean(r["queueing"][k]["p95_seconds"] for r in runs if k in r["queueing"])
+        } for k in sorted(queue_keys)},
+        "chapters_completed_mean": statistics.mean(r["chapters_completed"] for r in runs),
+        "chapters_dropped_mean": statistics.mean(r["chapters_dropped"] for r in runs)
+    }
+
+
+def print_result(result: Dict, label: str = ""):
+    """Print one simulated configuration"""
+    print(f"\n{'='*80}")
+    print(f"SIMULATION {label}".rstrip())
+    print(f"{'='*80}")
+    print(f"Makespan: {result['makespan_mean_seconds']/60:.1f} min mean, "
+          f"{result['makespan_p90_seconds']/60:.1f} min p90 ({result['replications']} replications)")
+    print(f"Chapters completed: {result['chapters_completed_mean']:.1f}, dropped: {result['chapters_dropped_mean']:.1f}")
+    print("\nProvider utilization:")
+    for provider, utilization in result["utilization"].items():
+        print(f"  {provider:<15} {utilization:>6.1%}")
+    print("\nQueueing delay:")
+    for key, delay in result["queueing"].items():
+        print(f"  {key:<30} mean {delay['mean_seconds']:>8.1f}s  p95 {delay['p95_seconds']:>8.1f}s")
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Simulate AR7 run makespan under different scheduler settings")
+    parser.add_argument("--summary", action="append",
+                       help="Run summary with per-chapter durations (repeatable, default PRODUCTION_SUMMARY.json)")
+    parser.add_argument("--history-root", default=str(DEFAULT_HISTORY_ROOT),
+                       help="Also fit from *_metadata.json files under this directory")
+    parser.add_argument("--models", help="Comma-separated model names (default: models in the telemetry)")
+    parser.add_argument("--chapters", default="3",
+                       help="Number of chapters, or comma-separated chapter keys")
+    parser.add_argument("--evaluator", default=DEFAULT_EVALUATOR, help="Fact-check/scoring model")
+    parser.add_argument("--concurrency", type=int, default=1, help="Concurrent requests per provider")
+    parser.add_argument("--provider-concurrency", nargs="*", help="Per-provider overrides, e.g. gemini=8")
+    parser.add_argument("--rpm", nargs="*", help="Requests per minute per provider, e.g. gemini=30")
+    parser.add_argument("--max-retries", type=int, default=1)
+    parser.add_argument("--policy", choices=["fifo", "lpt"], default="fifo",
+                       help="Queue order per provider (lpt = longest expected task first)")
+    parser.add_argument("--replications", type=int, default=20)
+    parser.add_argument("--seed", type=int, default=0)
+    parser.add_argument("--sweep", help="Comma-separated concurrency values to compare")
+    parser.add_argument("--output", help="Write results as JSON")
+    args = parser.parse_args()
+
+    summary_files = [Path(s) for s in args.summary] if args.summary else DEFAULT_SUMMARIES
+    telemetry = load_telemetry(summary_files, Path(args.history_root))
+    profiles = fit_profiles(telemetry)
+
+    models = [m.strip() for m in args.models.split(',')] if args.models else sorted(telemetry)
+    if not models:
+        print("❌ No models: pass --models or a summary with telemetry")
+        return 1
+
+    if args.chapters.isdigit():
+        chapters = [f"chapter_{i}" for i in range(1, int(args.chapters) + 1)]
+    else:
+        chapters = [c.strip() for c in args.chapters.split(',')]
+
+    print(f"Fitted {len(profiles) - 1} model profiles from {sum(len(t['durations']) for t in telemetry.values())} durations")
+    for model in models:
+        profile = profiles.get(model, profiles["*"])
+        source = "fit" if model in profiles else "pooled"
+        print(f"  {model:<55} median {profile['median']:>6.1f}s  sigma {profile['sigma']:.2f}  "
+              f"error {profile['error_rate']:.1%} ({source})")
+
+    settings = {
+        "evaluator": args.evaluator,
+        "concurrency": {p: int(v) for p, v in parse_limits(args.provider_concurrency).items()},
+        "rpm": parse_limits(args.rpm),
+        "max_retries": args.max_retries,
+        "policy": args.policy
+    }
+
+    levels = [int(c) for c in args.sweep.split(',')] if args.sweep else [args.concurrency]
+    results = []
+    for level in levels:
+        result = simulate(models, chapters, profiles, replications=args.replications, seed=args.seed,
+                          default_concurrency=level, **settings)
+        results.append(result)
+        print_result(result, f"- {len(models)} models × {len(chapters)} chapters, concurrency {level}")
+
+    if len(results) > 1:
+        print(f"\n{'Concurrency':>12} {'Makespan (min)':>15} {'p90 (min)':>10}")
+        for level, result in zip(levels, results):
+            print(f"{level:>12} {result['makespan_mean_seconds']/60:>15.1f} {result['makespan_p90_seconds']/60:>10.1f}")
+
+    if args.output:
+        Path(args.output).write_text(json.dumps({
+            "models": models,
+            "chapters": chapters,
+            "profiles": profiles,
+            "results": results
+        }, indent=2), encoding='utf-8')
+        print(f"\n💾 Saved: {args.output}")
+
+    return 0
+
+
+if __name__ == "__main__":
+    sys.exit(main())
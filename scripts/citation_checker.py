@@ -0,0 +1,438 @@
+#!/usr/bin/env python3
+"""
+citation_checker.py
+
+Offline, deterministic check of in-text citations against each chapter's
+reference list - no LLM calls.
+
+The v2 cited prompts (add_citations_to_prompts.py) require "(Author et al., Year)"
+citations, a References section, a minimum number of citations per chapter and
+literature from the AR6 cutoff (2020-11-01) to the AR7 cutoff (2026-06-30). For
+every chapter this:
+
+    - parses parenthetical ("(Smith et al., 2021a; IPCC, 2023)") and narrative
+      ("Smith et al. (2021)") citations, and the References section's entries
+    - resolves each citation to a reference by first-author surname and year
+      (with its a/b suffix when one is given) and each reference back
+    - flags dangling citations (no reference), unused references, works dated
+      outside the literature window (year-granular, so works from the start
+      year pass) and malformed or placeholder DOIs
+    - counts citations per chapter against minimum_citations_per_chapter
+
+Results feed the fact-checker and scorer prompts (citation_note) and their
+per-chapter results. The evaluators apply the requirements of the prompts file a
+model's chapters were generated from (recorded in generation_summary.json); a
+prompts file without citation_requirements imposes no minimum. Run standalone over a whole comparison:
+
+    uv run python citation_checker.py --model-outputs output/ar7_model_comparison
+"""
+
+import argparse
+import json
+import re
+import sys
+import unicodedata
+from collections import defaultdict
+from datetime import date, datetime
+from pathlib import Path
+from typing import Dict, List, Optional, Tuple
+
+from quality_gate import PARENTHETICAL_RE
+from reasoning_traces import is_reasoning_file, strip_reasoning
+from output_writer import atomic_write_json, atomic_write_text
+
+DEFAULT_REQUIREMENTS_FILE = "prompts/ar7_model_comparison_prompts_v2_full_cited.json"
+DEFAULT_WINDOW_START = date(2020, 11, 1)
+DEFAULT_WINDOW_END = date(2026, 6, 30)
+DEFAULT_MIN_CITATIONS = 50
+MAX_LISTED = 20  # Flagged items listed per chapter in prompt notes and reports
+
+SURNAME_PARTICLES = ("van", "von", "der", "den", "de", "del", "della", "la", "le", "du", "da", "di", "dos", "ter", "ten")
+PARTICLE = rf"(?:(?:{'|'.join(SURNAME_PARTICLES)}) )*"  # van der Berg, de la Cruz
+SURNAME = r"[A-Z][A-Za-z'À-ſ\-]+"
+AUTHOR = (rf"(?P<author>{PARTICLE}{SURNAME}(?: {SURNAME}){{0,2}})"
+          rf"(?: et al\.?| (?:and|&) {PARTICLE}{SURNAME})?")
+YEAR = r"(?P<year>(?:19|20)\d{2})(?P<suffix>[a-z]?)\b"
+
+CITATION_RE = re.compile(rf"{AUTHOR},? {YEAR}")
+# An article before the name ("The Paris Agreement (2015)") marks a noun phrase with a date, not an
+# author - unless the name is an acronym ("the IPCC (2021)")
+NARRATIVE_CITATION_RE = re.compile(rf"(?<![\w'\-])(?:(?P<article>[Tt]he|[Aa]n?|[Tt]his|[Tt]hese) )?{AUTHOR} "
+                                   rf"\((?P<years>(?:19|20)\d{{2}}[a-z]?(?:,\s*(?:19|20)\d{{2}}[a-z]?)*)\)")
+YEAR_RE = re.compile(r"\b((?:19|20)\d{2})([a-z]?)\b")
+REFERENCE_YEAR_RE = re.compile(r"\(((?:19|20)\d{2})([a-z]?)\)")
+
+REFERENCES_HEADING_RE = re.compile(
+    r"^[ \t]*(?:#{1,6}[ \t]*)?(?:\*\*)?[ \t]*(?:\d+\.?[ \t]*)?"
+    r"(?:references|bibliography|literature cited|works cited|reference list)[ \t]*(?:\*\*)?:?[ \t]*$",
+    re.IGNORECASE | re.MULTILINE
+)
+NEXT_HEADING_RE = re.compile(r"^#{1,6}\s", re.MULTILINE)
+ENTRY_MARKER_RE = re.compile(r"^\s*(?:[-*+]\s+|\d+[.)]\s+|\[\d+\]\s*)")
+ITALIC_RE = re.compile(r"\*+|(?<!\w)_+|_+(?!\w)")
+DOI_MENTION_RE = re.compile(r"(?:doi\.org/|\bdoi:?\s*)(\S+)", re.IGNORECASE)
+BARE_DOI_RE = re.compile(r"\b(10\.\S+/\S+)")
+VALID_DOI_RE = re.compile(r"^10\.\d{4,9}/[-._;()/:A-Za-z0-9<>\[\]]+$")
+PLACEHOLDER_DOI_RE = re.compile(r"x{3,}|\.\.\.|…", re.IGNORECASE)
+
+
+def load_citation_requirements(prompts_file: Optional[Path] = DEFAULT_REQUIREMENTS_FILE) -> Dict:
+    """
+    Literature window and minimum citation count from a prompts file's
+    citation_requirements block (defaults if the file or fields are missing)
+
+    "required" is False when the prompts file has no citation_requirements (or
+    there is no file): the chapter was never asked for citations, so no minimum
+    applies and the window is not reported to evaluators.
+    """
+    requirements = {"start": DEFAULT_WINDOW_START, "end": DEFAULT_WINDOW_END,
+                    "min_citations": DEFAULT_MIN_CITATIONS, "required": False,
+                    "prompts_file": str(prompts_file) if prompts_file else None}
+    if not prompts_file or not Path(prompts_file).exists():
+        return requirements
+
+    try:
+        config = json.loads(Path(prompts_file).read_text(encoding='utf-8')).get("citation_requirements") or {}
+    except (json.JSONDecodeError, OSError):
+        return requirements
+    requirements["required"] = bool(config)
+
+    period = config.get("literature_period")
+    if isinstance(period, dict):
+        for field in ("start", "end"):
+            try:
+                requirements[field] = date.fromisoformat(period[field])
+            except (KeyError, TypeError, ValueError):
+                pass
+    if isinstance(config.get("minimum_citations_per_chapter"), int):
+        requirements["min_citations"] = config["minimum_citations_per_chapter"]
+    return requirements
+
+
+def generation_prompts_file(model_dir: Path) -> Optional[str]:
+    """Prompts file a model's chapters were generated from, as recorded in its generation_summary.json"""
+    try:
+        summary = json.loads((Path(model_dir) / "generation_summary.json").read_text(encoding='utf-8'))
+    except (OSError, ValueError):
+        return None
+    return summary.get("prompts_file")
+
+
+def requirements_for_model(model_dir: Path, prompts_file: Optional[str] = None) -> Dict:
+    """
+    load_citation_requirements() for one model's chapters: the given prompts file,
+    else the one recorded with the generation, else no requirements
+    """
+    return load_citation_requirements(prompts_file or generation_prompts_file(model_dir))
+
+
+def _author_key(word: str) -> str:
+    return unicodedata.normalize("NFKD", word).encode("ascii", "ignore").decode().lower().strip("'-")
+
+
+def _author_keys(author: str) -> List[str]:
+    """Keys to resolve an author by: first word (organisations), then last word ("See Smith")"""
+    words = author.split()
+    return list(dict.fromkeys(_author_key(w) for w in (words[:1] + words[-1:]))) if words else [""]
+
+
+def parse_in_text_citations(body: str) -> List[Dict]:
+    """Every in-text citation in the chapter body, one per (author, year)"""
+    citations = []
+    for group in PARENTHETICAL_RE.findall(body):
+        for part in group.split(";"):
+            match = CITATION_RE.search(part)
+            if not match:
+                continue
+            # "Smith et al., 2021, 2023" cites two works
+            for year, suffix in YEAR_RE.findall(part[match.start("year"):]):
+                citations.append({"author": match.group("author"), "year": int(year), "suffix": suffix,
+                                  "text": f"{match.group(0).split(',')[0].strip()}, {year}{suffix}"})
+
+    for match in NARRATIVE_CITATION_RE.finditer(body):
+        if match.group("article") and not match.group("author").isupper():  # "the IPCC (2021)" still cites
+            continue
+        for year, suffix in YEAR_RE.findall(match.group("years")):
+            citations.append({"author": match.group("author"), "year": int(year), "suffix": suffix,
+                              "text": f"{body[match.start('author'):match.start('years') - 2]} ({year}{suffix})"})
+    return citations
+
+
+def split_references(text: str) -> Tuple[str, List[str]]:
+    """
+    (chapter body, reference entries)
+
+    The reference list is everything after the last References/Bibliography
+    heading up to the next markdown heading; entries are its lines, with wrapped
+    continuation lines (lowercase, URL or DOI starts) joined to the entry above.
+    """
+    headings = list(REFERENCES_HEADING_RE.finditer(text))
+    if not headings:
+        return text, []
+
+    start = headings[-1]
+    following = NEXT_HEADING_RE.search(text, start.end())
+    end = following.start() if following else len(text)
+    body = text[:start.start()] + text[end:]
+
+    entries = []
+    for line in text[start.end():end].splitlines():
+        line = line.strip()
+        if not line or set(line) <= set("-*_="):
+            continue
+        continuation = not ENTRY_MARKER_RE.match(line) and (
+            (line[0].islower() and not re.match(PARTICLE + SURNAME, line))  # "van der Berg, A." starts an entry
+            or line.lower().startswith(("http", "doi")))
+        line = ITALIC_RE.sub("", ENTRY_MARKER_RE.sub("", line)).strip()
+        if continuation and entries:
+            entries[-1] += " " + line
+        elif line:
+            entries.append(line)
+    return body, entries
+
+
+def find_dois(entry: str) -> Tuple[List[str], List[str]]:
+    """(valid DOIs, malformed DOIs) mentioned in a reference entry"""
+    candidates = [m.group(1) for m in DOI_MENTION_RE.finditer(entry)] + BARE_DOI_RE.findall(entry)
+    valid, malformed = [], []
+    for doi in dict.fromkeys(c.rstrip(".,;)]>") for c in candidates):
+        if not doi:
+            continue
+        if VALID_DOI_RE.match(doi) and not PLACEHOLDER_DOI_RE.search(doi):
+            if doi not in valid:
+                valid.append(doi)
+        elif doi not in malformed:
+            malformed.append(doi)
+    return valid, [doi for doi in malformed if doi not in valid]
+
+
+def parse_reference(entry: str) -> Dict:
+    """First author, year (with suffix) and DOIs of one reference entry"""
+    author = re.split(r",|\(|\.\s|\s&\s", entry, maxsplit=1)[0].strip()
+    year_match = REFERENCE_YEAR_RE.search(entry) or YEAR_RE.search(entry)
+    valid, malformed = find_dois(entry)
+    return {
+        "author": author,
+        "year": int(year_match.group(1)) if year_match else None,
+        "suffix": year_match.group(2) if year_match else "",
+        "dois": valid,
+        "malformed_dois": malformed,
+        "text": entry
+    }
+
+
+def _in_window(year: Optional[int], requirements: Dict) -> bool:
+    return year is None or requirements["start"].year <= year <= requirements["end"].year
+
+
+def check_chapter_citations(text: str, requirements: Optional[Dict] = None) -> Dict:
+    """
+    Resolve a chapter's in-text citations against its reference list
+
+    Returns:
+        Counts (in_text_citations, unique_cited_works, references, resolved,
+        resolution_rate, citations_per_1k_words, valid_dois), the flagged items
+        (dangling_citations, unused_references, out_of_window, malformed_dois,
+        undated_references) and has_reference_section / meets_minimum
+    """
+    requirements = requirements or load_citation_requirements(None)
+    text = strip_reasoning(text or "")
+    body, entries = split_references(text)
+    citations = parse_in_text_citations(body)
+    references = [parse_reference(entry) for entry in entries]
+
+    by_key = defaultdict(list)  # (author key, year) → reference indices
+    for i, reference in enumerate(references):
+        if reference["year"] is not None:
+            by_key[(_author_keys(reference["author"])[0], reference["year"])].append(i)
+
+    used = set()
+    dangling = {}
+    resolved = 0
+    for citation in citations:
+        candidates = next((by_key[(key, citation["year"])] for key in _author_keys(citation["author"])
+                           if (key, citation["year"]) in by_key), [])
+        if citation["suffix"]:
+            candidates = [i for i in candidates if references[i]["suffix"] in (citation["suffix"], "")]
+        if candidates:
+            resolved += 1
+            used.update(candidates if not citation["suffix"] else candidates[:1])
+        else:
+            dangling.setdefault(citation["text"], citation)
+
+    cited_works = {(_author_keys(c["author"])[-1], c["year"], c["suffix"]) for c in citations}
+    out_of_window = {}
+    for citation in citations:
+        if not _in_window(citation["year"], requirements):
+            out_of_window.setdefault(citation["text"], {"work": citation["text"], "year": citation["year"],
+                                                        "where": "citation"})
+    for reference in references:
+        if not _in_window(reference["year"], requirements):
+            out_of_window.setdefault(reference["text"][:120], {"work": reference["text"][:120],
+                                                                "year": reference["year"], "where": "reference"})
+
+    word_count = len(body.split())
+    return {
+        "in_text_citations": len(citations),
+        "unique_cited_works": len(cited_works),
+        "references": len(references),
+        "resolved": resolved,
+        "resolution_rate": resolved / len(citations) if citations else 0.0,
+        "citations_per_1k_words": len(citations) / word_count * 1000 if word_count else 0.0,
+        "valid_dois": sum(len(r["dois"]) for r in references),
+        "dangling_citations": list(dangling),
+        "unused_references": [r["text"][:120] for i, r in enumerate(references) if i not in used],
+        "out_of_window": list(out_of_window.values()),
+        "malformed_dois": [doi for r in references for doi in r["malformed_dois"]],
+        "undated_references": [r["text"][:120] for r in references if r["year"] is None],
+        "has_reference_section": bool(entries),
+        "citations_required": requirements["required"],
+        "min_citations": requirements["min_citations"] if requirements["required"] else None,
+        "meets_minimum": not requirements["required"] or len(citations) >= requirements["min_citations"],
+        "literature_window": [requirements["start"].isoformat(), requirements["end"].isoformat()]
+    }
+
+
+def citation_note(check: Dict) -> str:
+    """
+    Summary of a chapter's citation check for an evaluator prompt
+
+    The minimum and literature-window lines only appear when the chapter's prompts
+    asked for citations (citation_requirements).
+    """
+    minimum = f" (minimum required: {check['min_citations']})" if check.get("citations_required") else ""
+    lines = [f"AUTOMATED CITATION CHECK (whole chapter, deterministic): "
+             f"{check['in_text_citations']} in-text citations of {check['unique_cited_works']} works, "
+             f"{check['references']} reference entries, {check['resolution_rate']*100:.0f}% of citations resolved"
+             f"{minimum}."]
+    if not check["has_reference_section"]:
+        lines.append("- No References section found.")
+    if check["dangling_citations"]:
+        lines.append(f"- Cited but missing from the references ({len(check['dangling_citations'])}): "
+                     + "; ".join(check["dangling_citations"][:MAX_LISTED]))
+    if check["unused_references"]:
+        lines.append(f"- References never cited: {len(check['unused_references'])}")
+    if check["out_of_window"] and check.get("citations_required"):
+        window = " to ".join(check["literature_window"])
+        lines.append(f"- Outside the {window} literature window ({len(check['out_of_window'])}): "
+                     + "; ".join(f"{w['work'][:60]}" for w in check["out_of_window"][:MAX_LISTED]))
+    if check["malformed_dois"]:
+        lines.append(f"- Malformed DOIs: {', '.join(check['malformed_dois'][:MAX_LISTED])}")
+    return "\n".join(lines) + "\n\n"
+
+
+def find_chapters(model_outputs_dir: Path) -> List[Tuple[str, str, Path]]:
+    """(model_id, chapter_key, file) for every chapter under a model outputs directory"""
+    chapters = []
+    for model_dir in sorted(d for d in Path(model_outputs_dir).iterdir() if d.is_dir()):
+        for chapter_dir in (model_dir / "prompts_output", model_dir / "chapters", model_dir):
+            if not chapter_dir.exists():
+                continue
+            for chapter_file in sorted(chapter_dir.glob("*.txt")) + sorted(chapter_dir.glob("*.md")):
+                if not is_reasoning_file(chapter_file):
+                    chapters.append((model_dir.name, chapter_file.stem, chapter_file))
+    return chapters
+
+
+def check_corpus(model_outputs_dir: Path, requirements: Optional[Dict] = None) -> Dict[str, Dict[str, Dict]]:
+    """check_chapter_citations() for every chapter, by model then chapter key"""
+    results = defaultdict(dict)
+    for model_id, chapter_key, chapter_file in find_chapters(model_outputs_dir):
+        try:
+            text = chapter_file.read_text(encoding='utf-8')
+        except OSError:
+            continue
+        results[model_id][chapter_key] = check_chapter_citations(text, requirements)
+    return dict(results)
+
+
+def generate_report(results: Dict[str, Dict[str, Dict]], requirements: Dict) -> str:
+    """Markdown per-model table and per-chapter flags"""
+    report = f"""# Citation Consistency Report
+
+**Generated**: {datetime.now().strftime('%Y-%m-%d %H:%M:%S')}
+**Literature window**: {requirements['start']} to {requirements['end']}
+**Minimum citations per chapter**: {requirements['min_citations']}
+
+## Summary by Model
+
+| Model | Chapters | Citations | References | Resolved | Dangling | Unused | Out of window | Bad DOIs | Below minimum |
+|-------|----------|-----------|------------|----------|----------|--------|---------------|----------|---------------|
+"""
+    for model_id, chapters in results.items():
+        checks = list(chapters.values())
+        citations = sum(c["in_text_citations"] for c in checks)
+        resolved = sum(c["resolved"] for c in checks)
+        report += (f"| {model_id} | {len(checks)} | {citations} | {sum(c['references'] for c in checks)} | "
+                   f"{resolved / citations * 100 if citations else 0:.0f}% | "
+                   f"{sum(len(c['dangling_citations']) for c in checks)} | "
+                   f"{sum(len(c['unused_references']) for c in checks)} | "
+                   f"{sum(len(c['out_of_window']) for c in checks)} | "
+                   f"{sum(len(c['malformed_dois']) for c in checks)} | "
+                   f"{sum(1 for c in checks if not c['meets_minimum'])} |\n")
+
+    report += "\n## Chapters\n\n"
+    for model_id, chapters in results.items():
+        report += f"### {model_id}\n\n"
+        for chapter_key, check in chapters.items():
+            flags = []
+            if not check["has_reference_section"]:
+                flags.append("no references")
+            if not check["meets_minimum"]:
+                flags.append(f"{check['in_text_citations']} < {check['min_citations']} citations")
+            for field, label in (("dangling_citations", "dangling"), ("unused_references", "unused"),
+                                 ("out_of_window", "out of window"), ("malformed_dois", "bad DOIs")):
+                if check[field]:
+                    flags.append(f"{len(check[field])} {label}")
+            status = "✅" if not flags else "⚠️ " + ", ".join(flags)
+            report += f"- {chapter_key}: {check['in_text_citations']} citations, {check['references']} references {status}\n"
+        report += "\n"
+    return report
+
+
+def main():
+    parser = argparse.ArgumentParser(
+        description="Offline in-text citation / reference list consistency check",
+        formatter_class=argparse.ArgumentDefaultsHelpFormatter
+    )
+    parser.add_argument("--model-outputs", required=True,
+                        help="Directory containing model outputs (e.g., output/ar7_model_comparison)")
+    parser.add_argument("--prompts", default=DEFAULT_REQUIREMENTS_FILE,
+                        help="Prompts file whose citation_requirements set the window and minimum")
+    parser.add_argument("--output-dir", help="Where to write results (default: <model-outputs>/citation_check)")
+
+    args = parser.parse_args()
+
+    model_outputs_dir = Path(args.model_outputs)
+    if not model_outputs_dir.exists():
+        print(f"❌ Error: Model outputs directory not found: {model_outputs_dir}")
+        return 1
+    output_dir = Path(args.output_dir) if args.output_dir else model_outputs_dir / "citation_check"
+
+    requirements = load_citation_requirements(args.prompts)
+    started = datetime.now()
+    results = check_corpus(model_outputs_dir, requirements)
+    elapsed = (datetime.now() - started).total_seconds()
+    chapter_count = sum(len(chapters) for chapters in results.values())
+
+    atomic_write_json(output_dir / "citation_check.json", {
+        "generated_at": datetime.now().isoformat(),
+        "literature_window": [requirements["start"].isoformat(), requirements["end"].isoformat()],
+        "min_citations": requirements["min_citations"],
+        "models": results
+    })
+    atomic_write_text(output_dir / "citation_check_report.md", generate_report(results, requirements))
+
+    print(f"📚 Checked {chapter_count} chapters from {len(results)} models in {elapsed:.1f}s")
+    for model_id, chapters in results.items():
+        checks = list(chapters.values())
+        print(f"  {model_id}: {sum(c['in_text_citations'] for c in checks)} citations, "
+              f"{sum(len(c['dangling_citations']) for c in checks)} dangling, "
+              f"{sum(len(c['out_of_window']) for c in checks)} out of window, "
+              f"{sum(1 for c in checks if not c['meets_minimum'])} chapters below minimum")
+    print(f"\nResults saved to: {output_dir}")
+    return 0
+
+
+if __name__ == "__main__":
+    sys.exit(main())
@@ -0,0 +1,305 @@
+#!/usr/bin/env python3
+"""
+claim_dedup.py
+
+Claim-level fact-checking: extract atomic factual claims from every chapter,
+cluster near-duplicates across models, verify each cluster once and project the
+verdicts back onto each chapter's issue list.
+
+Seven models writing the same chapter repeat many of the same claims ("1.1°C of
+warming since pre-industrial"); checking whole chapters re-verifies each of them
+once per model. Here evaluator calls scale with the number of unique claims:
+
+    - extract_claims() keeps the checkable sentences (or ';' clauses) of a
+      chapter - those stating a number, a calibrated likelihood/confidence term or
+      a citation - and normalizes them (citations, markdown, units, number
+      formatting).
+    - cluster_claims() groups claims that state the same numbers with the same
+      calibrated term and negations and have near-identical wording (token Jaccard), using an
+      inverted index so it stays cheap across thousands of claims. No LLM calls.
+    - claim_batches() packs one representative per cluster into evaluator batches;
+      collect_verdicts() / project_verdicts() map the verdicts back to every
+      chapter containing a member of the cluster.
+    - apportion_usage() splits each batch's cost over its claims and each claim's
+      over the chapters that share it, so per-chapter cost stays comparable.
+
+Prose claims without a number, calibrated term or citation are not extracted -
+use whole-chapter checking for a full review of the narrative.
+"""
+
+import re
+from collections import defaultdict
+from typing import Dict, List, Optional
+
+from fact_check_chunking import HEADING_RE, PARAGRAPH_SPLIT_RE, SEVERITY_RANK
+from quality_gate import AUTHOR_YEAR_RE, CALIBRATED_TERMS_RE, NARRATIVE_RE, NUMERIC_RE, PARENTHETICAL_RE
+from usage_accounting import USAGE_FIELDS, empty_usage
+
+DEFAULT_CLAIM_BATCH_SIZE = 25
+CLUSTER_SIMILARITY = 0.5  # Token Jaccard at which two claims are the same claim
+MIN_CLAIM_WORDS = 5
+MAX_CLAIM_WORDS = 80
+
+ISSUE_STATUSES = ("incorrect", "misleading", "unsupported", "outdated")
+
+# Sentence ends, except after common abbreviations
+CLAIM_SENTENCE_RE = re.compile(r"(?<!\bet al\.)(?<!\be\.g\.)(?<!\bi\.e\.)(?<!\bca\.)(?<=[.!?])\s+")
+CLAUSE_SPLIT_RE = re.compile(r";\s+")
+NUMBER_RE = re.compile(r"\d+(?:\.\d+)?")
+WORD_RE = re.compile(r"[a-z%]+|\d+(?:\.\d+)?")
+NEGATION_RE = re.compile(r"\b(?:not|no|never|neither|nor|without|cannot)\b|n't\b")
+MARKDOWN_RE = re.compile(r"^\s*(?:[-*+]\s+|\d+[.)]\s+|>\s*)|[*_`]+")
+
+STOPWORDS = {
+    "a", "an", "the", "and", "or", "of", "in", "on", "at", "to", "for", "by", "with", "from", "as",
+    "is", "are", "was", "were", "be", "been", "being", "has", "have", "had", "that", "this", "these",
+    "those", "it", "its", "which", "than", "such", "their", "there", "also", "about", "around",
+    "approximately", "roughly", "nearly", "some", "into", "over", "since", "between", "per"
+}
+
+# Spelling variants that should not split a cluster
+NORMALIZATIONS = [
+    (re.compile(r"(?<=\d),(?=\d{3}\b)"), ""),
+    (re.compile(r"\s*(?:°\s*c|℃|degrees? (?:celsius|c))\b"), " degc"),
+    (re.compile(r"\s*(?:per ?cent|%)"), " %"),
+    (re.compile(r"[–—−]"), "-"),
+    (re.compile(r"\bpre-?industrial\b"), "preindustrial"),
+    (re.compile(r"\bco2\b|\bco₂\b|carbon dioxide"), "co2"),
+    (re.compile(r"[~∼≈]"), " approximately "),
+]
+
+
+def strip_citations(text: str) -> str:
+    """Remove in-text citations (author-year groups, narrative and numeric)"""
+    text = PARENTHETICAL_RE.sub(lambda m: "" if AUTHOR_YEAR_RE.search(m.group(1)) else m.group(0), text)
+    text = NARRATIVE_RE.sub(lambda m: m.group(0).split(" (")[0], text)
+    return NUMERIC_RE.sub("", text)
+
+
+def normalize_claim(text: str) -> str:
+    """Lowercased claim without citations or markdown, with units and numbers spelled one way"""
+    text = MARKDOWN_RE.sub("", strip_citations(text)).lower()
+    for pattern, replacement in NORMALIZATIONS:
+        text = pattern.sub(replacement, text)
+    return re.sub(r"\s+", " ", text).strip(" .;:,")
+
+
+def _number(value: str) -> str:
+    return f"{float(value):g}"
+
+
+def _stem(word: str) -> str:
+    return word[:-1] if len(word) > 3 and word.endswith("s") and not word.endswith("ss") else word
+
+
+def claim_signature(normalized: str) -> Dict:
+    """Numbers, calibrated terms, negations and content tokens of a normalized claim"""
+    words = WORD_RE.findall(normalized)
+    negations = NEGATION_RE.findall(normalized)
+    return {
+        "numbers": tuple(sorted({_number(w) for w in words if NUMBER_RE.fullmatch(w)})),
+        "calibrated": tuple(sorted({t.lower() for t in CALIBRATED_TERMS_RE.findall(normalized)})),
+        "negations": tuple(sorted({"not" if w in ("n't", "cannot") else w for w in negations})),
+        "tokens": frozenset(_stem(w) for w in words if w not in STOPWORDS and not NUMBER_RE.fullmatch(w))
+    }
+
+
+def _is_factual(sentence: str) -> bool:
+    return bool(NUMBER_RE.search(sentence) or CALIBRATED_TERMS_RE.search(sentence)
+                or NUMERIC_RE.search(sentence) or NARRATIVE_RE.search(sentence)
+                or any(AUTHOR_YEAR_RE.search(g) for g in PARENTHETICAL_RE.findall(sentence)))
+
+
+def extract_claims(text: str) -> List[Dict]:
+    """
+    Atomic factual claims of a chapter, in order
+
+    Returns:
+        Claims with "text" (as written), "section", "normalized" and the
+        claim_signature() fields
+    """
+    claims = []
+    section = None
+    seen = set()
+    for block in PARAGRAPH_SPLIT_RE.split(text):
+        lines = []
+        for line in block.strip().splitlines():
+            heading = HEADING_RE.match(line)
+            if heading:
+                section = heading.group(1)
+            elif line.strip() and not line.lstrip().startswith("|"):  # Tables are not prose claims
+                lines.append(MARKDOWN_RE.sub("", line).strip())
+
+        for sentence in CLAIM_SENTENCE_RE.split(" ".join(lines)):
+            for clause in CLAUSE_SPLIT_RE.split(sentence):
+                clause = clause.strip()
+                if not (MIN_CLAIM_WORDS <= len(clause.split()) <= MAX_CLAIM_WORDS) or not _is_factual(clause):
+                    continue
+                normalized = normalize_claim(clause)
+                if normalized in seen:  # Repeated verbatim within the chapter
+                    continue
+                seen.add(normalized)
+                claims.append({"text": clause, "section": section, "normalized": normalized,
+                               **claim_signature(normalized)})
+    return claims
+
+
+def _jaccard(a: frozenset, b: frozenset) -> float:
+    return len(a & b) / len(a | b) if a and b else 0.0
+
+
+def cluster_claims(chapter_claims: List[List[Dict]], similarity: float = CLUSTER_SIMILARITY) -> List[Dict]:
+    """
+    Cluster near-duplicate claims across chapters
+
+    Claims only join a cluster stating exactly the same numbers, calibrated
+    terms and negations - "1.1°C" and "1.2°C", or "has increased" and "has not
+    increased", are different claims that may get different verdicts - and whose tokens overlap the cluster's first claim by at least
+    `similarity` (Jaccard).
+
+    Args:
+        chapter_claims: extract_claims() output per chapter
+
+    Returns:
+        Clusters with "id", "representative" (the first claim seen) and "members"
+        ([chapter index, claim index] pairs); each claim's "cluster" is set in place
+    """
+    clusters = []
+    index = defaultdict(lambda: defaultdict(set))  # (numbers, calibrated, negations) → token → cluster ids
+
+    for chapter_index, claims in enumerate(chapter_claims):
+        for claim_index, claim in enumerate(claims):
+            block = index[(claim["numbers"], claim["calibrated"], claim["negations"])]
+            candidates = set()
+            for token in claim["tokens"]:
+                candidates |= block.get(token, set())
+
+            best, best_score = None, similarity
+            for cluster_id in candidates:
+                score = _jaccard(claim["tokens"], clusters[cluster_id]["representative"]["tokens"])
+                if score >= best_score:
+                    best, best_score = cluster_id, score
+
+            if best is None:
+                best = len(clusters)
+                clusters.append({"id": f"c{best}", "representative": claim, "members": []})
+                for token in claim["tokens"]:
+                    block[token].add(best)
+
+            clusters[best]["members"].append([chapter_index, claim_index])
+            claim["cluster"] = best
+    return clusters
+
+
+def cluster_spellings(cluster: Dict, chapter_claims: List[List[Dict]]) -> List[str]:
+    """Distinct normalized texts of a cluster's members, representative first"""
+    texts = [cluster["representative"]["normalized"]]
+    texts += [chapter_claims[chapter][claim]["normalized"] for chapter, claim in cluster["members"]]
+    return list(dict.fromkeys(texts))
+
+
+def claim_batches(clusters: List[Dict], batch_size: int = DEFAULT_CLAIM_BATCH_SIZE) -> List[Dict]:
+    """Representatives of every cluster packed into evaluator batches"""
+    batches = []
+    for start in range(0, len(clusters), batch_size):
+        batches.append({"index": len(batches), "clusters": [c["id"] for c in clusters[start:start + batch_size]],
+                        "claims": [{"id": c["id"], "text": c["representative"]["text"],
+                                    "section": c["representative"]["section"]}
+                                   for c in clusters[start:start + batch_size]]})
+    return batches
+
+
+def format_claims(batch: Dict) -> str:
+    """Claims of one batch as the numbered list shown to the evaluator"""
+    return "\n".join(f"[{claim['id']}] {claim['text']}" + (f" (section: {claim['section']})" if claim["section"] else "")
+                     for claim in batch["claims"])
+
+
+def collect_verdicts(batches: List[Dict], batch_results: List[Dict]) -> Dict[str, Dict]:
+    """
+    Cluster id → verdict from every batch's {"claims": [{"id", "status", ...}]}
+
+    Claims the evaluator skipped, or whose batch failed, get status "unverified".
+    """
+    verdicts = {}
+    for batch, result in zip(batches, batch_results):
+        for verdict in result.get("claims") or []:
+            if isinstance(verdict, dict) and verdict.get("id") in batch["clusters"]:
+                verdicts[verdict["id"]] = {**verdict, "status": str(verdict.get("status", "")).lower()}
+        for cluster_id in batch["clusters"]:
+            verdicts.setdefault(cluster_id, {"id": cluster_id, "status": "unverified",
+                                             "error": result.get("error")})
+    return verdicts
+
+
+def project_verdicts(chapter_claims: List[List[Dict]], clusters: List[Dict],
+                     verdicts: Dict[str, Dict]) -> List[List[Dict]]:
+    """
+    Issue list per chapter: one issue per claim whose cluster was judged wrong
+
+    Each issue quotes the claim as that chapter wrote it and records the cluster
+    and how many chapters share it.
+    """
+    chapter_issues = []
+    for claims in chapter_claims:
+        issues = []
+        for claim in claims:
+            cluster = clusters[claim["cluster"]]
+            verdict = verdicts.get(cluster["id"], {})
+            if verdict.get("status") not in ISSUE_STATUSES:
+                continue
+            severity = str(verdict.get("severity", "minor")).lower()
+            issues.append({
+                "type": verdict.get("type") or "factual_error",
+                "severity": severity if severity in SEVERITY_RANK else "minor",
+                "location": claim["text"],
+                "issue": verdict.get("issue", ""),
+                "correction": verdict.get("correction", ""),
+                "section": claim["section"],
+                "claim_id": cluster["id"],
+                "shared_by": len({chapter for chapter, _ in cluster["members"]}),
+                "cached_verdict": bool(verdict.get("cached"))
+            })
+        chapter_issues.append(issues)
+    return chapter_issues
+
+
+def apportion_usage(batches: List[Dict], batch_results: List[Dict], clusters: List[Dict],
+                    chapter_count: int) -> List[Dict]:
+    """Per-chapter share of the evaluator usage: batch → its claims → the chapters sharing each claim"""
+    cluster_index = {cluster["id"]: cluster for cluster in clusters}
+    usage = [empty_usage() for _ in range(chapter_count)]
+    for batch, result in zip(batches, batch_results):
+        batch_usage = result.get("usage")
+        if not batch_usage or not batch["clusters"]:
+            continue
+        for cluster_id in batch["clusters"]:
+            chapters = {chapter for chapter, _ in cluster_index[cluster_id]["members"]}
+            share = 1 / (len(batch["clusters"]) * len(chapters))
+            for chapter in chapters:
+                for field in USAGE_FIELDS:
+                    usage[chapter][field] += (batch_usage.get(field) or 0) * share
+
+    for chapter_usage in usage:
+        for field in USAGE_FIELDS:
+            if field.endswith("_tokens"):
+                chapter_usage[field] = round(chapter_usage[field])
+        chapter_usage["calls"] = round(chapter_usage["calls"], 3)  # A fraction of the shared calls
+    return usage
+
+
+def claim_stats(chapter_claims: List[List[Dict]], clusters: List[Dict], batches: List[Dict],
+                verdicts: Optional[Dict[str, Dict]] = None) -> Dict:
+    """Extraction/deduplication totals for the run summary"""
+    total = sum(len(claims) for claims in chapter_claims)
+    statuses = defaultdict(int)
+    for verdict in (verdicts or {}).values():
+        statuses[verdict.get("status") or "unverified"] += 1
+    return {
+        "chapters": len(chapter_claims),
+        "claims_extracted": total,
+        "unique_claims": len(clusters),
+        "dedup_ratio": total / len(clusters) if clusters else 0.0,
+        "evaluator_calls": len(batches),
+        "verdicts": dict(statuses)
+    }
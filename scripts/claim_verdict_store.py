@@ -0,0 +1,158 @@
+#!/usr/bin/env python3
+"""
+claim_verdict_store.py
+
+Durable normalized-claim → verdict cache shared by fact-checking runs.
+
+Successive runs (and prompt revisions such as v1 vs v2 cited prompts) produce
+largely the same claims, so --claim-mode verifies each claim once ever rather than
+once per run. Verdicts are keyed by the normalized claim text (claim_dedup.py),
+the checker model and a checker version - a hash of the verification prompt - so
+changing either re-verifies; entries older than the TTL are ignored.
+
+Each verdict is stored under the normalized text of the claim that was actually
+verified (the cluster representative) - never under the other members' spellings,
+so a claim merged into the wrong cluster cannot carry that verdict into later
+runs - with the evaluator tokens and cost its verification took, so hits report
+what they saved. Lookups try every spelling of a cluster, but only match text a
+verdict was stored under exactly.
+
+The store is a SQLite database in WAL mode: concurrent runs can read it while
+another writes, and each verified batch is committed as soon as it returns, so an
+interrupted run keeps what it already paid for.
+"""
+
+import hashlib
+import json
+import sqlite3
+import threading
+import time
+from pathlib import Path
+from typing import Dict, List, Optional
+
+DEFAULT_VERDICT_STORE = "output/claim_verdicts.sqlite3"
+DEFAULT_TTL_DAYS = 30
+
+SCHEMA = """
+CREATE TABLE IF NOT EXISTS verdicts (
+    claim_hash TEXT NOT NULL,
+    checker_model TEXT NOT NULL,
+    checker_version TEXT NOT NULL,
+    normalized TEXT NOT NULL,
+    status TEXT NOT NULL,
+    severity TEXT,
+    correction TEXT,
+    verdict TEXT NOT NULL,
+    input_tokens INTEGER NOT NULL DEFAULT 0,
+    output_tokens INTEGER NOT NULL DEFAULT 0,
+    cost REAL NOT NULL DEFAULT 0,
+    checked_at REAL NOT NULL,
+    PRIMARY KEY (claim_hash, checker_model, checker_version)
+)
+"""
+
+
+def claim_hash(normalized: str) -> str:
+    """Stable key for a normalized claim"""
+    return hashlib.sha256(normalized.encode("utf-8")).hexdigest()
+
+
+def prompt_version(prompt: str) -> str:
+    """Checker version derived from the verification prompt - edits to it invalidate old verdicts"""
+    return hashlib.sha256(prompt.encode("utf-8")).hexdigest()[:12]
+
+
+class ClaimVerdictStore:
+    """Verdicts of one checker model and version, with a TTL"""
+
+    def __init__(self, path: Path, checker_model: str, checker_version: str,
+                 ttl_days: float = DEFAULT_TTL_DAYS):
+        """
+        Args:
+            path: SQLite database file (created if missing)
+            checker_model: Model the verdicts come from - other models' verdicts are not reused
+            checker_version: e.g. prompt_version(CLAIM_VERIFIER_PROMPT)
+            ttl_days: Ignore verdicts older than this (0 = never expire)
+        """
+        self.path = Path(path)
+        self.path.parent.mkdir(parents=True, exist_ok=True)
+        self.checker_model = checker_model
+        self.checker_version = checker_version
+        self.ttl_seconds = ttl_days * 86400
+        self._lock = threading.Lock()
+        self.stats = {"lookups": 0, "hits": 0, "input_tokens_saved": 0, "output_tokens_saved": 0,
+                      "cost_saved": 0.0, "stored": 0}
+
+        self._db = sqlite3.connect(self.path, timeout=30, check_same_thread=False)
+        self._db.execute("PRAGMA journal_mode=WAL")
+        self._db.execute(SCHEMA)
+        self._db.commit()
+
+    def get(self, normalized_texts: List[str]) -> Optional[Dict]:
+        """
+        Freshest stored verdict for any of a claim's spellings, or None
+
+        Counts one lookup (and a hit, with the tokens it saved) per call.
+        """
+        hashes = [claim_hash(text) for text in normalized_texts]
+        min_checked_at = time.time() - self.ttl_seconds if self.ttl_seconds else 0
+        with self._lock:
+            self.stats["lookups"] += 1
+            row = self._db.execute(
+                f"SELECT verdict, input_tokens, output_tokens, cost, checked_at FROM verdicts "
+                f"WHERE claim_hash IN ({','.join('?' * len(hashes))}) AND checker_model = ? "
+                f"AND checker_version = ? AND checked_at >= ? ORDER BY checked_at DESC LIMIT 1",
+                (*hashes, self.checker_model, self.checker_version, min_checked_at)
+            ).fetchone() if hashes else None
+            if row is None:
+                return None
+
+            verdict, input_tokens, output_tokens, cost, checked_at = row
+            self.stats["hits"] += 1
+            self.stats["input_tokens_saved"] += input_tokens
+            self.stats["output_tokens_saved"] += output_tokens
+            self.stats["cost_saved"] += cost
+        return {**json.loads(verdict), "cached": True, "checked_by": self.checker_model,
+                "checked_at": checked_at}
+
+    def put(self, normalized: str, verdict: Dict, usage: Optional[Dict] = None):
+        """Store a verdict under the normalized text of the claim verified (usage = what verifying it cost)"""
+        usage = usage or {}
+        stored = {k: v for k, v in verdict.items() if k not in ("id", "cached", "checked_by", "checked_at")}
+        row = (claim_hash(normalized), self.checker_model, self.checker_version, normalized,
+               stored.get("status", ""), stored.get("severity"), stored.get("correction"),
+               json.dumps(stored), int(usage.get("input_tokens") or 0), int(usage.get("output_tokens") or 0),
+               float(usage.get("cost") or 0), time.time())
+        with self._lock:
+            self._db.execute("INSERT OR REPLACE INTO verdicts VALUES (?, ?, ?, ?, ?, ?, ?, ?, ?, ?, ?, ?)", row)
+            self._db.commit()
+            self.stats["stored"] += 1
+
+    def purge_expired(self) -> int:
+        """
+        Delete this checker model and version's verdicts past the TTL; returns rows removed
+
+        Other models' and versions' rows are left to runs using them - each run's
+        TTL only governs its own verdicts.
+        """
+        if not self.ttl_seconds:
+            return 0
+        with self._lock:
+            cursor = self._db.execute(
+                "DELETE FROM verdicts WHERE checker_model = ? AND checker_version = ? AND checked_at < ?",
+                (self.checker_model, self.checker_version, time.time() - self.ttl_seconds))
+            self._db.commit()
+        return cursor.rowcount
+
+    def summary(self) -> Dict:
+        """Lookups, hits, hit rate and evaluator tokens/cost saved this run"""
+        stats = dict(self.stats)
+        stats["hit_rate"] = stats["hits"] / stats["lookups"] if stats["lookups"] else 0.0
+        stats["path"] = str(self.path)
+        stats["checker_model"] = self.checker_model
+        stats["checker_version"] = self.checker_version
+        return stats
+
+    def close(self):
+        with self._lock:
+            self._db.close()
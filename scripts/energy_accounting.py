@@ -0,0 +1,106 @@
+#!/usr/bin/env python3
+"""
+energy_accounting.py
+
+Estimated energy (kWh) and emissions (kgCO2e) for a run, from recorded token usage.
+
+Token counts come from usage_accounting; per-model energy coefficients (Wh per 1K
+input/output/cached tokens) and grid carbon intensity come from
+config/energy_coefficients.json. Models are mapped to a size-class profile there;
+unmapped models use the default profile, and models served by the local backend use
+the "local" backend profile.
+
+Usage:
+    # Show the profile and coefficients each known model resolves to
+    uv run python energy_accounting.py
+"""
+
+import json
+import sys
+from functools import lru_cache
+from pathlib import Path
+from typing import Dict, Optional
+
+DEFAULT_CONFIG_FILE = Path(__file__).parent.parent / "config" / "energy_coefficients.json"
+
+
+@lru_cache(maxsize=None)
+def load_energy_config(config_file: Path = DEFAULT_CONFIG_FILE) -> Dict:
+    """Load energy coefficients (profiles, model → profile map, grid intensity)"""
+    with open(config_file) as f:
+        return json.load(f)
+
+
+def coefficients_for(model_name: str, backend: Optional[str] = None,
+                     config: Optional[Dict] = None) -> Dict:
+    """
+    Resolve the energy coefficients for a model
+
+    Returns:
+        The profile's coefficients plus "profile" and "grid_gco2e_per_kwh"
+    """
+    config = config or load_energy_config()
+
+    profile_name = config["backends"].get(backend) if backend else None
+    if not profile_name:
+        profile_name = config["models"].get(model_name, config["default_profile"])
+
+    profile = config["profiles"][profile_name]
+    return {
+        "profile": profile_name,
+        **profile,
+        "grid_gco2e_per_kwh": profile.get("grid_gco2e_per_kwh", config["grid_gco2e_per_kwh"])
+    }
+
+
+def estimate_energy(usage: Optional[Dict], model_name: str, backend: Optional[str] = None,
+                    config: Optional[Dict] = None) -> Optional[Dict]:
+    """
+    Estimate energy and emissions for a usage block
+
+    Cached input tokens are charged at the cached rate, the rest of the input at the
+    prefill rate. Reasoning tokens are already part of the output count.
+
+    Returns:
+        Dict with kwh, kg_co2e and the profile used - None if there is no usage
+    """
+    if not usage:
+        return None
+
+    coeff = coefficients_for(model_name, backend, config)
+    cached = usage.get("cached_tokens", 0)
+    uncached_input = max(0, usage.get("input_tokens", 0) - cached)
+
+    wh = (uncached_input / 1000 * coeff["wh_per_1k_input_tokens"]
+          + cached / 1000 * coeff["wh_per_1k_cached_tokens"]
+          + usage.get("output_tokens", 0) / 1000 * coeff["wh_per_1k_output_tokens"])
+    kwh = wh / 1000
+
+    return {
+        "kwh": kwh,
+        "kg_co2e": kwh * coeff["grid_gco2e_per_kwh"] / 1000,
+        "profile": coeff["profile"],
+        "grid_gco2e_per_kwh": coeff["grid_gco2e_per_kwh"]
+    }
+
+
+def format_energy_cells(energy: Optional[Dict]) -> str:
+    """kWh and kgCO2e as markdown table cells"""
+    if not energy:
+        return "- | - | "
+    return f"{energy['kwh']:.4f} | {energy['kg_co2e']:.4f} | "
+
+
+def main():
+    config = load_energy_config()
+    print(f"Grid intensity: {config['grid_gco2e_per_kwh']} gCO2e/kWh (default)\n")
+    print(f"{'Model':<55} {'Profile':<10} {'Wh/1K in':>9} {'Wh/1K out':>10}")
+    for model_name in sorted(config["models"]):
+        coeff = coefficients_for(model_name, config=config)
+        print(f"{model_name:<55} {coeff['profile']:<10} "
+              f"{coeff['wh_per_1k_input_tokens']:>9.3f} {coeff['wh_per_1k_output_tokens']:>10.3f}")
+    return 0
+
+
+if __name__ == "__main__":
+    sys.exit(main())
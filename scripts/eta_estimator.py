@@ -0,0 +1,262 @@
+#!/usr/bin/env python3
+"""
+eta_estimator.py
+
+Time-remaining estimates for generation runs, from historical per-model latency.
+
+Seeded from the duration_seconds of every prior <chapter>_metadata.json under the
+output root, keyed by (model, chapter). A (model, chapter) pair with no history is
+predicted as global median × model factor × chapter factor, so a new chapter on a
+known model (or a known chapter on a new model) still gets a sensible estimate.
+
+The run's time left is the sum over models when they run one after another, or -
+once set_provider_slots() says providers run concurrently (the LPT scheduler) - the
+busiest provider's remaining work spread over its slots.
+
+As calls complete, each model's remaining predictions are scaled by how far its
+actual durations have run from the predictions (today's provider speed), and every
+prediction's error is recorded so the estimator's accuracy can be checked afterwards.
+
+Usage:
+    # Predicted duration of each model × chapter from the history on disk
+    uv run python eta_estimator.py --models openai/gpt-5-mini,xai/grok-3-latest \\
+        --chapters summary_for_policymakers,chapter_7_africa
+"""
+
+import argparse
+import json
+import statistics
+import sys
+import threading
+import time
+from collections import defaultdict
+from pathlib import Path
+from typing import Callable, Dict, List, Optional, Tuple
+
+from scheduler import provider_of
+
+DEFAULT_HISTORY_ROOT = Path("output")
+DEFAULT_SECONDS = 120.0  # No history at all
+CORRECTION_WEIGHT = 0.3  # EWMA weight of each new actual/predicted ratio
+
+
+def load_history(history_root: Path = DEFAULT_HISTORY_ROOT) -> Dict[Tuple[str, str], List[float]]:
+    """Collect duration_seconds per (model, chapter) from prior metadata files"""
+    history = defaultdict(list)
+    if not history_root.exists():
+        return history
+
+    for metadata_file in history_root.rglob("*_metadata.json"):
+        try:
+            metadata = json.loads(metadata_file.read_text(encoding='utf-8'))
+        except (json.JSONDecodeError, OSError):
+            continue
+        if not isinstance(metadata, dict):
+            continue
+
+        duration = metadata.get("duration_seconds")
+        model = metadata.get("requested_model") or metadata.get("model")
+        chapter_key = metadata.get("chapter_key")
+        if duration and model and chapter_key:
+            history[(model, chapter_key)].append(float(duration))
+
+    return history
+
+
+def format_duration(seconds: float) -> str:
+    """Human-readable duration (e.g. 1h 05m, 3m 20s, 45s)"""
+    seconds = max(0, int(seconds))
+    if seconds >= 3600:
+        return f"{seconds // 3600}h {seconds % 3600 // 60:02d}m"
+    if seconds >= 60:
+        return f"{seconds // 60}m {seconds % 60:02d}s"
+    return f"{seconds}s"
+
+
+class ETAEstimator:
+    """Predict remaining time for a set of (model, chapter) tasks and learn online"""
+
+    def __init__(self, history: Optional[Dict[Tuple[str, str], List[float]]] = None):
+        self._lock = threading.Lock()
+        self.history = defaultdict(list, {k: list(v) for k, v in (history or {}).items()})
+        self.pending = {}        # (model, chapter) → base prediction
+        self.correction = {}     # model → actual/predicted EWMA
+        self.concurrency = {}    # model → chapters generated in parallel
+        self.provider_slots = None  # provider → concurrent slots, when providers run concurrently
+        self.provider_for = provider_of
+        self.errors = []         # one record per completed task
+        self.completed = 0       # tasks finished, including failures
+        self.started_at = time.time()
+        self._refit()
+
+    def _refit(self):
+        """Recompute the global median and per-model/per-chapter factors"""
+        durations = [d for values in self.history.values() for d in values]
+        self.global_median = statistics.median(durations) if durations else DEFAULT_SECONDS
+
+        by_model = defaultdict(list)
+        by_chapter = defaultdict(list)
+        for (model, chapter_key), values in self.history.items():
+            by_model[model].extend(values)
+            by_chapter[chapter_key].extend(values)
+
+        self.model_factor = {m: statistics.median(v) / self.global_median for m, v in by_model.items()}
+        self.chapter_factor = {c: statistics.median(v) / self.global_median for c, v in by_chapter.items()}
+
+    def predict(self, model: str, chapter_key: str) -> float:
+        """Base prediction in seconds (before today's per-model correction)"""
+        values = self.history.get((model, chapter_key))
+        if values:
+            return statistics.median(values)
+        return (self.global_median
+                * self.model_factor.get(model, 1.0)
+                * self.chapter_factor.get(chapter_key, 1.0))
+
+    def plan(self, tasks: List[Tuple[str, str]]):
+        """Register the (model, chapter) tasks this run will execute"""
+        with self._lock:
+            for model, chapter_key in tasks:
+                self.pending[(model, chapter_key)] = self.predict(model, chapter_key)
+            self.started_at = time.time()
+
+    def set_concurrency(self, model: str, workers: int):
+        """Chapters for this model run in parallel (e.g. local backend)"""
+        self.concurrency[model] = max(1, workers)
+
+    def set_provider_slots(self, provider_slots: Dict[str, int], provider_for: Callable[[str], str] = provider_of,
+                           default_slots: int = 1):
+        """Providers run concurrently, each with this many slots (scheduler.MatrixScheduler)"""
+        self.provider_slots = defaultdict(lambda: default_slots, provider_slots)
+        self.provider_for = provider_for
+
+    def complete(self, model: str, chapter_key: str, duration: Optional[float]):
+        """
+        Record a finished task
+
+        Args:
+            duration: Measured seconds, or None if the task failed (removed from the
+                plan without recording an error)
+        """
+        with self._lock:
+            predicted = self.pending.pop((model, chapter_key), None)
+            if predicted is not None:
+                self.completed += 1
+            if duration is None or predicted is None:
+                return
+
+            corrected = predicted * self.correction.get(model, 1.0)
+            self.errors.append({
+                "model": model,
+                "chapter_key": chapter_key,
+                "predicted_seconds": corrected,
+                "actual_seconds": duration,
+                "error_seconds": duration - corrected
+            })
+
+            if predicted > 0:
+                ratio = duration / predicted
+                previous = self.correction.get(model)
+                self.correction[model] = ratio if previous is None else (
+                    (1 - CORRECTION_WEIGHT) * previous + CORRECTION_WEIGHT * ratio)
+
+            self.history[(model, chapter_key)].append(duration)
+            self._refit()
+
+    def remaining(self, model: Optional[str] = None) -> float:
+        """
+        Predicted seconds left for one model, or for the whole run
+
+        The whole run is the sum over models when they run in sequence, or the
+        maximum over providers of work / slots when providers run concurrently.
+        """
+        with self._lock:
+            work = defaultdict(float)
+            for (task_model, _), predicted in self.pending.items():
+                work[task_model] += predicted * self.correction.get(task_model, 1.0)
+            per_model = {m: seconds / self.concurrency.get(m, 1) for m, seconds in work.items()}
+            per_provider = defaultdict(float)
+            if self.provider_slots is not None:
+                for task_model, seconds in work.items():
+                    per_provider[self.provider_for(task_model)] += seconds
+                per_provider = {p: seconds / max(1, self.provider_slots[p]) for p, seconds in per_provider.items()}
+
+        if model is not None:
+            return per_model.get(model, 0.0)
+        if self.provider_slots is not None:
+            return max(per_provider.values(), default=0.0)
+        return sum(per_model.values())
+
+    def status_line(self, model: str) -> str:
+        """One-line progress with model and overall ETA"""
+        done = self.completed
+        total = done + len(self.pending)
+        return (f"    ⏳ {done}/{total} done | {model}: {format_duration(self.remaining(model))} left"
+                f" | run: {format_duration(self.remaining())} left")
+
+    def accuracy_report(self) -> Dict:
+        """Prediction error over the completed tasks (overall and per model)"""
+
+        def summarize(errors: List[Dict]) -> Dict:
+            if not errors:
+                return {"tasks": 0}
+            abs_errors = [abs(e["error_seconds"]) for e in errors]
+            pct_errors = [abs(e["error_seconds"]) / e["actual_seconds"]
+                          for e in errors if e["actual_seconds"] > 0]
+            return {
+                "tasks": len(errors),
+                "mean_abs_error_seconds": statistics.mean(abs_errors),
+                "mean_abs_pct_error": statistics.mean(pct_errors) if pct_errors else None,
+                "bias_seconds": statistics.mean(e["error_seconds"] for e in errors)
+            }
+
+        with self._lock:
+            errors = list(self.errors)
+
+        by_model = defaultdict(list)
+        for error in errors:
+            by_model[error["model"]].append(error)
+
+        return {
+            **summarize(errors),
+            "wall_clock_seconds": time.time() - self.started_at,
+            "per_model": {model: summarize(model_errors) for model, model_errors in by_model.items()},
+            "tasks_detail": errors
+        }
+
+
+def print_accuracy(report: Dict):
+    """Print the end-of-run ETA accuracy summary"""
+    if not report.get("tasks"):
+        return
+    pct = report["mean_abs_pct_error"]
+    print(f"\n⏱️  ETA accuracy over {report['tasks']} chapters: "
+          f"mean abs error {report['mean_abs_error_seconds']:.1f}s"
+          f"{f' ({pct:.0%})' if pct is not None else ''}, bias {report['bias_seconds']:+.1f}s")
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Predict chapter durations from run history")
+    parser.add_argument("--history-root", default=str(DEFAULT_HISTORY_ROOT))
+    parser.add_argument("--models", required=True, help="Comma-separated LiteLLM model names")
+    parser.add_argument("--chapters", required=True, help="Comma-separated chapter keys")
+    args = parser.parse_args()
+
+    history = load_history(Path(args.history_root))
+    estimator = ETAEstimator(history)
+    models = [m.strip() for m in args.models.split(',')]
+    chapters = [c.strip() for c in args.chapters.split(',')]
+
+    print(f"History: {sum(len(v) for v in history.values())} durations, "
+          f"global median {estimator.global_median:.1f}s\n")
+    for model in models:
+        for chapter_key in chapters:
+            source = "history" if history.get((model, chapter_key)) else "factors"
+            print(f"{model:<55} {chapter_key:<45} {estimator.predict(model, chapter_key):>8.1f}s ({source})")
+
+    estimator.plan([(m, c) for m in models for c in chapters])
+    print(f"\nPredicted total (sequential): {format_duration(estimator.remaining())}")
+    return 0
+
+
+if __name__ == "__main__":
+    sys.exit(main())
@@ -0,0 +1,314 @@
+#!/usr/bin/env python3
+"""
+fact_check_chunking.py
+
+Full-length fact-checking: split a chapter into overlapping windows on section
+boundaries, check the windows concurrently, and merge their issues.
+
+Premium chapters run well past what one evaluator call handles - truncating them
+misses most of the text, and sending them whole is slow and overflows smaller
+evaluators. Instead:
+
+    - The chapter is cut into paragraphs, each tagged with its markdown section.
+    - Paragraphs are packed into windows, closing a window early at a section
+      boundary once it is reasonably full. A paragraph longer than a window is
+      split on sentences.
+    - Each window opens with the closing sentences (~overlap_words) of the
+      previous one, so a claim straddling a boundary is seen whole at least once.
+    - Windows are checked concurrently; issues found twice in an overlap are
+      merged (adjacent windows, both quoting the shared overlap text, same type
+      and near-identical wording) and errors_found / error_rate are recomputed
+      over the full chapter.
+"""
+
+import contextvars
+import re
+from concurrent.futures import ThreadPoolExecutor
+from typing import Callable, Dict, List, Optional
+
+DEFAULT_WINDOW_WORDS = 2500
+DEFAULT_OVERLAP_WORDS = 250
+DEFAULT_WINDOW_WORKERS = 4
+MIN_FILL_BEFORE_SECTION_BREAK = 0.6  # Close a window at a new section once this full
+DUPLICATE_SIMILARITY = 0.6  # Token Jaccard above which two issues are the same finding
+
+HEADING_RE = re.compile(r"^#{1,6}\s+(.+?)\s*#*\s*$")
+PARAGRAPH_SPLIT_RE = re.compile(r"\n\s*\n")
+SENTENCE_SPLIT_RE = re.compile(r"(?<=[.!?])\s+")
+TOKEN_RE = re.compile(r"[a-z0-9]+")
+
+SEVERITY_RANK = {"critical": 3, "major": 2, "minor": 1}
+CONFIDENCE_RANK = {"high": 3, "medium": 2, "low": 1}
+
+
+def _split_long(block: str, max_words: int) -> List[str]:
+    """Split a block into pieces of at most max_words, on sentences where possible"""
+    pieces, current = [], []
+    for sentence in SENTENCE_SPLIT_RE.split(block):
+        words = sentence.split()
+        while len(words) > max_words:  # A run-on "sentence" longer than a piece
+            if current:
+                pieces.append(" ".join(current))
+                current = []
+            pieces.append(" ".join(words[:max_words]))
+            words = words[max_words:]
+        if current and len(current) + len(words) > max_words:
+            pieces.append(" ".join(current))
+            current = []
+        current.extend(words)
+    if current:
+        pieces.append(" ".join(current))
+    return pieces
+
+
+def split_paragraphs(text: str, max_words: int) -> List[Dict]:
+    """
+    Paragraphs of the chapter with their section heading and word count
+
+    A heading on its own line is kept with the paragraph that follows it;
+    paragraphs longer than max_words are split on sentence boundaries.
+    """
+    units = []
+    section = None
+    pending_heading = None
+    for block in PARAGRAPH_SPLIT_RE.split(text):
+        block = block.strip()
+        if not block:
+            continue
+
+        lines = block.splitlines()
+        heading = HEADING_RE.match(lines[0])
+        if heading:
+            section = heading.group(1)
+            if len(lines) == 1:
+                pending_heading = block
+                continue
+        starts_section = bool(heading) or pending_heading is not None
+        if pending_heading:
+            block = f"{pending_heading}\n\n{block}"
+            pending_heading = None
+
+        pieces = [block] if len(block.split()) <= max_words else _split_long(block, max_words)
+        for i, piece in enumerate(pieces):
+            units.append({
+                "text": piece,
+                "words": len(piece.split()),
+                "section": section,
+                "starts_section": starts_section and i == 0
+            })
+
+    if pending_heading:
+        units.append({"text": pending_heading, "words": len(pending_heading.split()),
+                      "section": section, "starts_section": True})
+    return units
+
+
+def _tail(text: str, max_words: int) -> str:
+    """The last whole sentences of text totalling at most max_words (last words if none fit)"""
+    if max_words <= 0:
+        return ""
+    sentences = SENTENCE_SPLIT_RE.split(text)
+    tail, words = [], 0
+    for sentence in reversed(sentences):
+        count = len(sentence.split())
+        if words + count > max_words:
+            break
+        tail.insert(0, sentence)
+        words += count
+    return " ".join(tail) if tail else " ".join(text.split()[-max_words:])
+
+
+def make_windows(text: str, window_words: int = DEFAULT_WINDOW_WORDS,
+                 overlap_words: int = DEFAULT_OVERLAP_WORDS) -> List[Dict]:
+    """
+    Split a chapter into overlapping windows on section/paragraph boundaries
+
+    Paragraphs are packed into groups of at most window_words - overlap_words;
+    each window is its group preceded by the closing sentences (~overlap_words)
+    of the previous group, so no window exceeds window_words.
+
+    Returns:
+        Windows in order, each with "index", "text", "words", "sections",
+        "overlap_words" and "overlap_text" (text repeated from the previous window)
+    """
+    overlap_words = min(overlap_words, window_words // 2)
+    budget = window_words - overlap_words
+    units = split_paragraphs(text, budget)
+    if not units:
+        return []
+    if sum(u["words"] for u in units) <= window_words:
+        return [_window(0, units, "")]
+
+    groups = []
+    current, words = [], 0
+    for unit in units:
+        if current and (words + unit["words"] > budget
+                        or (unit["starts_section"] and words >= budget * MIN_FILL_BEFORE_SECTION_BREAK)):
+            groups.append(current)
+            current, words = [], 0
+        current.append(unit)
+        words += unit["words"]
+    if current:
+        groups.append(current)
+
+    windows = []
+    previous_text = ""
+    for group in groups:
+        windows.append(_window(len(windows), group, _tail(previous_text, overlap_words)))
+        previous_text = "\n\n".join(u["text"] for u in group)
+    return windows
+
+
+def _window(index: int, units: List[Dict], overlap: str) -> Dict:
+    sections = []
+    for unit in units:
+        if unit["section"] and unit["section"] not in sections:
+            sections.append(unit["section"])
+    body = "\n\n".join(u["text"] for u in units)
+    overlap_count = len(overlap.split())
+    return {
+        "index": index,
+        "text": f"{overlap}\n\n{body}" if overlap else body,
+        "words": overlap_count + sum(u["words"] for u in units),
+        "sections": sections,
+        "overlap_words": overlap_count,
+        "overlap_text": overlap
+    }
+
+
+def window_note(window: Dict, total: int) -> str:
+    """Context line telling the evaluator it is seeing one part of a longer chapter"""
+    if total <= 1:
+        return ""
+    sections = f" (sections: {', '.join(window['sections'][:5])})" if window["sections"] else ""
+    return (f"NOTE: This is part {window['index'] + 1} of {total} of the chapter{sections}. "
+            f"The other parts are reviewed separately - do not report content as missing "
+            f"because it is not in this excerpt.\n\n")
+
+
+def check_windows(windows: List[Dict], check: Callable[[Dict], Dict],
+                  max_workers: int = DEFAULT_WINDOW_WORKERS) -> List[Dict]:
+    """
+    Run check(window) for every window concurrently, results in window order
+
+    Each call runs in a copy of the caller's context, so usage_scope() totals and
+    tags opened around check_windows() still apply inside the worker threads. A
+    window whose check raises gets {"error": ...} instead of failing the chapter.
+    """
+    def run(window: Dict) -> Dict:
+        try:
+            return check(window)
+        except Exception as e:
+            return {"error": str(e), "issues": []}
+
+    if len(windows) <= 1 or max_workers <= 1:
+        return [run(window) for window in windows]
+
+    with ThreadPoolExecutor(max_workers=min(max_workers, len(windows))) as executor:
+        futures = [executor.submit(contextvars.copy_context().run, run, window) for window in windows]
+        return [future.result() for future in futures]
+
+
+def _tokens(value) -> set:
+    return set(TOKEN_RE.findall(str(value or "").lower()))
+
+
+def _similar(a, b) -> bool:
+    ta, tb = _tokens(a), _tokens(b)
+    if not ta or not tb:
+        return False
+    return len(ta & tb) / len(ta | tb) >= DUPLICATE_SIMILARITY
+
+
+def _normalized(value) -> str:
+    return " ".join(TOKEN_RE.findall(str(value or "").lower()))
+
+
+def _in_overlap(issue: Dict, overlap: str) -> bool:
+    """Whether the text an issue quotes lies in a window's overlap (normalized overlap text)"""
+    quote = _normalized(issue.get("location"))
+    return bool(quote and overlap) and quote in overlap
+
+
+def _issue_type(issue: Dict) -> str:
+    return str(issue.get("type", "")).strip().lower().replace(" ", "_")
+
+
+def merge_issues(window_results: List[Dict], windows: List[Dict],
+                 text_fields: tuple = ("location", "issue", "description")) -> List[Dict]:
+    """
+    Concatenate every window's issues, merging duplicates found in overlaps
+
+    Two issues are the same finding only if they come from adjacent windows, both
+    quote (in "location") text of the overlap the later window repeats from the
+    earlier one, have the same type and any of text_fields is near-identical.
+    Issues elsewhere in a window are never merged, however alike. The merged issue
+    keeps the higher severity and the longer wording, and lists every window it
+    was found in.
+    """
+    merged = []
+    for window, result in zip(windows, window_results):
+        overlap = _normalized(window.get("overlap_text"))
+        for issue in result.get("issues") or []:
+            if not isinstance(issue, dict):
+                continue
+            issue = {**issue, "windows": [window["index"]]}
+            if window["sections"] and "section" not in issue:
+                issue["section"] = window["sections"][0]
+
+            duplicate = None
+            if _in_overlap(issue, overlap):
+                duplicate = next((
+                    existing for existing in merged
+                    if window["index"] - 1 in existing["windows"] and window["index"] not in existing["windows"]
+                    and _in_overlap(existing, overlap)
+                    and _issue_type(existing) == _issue_type(issue)
+                    and any(_similar(existing.get(f), issue.get(f)) for f in text_fields if existing.get(f))
+                ), None)
+            if duplicate is None:
+                merged.append(issue)
+                continue
+
+            duplicate["windows"] = sorted(set(duplicate["windows"]) | set(issue["windows"]))
+            if (SEVERITY_RANK.get(str(issue.get("severity", "")).lower(), 0)
+                    > SEVERITY_RANK.get(str(duplicate.get("severity", "")).lower(), 0)):
+                duplicate["severity"] = issue["severity"]
+            for field in text_fields + ("correction",):
+                if len(str(issue.get(field) or "")) > len(str(duplicate.get(field) or "")):
+                    duplicate[field] = issue[field]
+    return merged
+
+
+def count_by_severity(issues: List[Dict]) -> Dict[str, int]:
+    """Issues per severity (critical/major/minor)"""
+    counts = {severity: 0 for severity in SEVERITY_RANK}
+    for issue in issues:
+        severity = str(issue.get("severity", "")).lower()
+        if severity in counts:
+            counts[severity] += 1
+    return counts
+
+
+def error_rate(errors: int, word_count: int) -> float:
+    """Issues per 1000 words"""
+    return errors / word_count * 1000 if word_count else 0.0
+
+
+def lowest_confidence(values: List[Optional[str]]) -> Optional[str]:
+    """Most conservative of the windows' high/medium/low confidence labels"""
+    ranked = [v for v in values if str(v).lower() in CONFIDENCE_RANK]
+    if not ranked:
+        return None
+    return min(ranked, key=lambda v: CONFIDENCE_RANK[str(v).lower()])
+
+
+def window_summary(windows: List[Dict], window_results: List[Dict]) -> List[Dict]:
+    """Per-window record kept with the chapter result"""
+    return [{
+        "index": window["index"],
+        "words": window["words"],
+        "overlap_words": window["overlap_words"],
+        "sections": window["sections"],
+        "issues": len(result.get("issues") or []),
+        "error": result.get("error")
+    } for window, result in zip(windows, window_results)]
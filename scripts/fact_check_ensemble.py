@@ -0,0 +1,195 @@
+#!/usr/bin/env python3
+"""
+fact_check_ensemble.py
+
+Multi-checker fact-check ensemble with agreement-based early stopping.
+
+The primary checker reviews every chapter as usual. Only its consequential or
+shaky findings are escalated - issues rated critical/major, and every issue of a
+chapter the primary rated low confidence - and those go to the secondary
+checkers one round at a time. Each round is one call per chapter: the escalated
+issues with the paragraph they quote, not the whole chapter.
+
+An issue is settled as soon as the vote allows it:
+
+    confirmed  - at least two checkers voted and the agreeing share reached
+                 the threshold
+    disputed   - the threshold can no longer be reached even if every
+                 remaining checker agrees
+    unconfirmed - no secondary checker gave a verdict (kept, as the primary found it)
+
+so a finding the first secondary confirms never reaches the third checker.
+An "uncertain" verdict is an abstention: it is recorded with the votes but counts
+neither for nor against the issue, nor in the checker's agreement rate.
+Every escalated issue records each checker's vote and the final agreement;
+chapters and models get agreement summaries, and every secondary checker gets
+its agreement rate with the primary.
+"""
+
+from typing import Callable, Dict, List, Optional
+
+DEFAULT_AGREEMENT_THRESHOLD = 2 / 3
+ESCALATE_SEVERITIES = ("critical", "major")
+MAX_CONTEXT_WORDS = 200
+VERDICTS = ("agree", "disagree", "uncertain")
+
+
+def should_escalate(issue: Dict, chapter_confidence: Optional[str]) -> bool:
+    """Critical/major issues, and any issue of a low-confidence chapter - never ones reused from a prior run"""
+    if issue.get("reused"):
+        return False
+    return (str(issue.get("severity", "")).lower() in ESCALATE_SEVERITIES
+            or str(chapter_confidence or "").lower() == "low")
+
+
+def issue_context(issue: Dict, paragraphs: List[Dict]) -> str:
+    """The paragraph an issue was found in, trimmed to MAX_CONTEXT_WORDS"""
+    index = issue.get("paragraph")
+    if not isinstance(index, int) or not 0 <= index < len(paragraphs):
+        return ""
+    return " ".join(paragraphs[index]["text"].split()[:MAX_CONTEXT_WORDS])
+
+
+def format_issues(items: List[Dict]) -> str:
+    """Escalated issues as the numbered list shown to a secondary checker"""
+    blocks = []
+    for item in items:
+        issue = item["issue"]
+        blocks.append(f"[{item['id']}] {issue.get('type', 'issue')} ({issue.get('severity', 'unrated')})\n"
+                      f"Quoted text: {issue.get('location', '')}\n"
+                      f"Reported problem: {issue.get('issue') or issue.get('description', '')}\n"
+                      f"Suggested correction: {issue.get('correction') or 'none given'}\n"
+                      f"Context: {item['context']}")
+    return "\n\n".join(blocks)
+
+
+def decide(votes: List[bool], remaining: int, threshold: float) -> Optional[str]:
+    """
+    confirmed / disputed once the outcome is fixed, None while more votes could change it
+
+    With no secondary vote at all (every secondary failed) the issue stays unconfirmed.
+    """
+    agreed, cast = sum(votes), len(votes)
+    if cast >= 2 and agreed / cast >= threshold:
+        return "confirmed"
+    if remaining == 0:
+        return "disputed" if cast >= 2 else "unconfirmed"
+    if (agreed + remaining) / (cast + remaining) < threshold:
+        return "disputed"
+    return None
+
+
+def run_ensemble(issues: List[Dict], paragraphs: List[Dict], primary: str, secondaries: List[str],
+                 review: Callable[[str, List[Dict]], Dict[str, Dict]],
+                 chapter_confidence: Optional[str] = None,
+                 threshold: float = DEFAULT_AGREEMENT_THRESHOLD) -> Dict:
+    """
+    Put a chapter's escalated issues to the secondary checkers until each is settled
+
+    Args:
+        issues: The primary checker's issues (each gets an "ensemble" record if escalated)
+        paragraphs: chapter_paragraphs() of the chapter, for the issue context
+        primary: Primary checker model (its vote is "agree" by definition)
+        secondaries: Secondary checker models, in the order they are consulted
+        review: review(model, items) → {item id: {"verdict", "severity", "comment"}}
+        chapter_confidence: The primary's confidence for the chapter
+        threshold: Agreeing share of votes that confirms an issue
+
+    Returns:
+        Chapter agreement summary: escalated/confirmed/disputed counts, secondary
+        calls, mean agreement and per-checker agreement with the primary
+    """
+    pending = []
+    for issue in issues:
+        if should_escalate(issue, chapter_confidence):
+            issue["ensemble"] = {"votes": {primary: "agree"}, "agreement": 1.0, "status": None}
+            pending.append({"id": f"i{len(pending)}", "issue": issue, "context": issue_context(issue, paragraphs),
+                            "agrees": [True]})
+    escalated = list(pending)
+
+    checkers = {}
+    calls = 0
+    for round_index, checker in enumerate(secondaries):
+        if not pending:
+            break
+        try:
+            reviews = review(checker, pending)
+        except Exception as e:
+            reviews = {}
+            print(f"    ⚠️  Secondary checker {checker} failed: {e}")
+        calls += 1
+
+        stats = checkers.setdefault(checker, {"reviewed": 0, "agreed": 0})
+        remaining = len(secondaries) - round_index - 1
+        still_pending = []
+        for item in pending:
+            item_review = reviews.get(item["id"]) or {}
+            verdict = str(item_review.get("verdict", "")).lower()
+            if verdict in VERDICTS:
+                item["issue"]["ensemble"]["votes"][checker] = verdict
+                if item_review.get("comment"):
+                    item["issue"]["ensemble"].setdefault("comments", {})[checker] = item_review["comment"]
+                if verdict != "uncertain":  # An abstention - recorded, but not a vote
+                    item["agrees"].append(verdict == "agree")
+                    stats["reviewed"] += 1
+                    stats["agreed"] += verdict == "agree"
+
+            status = decide(item["agrees"], remaining, threshold)
+            item["issue"]["ensemble"]["agreement"] = sum(item["agrees"]) / len(item["agrees"])
+            if status:
+                item["issue"]["ensemble"]["status"] = status
+            else:
+                still_pending.append(item)
+        pending = still_pending
+
+    for item in escalated:
+        if item["issue"]["ensemble"]["status"] is None:  # Ran out of secondaries
+            item["issue"]["ensemble"]["status"] = decide(item["agrees"], 0, threshold)
+
+    for stats in checkers.values():
+        stats["agreement_rate"] = stats["agreed"] / stats["reviewed"] if stats["reviewed"] else None
+    agreements = [item["issue"]["ensemble"]["agreement"] for item in escalated]
+    return {
+        "escalated": len(escalated),
+        "confirmed": sum(1 for item in escalated if item["issue"]["ensemble"]["status"] == "confirmed"),
+        "disputed": sum(1 for item in escalated if item["issue"]["ensemble"]["status"] == "disputed"),
+        "unconfirmed": sum(1 for item in escalated if item["issue"]["ensemble"]["status"] == "unconfirmed"),
+        "secondary_calls": calls,
+        "mean_agreement": sum(agreements) / len(agreements) if agreements else None,
+        "checkers": checkers
+    }
+
+
+def summarize_agreement(results: List[Dict]) -> Dict:
+    """
+    Ensemble agreement across chapter results, by checked model and by secondary checker
+
+    Returns:
+        {"by_model": {model_id: counts + mean_agreement}, "by_checker": {checker:
+        reviewed/agreed/agreement_rate}, "totals": counts + mean_agreement}
+    """
+    def empty() -> Dict:
+        return {"chapters": 0, "escalated": 0, "confirmed": 0, "disputed": 0, "unconfirmed": 0,
+                "secondary_calls": 0, "_agreement_sum": 0.0}
+
+    by_model, by_checker, totals = {}, {}, empty()
+    for result in results:
+        ensemble = result.get("ensemble")
+        if not ensemble:
+            continue
+        for bucket in (by_model.setdefault(result.get("model_id", "unknown"), empty()), totals):
+            bucket["chapters"] += 1
+            for field in ("escalated", "confirmed", "disputed", "unconfirmed", "secondary_calls"):
+                bucket[field] += ensemble[field]
+            bucket["_agreement_sum"] += (ensemble["mean_agreement"] or 0) * ensemble["escalated"]
+        for checker, stats in ensemble["checkers"].items():
+            total = by_checker.setdefault(checker, {"reviewed": 0, "agreed": 0})
+            total["reviewed"] += stats["reviewed"]
+            total["agreed"] += stats["agreed"]
+
+    for bucket in list(by_model.values()) + [totals]:
+        agreement_sum = bucket.pop("_agreement_sum")
+        bucket["mean_agreement"] = agreement_sum / bucket["escalated"] if bucket["escalated"] else None
+    for stats in by_checker.values():
+        stats["agreement_rate"] = stats["agreed"] / stats["reviewed"] if stats["reviewed"] else None
+    return {"by_model": by_model, "by_checker": by_checker, "totals": totals}
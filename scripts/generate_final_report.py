@@ -11,6 +11,10 @@ from pathlib import Path
 from datetime import datetime
 from typing import Dict, List
 
+from energy_accounting import estimate_energy
+from usage_accounting import cost_per_1000_words
+from output_writer import atomic_write_text
+
 def load_model_summaries(output_dir: Path) -> Dict:
     """Load all model generation summaries"""
 
@@ -56,8 +60,8 @@ This report presents the results of a comprehensive end-to-end test of multiple
     report += "\n---\n\n## Performance Comparison\n\n"
 
     # Comparison table
-    report += "| Model | Total Words | Avg Words/Chapter | Total Time (min) | Words/Second | Success Rate |\n"
-    report += "|-------|-------------|-------------------|------------------|--------------|-------------|\n"
+    report += "| Model | Total Words | Avg Words/Chapter | Total Time (min) | Words/Second | Cold Start (s) | Success Rate |\n"
+    report += "|-------|-------------|-------------------|------------------|--------------|----------------|-------------|\n"
 
     for model_id, summary in sorted(summaries.items()):
         total_words = summary["total_words"]
@@ -66,7 +70,35 @@ This report presents the results of a comprehensive end-to-end test of multiple
         words_per_sec = total_words / summary["total_time"] if summary["total_time"] > 0 else 0
         success_rate = (summary["successful"] / summary["total_chapters"]) * 100
 
-        report += f"| {model_id} | {total_words:,} | {avg_words:.0f} | {total_time_min:.1f} | {words_per_sec:.1f} | {success_rate:.0f}% |\n"
+        cold_start = summary.get("cold_start_time", 0)
+
+        report += f"| {model_id} | {total_words:,} | {avg_words:.0f} | {total_time_min:.1f} | {words_per_sec:.1f} | {cold_start:.0f} | {success_rate:.0f}% |\n"
+
+    report += "\n### Token Usage, Cost and Energy\n\n"
+    report += ("| Model | Input Tokens | Output Tokens | Cached Tokens | Reasoning Tokens | Calls | Cost | Cost/1K Words "
+               "| Energy (kWh) | kgCO2e |\n")
+    report += ("|-------|--------------|---------------|---------------|------------------|-------|------|---------------"
+               "|--------------|--------|\n")
+
+    total_kwh = 0.0
+    total_co2e = 0.0
+    for model_id, summary in sorted(summaries.items()):
+        usage = summary.get("usage")
+        if not usage:
+            report += f"| {model_id} | - | - | - | - | - | - | - | - | - |\n"
+            continue
+        per_1k = cost_per_1000_words(usage, summary["total_words"])
+        per_1k_cell = f"${per_1k:.4f}" if per_1k is not None else "-"
+        energy = estimate_energy(usage, summary["model_name"], summary.get("backend"))
+        total_kwh += energy["kwh"]
+        total_co2e += energy["kg_co2e"]
+        report += (f"| {model_id} | {usage['input_tokens']:,} | {usage['output_tokens']:,} | {usage['cached_tokens']:,} | "
+                   f"{usage['reasoning_tokens']:,} | {usage['calls']} | ${usage['cost']:.4f} | {per_1k_cell} | "
+                   f"{energy['kwh']:.4f} | {energy['kg_co2e']:.4f} |\n")
+
+    if total_kwh:
+        report += (f"\nEstimated generation footprint: **{total_kwh:.3f} kWh**, **{total_co2e:.3f} kgCO2e** "
+                   f"(coefficients from config/energy_coefficients.json)\n")
 
     report += "\n---\n\n## Chapter-by-Chapter Comparison\n\n"
 
@@ -116,6 +148,9 @@ This report presents the results of a comprehensive end-to-end test of multiple
 
     report += f"**Total Content Generated**: {total_words_all:,} words across {len(summaries)} models\n\n"
     report += f"**Average Generation Time**: {avg_time_all/60:.1f} minutes per model\n\n"
+    total_cost_all = sum(s.get("usage", {}).get("cost", 0.0) for s in summaries.values())
+    if total_cost_all:
+        report += f"**Total Generation Cost**: ${total_cost_all:.2f}\n\n"
     report += f"**Success Rate**: {sum(s['successful'] for s in summaries.values())} / {sum(s['total_chapters'] for s in summaries.values())} chapters ({100 * sum(s['successful'] for s in summaries.values()) / sum(s['total_chapters'] for s in summaries.values()):.1f}%)\n\n"
 
     report += """
@@ -223,7 +258,7 @@ def main():
     report = generate_comparison_report(summaries, output_dir)
 
     report_file = output_dir / "AR7_FINAL_COMPARISON_REPORT.md"
-    report_file.write_text(report, encoding='utf-8')
+    atomic_write_text(report_file, report)
     print(f"✅ Saved: {report_file}\n")
 
     # Generate master index
@@ -231,7 +266,7 @@ def main():
     index = create_master_index(summaries, output_dir)
 
     index_file = output_dir / "INDEX.md"
-    index_file.write_text(index, encoding='utf-8')
+    atomic_write_text(index_file, index)
     print(f"✅ Saved: {index_file}\n")
 
     # Print summary statistics
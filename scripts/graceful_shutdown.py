@@ -0,0 +1,146 @@
+#!/usr/bin/env python3
+"""
+graceful_shutdown.py
+
+Ctrl-C / SIGTERM handling shared by the runners.
+
+The first signal marks the run as shutting down: child process groups started with
+run_subprocess() are terminated (so a pipeline subprocess stops billing), the main
+thread's in-flight request is interrupted with ShutdownRequested, streamed
+responses abort at their next chunk, and schedulers stop starting queued tasks.
+The runner then flushes its partial summaries from the run journal (see
+run_journal.py) and exits with status 130. A second signal exits immediately -
+everything already journaled is on disk.
+
+ShutdownRequested subclasses KeyboardInterrupt, so the generic `except Exception`
+around each chapter never swallows it.
+
+Children are started in their own session (process group) so the whole tree -
+uv, the pipeline script and anything it spawns - can be signalled at once, and on
+Linux they are asked to receive SIGTERM if this process dies without cleaning up
+(e.g. killed by the OOM killer).
+"""
+
+import atexit
+import ctypes
+import os
+import signal
+import subprocess
+import sys
+import threading
+from typing import List
+
+TERMINATE_GRACE_SECONDS = 10  # SIGTERM → SIGKILL for child process groups
+PR_SET_PDEATHSIG = 1
+
+_requested = threading.Event()
+_children = set()
+_children_lock = threading.Lock()
+
+
+class ShutdownRequested(KeyboardInterrupt):
+    """The run was asked to stop (SIGINT/SIGTERM)"""
+
+
+def shutdown_requested() -> bool:
+    """True once a shutdown signal has been received"""
+    return _requested.is_set()
+
+
+def check_shutdown():
+    """Raise ShutdownRequested if a shutdown signal has been received"""
+    if _requested.is_set():
+        raise ShutdownRequested()
+
+
+def _handle_signal(signum, frame):
+    name = signal.Signals(signum).name
+    if _requested.is_set():
+        print(f"\n🛑 {name} again - exiting now (journaled work is kept)", flush=True)
+        _signal_children(signal.SIGKILL)
+        os._exit(128 + signum)
+
+    _requested.set()
+    print(f"\n🛑 {name} received - cancelling in-flight work and flushing partial results "
+          f"(send again to exit immediately)", flush=True)
+    _signal_children(signal.SIGTERM)
+    raise ShutdownRequested(name)
+
+
+def install_signal_handlers():
+    """Route SIGINT and SIGTERM through the graceful shutdown (main thread only)"""
+    if threading.current_thread() is not threading.main_thread():
+        return
+    signal.signal(signal.SIGINT, _handle_signal)
+    signal.signal(signal.SIGTERM, _handle_signal)
+
+
+def _signal_children(sig: int):
+    with _children_lock:
+        children = list(_children)
+    for proc in children:
+        try:
+            os.killpg(proc.pid, sig)
+        except (ProcessLookupError, PermissionError):
+            pass
+
+
+def _kill_group(proc: subprocess.Popen):
+    """SIGTERM the child's process group, SIGKILL it if it hasn't exited after the grace period"""
+    if proc.poll() is not None:
+        return
+    try:
+        os.killpg(proc.pid, signal.SIGTERM)
+        proc.wait(timeout=TERMINATE_GRACE_SECONDS)
+    except subprocess.TimeoutExpired:
+        os.killpg(proc.pid, signal.SIGKILL)
+        proc.wait()
+    except ProcessLookupError:
+        pass
+
+
+def _die_with_parent():
+    """preexec_fn: SIGTERM this child if the parent dies (Linux only, best effort)"""
+    try:
+        ctypes.CDLL("libc.so.6", use_errno=True).prctl(PR_SET_PDEATHSIG, signal.SIGTERM)
+    except (OSError, AttributeError):
+        pass
+
+
+def run_subprocess(cmd: List[str], timeout: float = None, **kwargs) -> subprocess.CompletedProcess:
+    """
+    subprocess.run(cmd, capture_output=True, text=True, timeout=timeout) whose process
+    group is terminated on timeout or shutdown
+
+    Raises:
+        subprocess.TimeoutExpired: After the process group has been killed
+        ShutdownRequested: If a shutdown signal arrived while the child was running
+    """
+    check_shutdown()
+    proc = subprocess.Popen(
+        cmd, stdout=subprocess.PIPE, stderr=subprocess.PIPE, text=True,
+        start_new_session=True, preexec_fn=_die_with_parent if sys.platform == "linux" else None,
+        **kwargs
+    )
+    with _children_lock:
+        _children.add(proc)
+    try:
+        stdout, stderr = proc.communicate(timeout=timeout)
+    except BaseException:
+        _kill_group(proc)
+        proc.communicate()
+        raise
+    finally:
+        with _children_lock:
+            _children.discard(proc)
+
+    check_shutdown()
+    return subprocess.CompletedProcess(cmd, proc.returncode, stdout, stderr)
+
+
+@atexit.register
+def _cleanup_children():
+    with _children_lock:
+        children = list(_children)
+    for proc in children:
+        _kill_group(proc)
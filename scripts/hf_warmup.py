@@ -0,0 +1,137 @@
+#!/usr/bin/env python3
+"""
+hf_warmup.py
+
+Cold-start handling for HuggingFace serverless Inference endpoints.
+
+Scaled-to-zero models answer with 503 "Model ... is currently loading" plus an
+estimated_time. That is not a chapter failure: we ping the HuggingFace-hosted models
+before a run, wait out the reported load time, and report the cold-start latency
+separately from generation latency.
+"""
+
+import re
+import threading
+import time
+from typing import Dict, List, Optional
+
+try:
+    import litellm
+    LITELLM_AVAILABLE = True
+except ImportError:
+    LITELLM_AVAILABLE = False
+
+HF_MAX_COLD_START_WAIT = 600  # seconds, across all retries of one model
+HF_DEFAULT_LOAD_ESTIMATE = 30.0  # when the 503 carries no estimated_time
+
+ESTIMATED_TIME_RE = re.compile(r"estimated_time[\"']?\s*[:=]\s*([\d.]+)")
+
+
+def is_huggingface_model(model_name: str) -> bool:
+    """True for models served by HuggingFace serverless Inference"""
+    return model_name.startswith("huggingface/")
+
+
+def parse_model_loading(error: Exception) -> Optional[float]:
+    """
+    Recognise a "model loading" 503 and return the estimated wait in seconds
+
+    Returns:
+        Seconds to wait, or None if the error is not a cold-start response
+    """
+    error_str = str(error)
+    lowered = error_str.lower()
+    if "currently loading" not in lowered and not ("503" in error_str and "loading" in lowered):
+        return None
+
+    match = ESTIMATED_TIME_RE.search(error_str)
+    if match:
+        return float(match.group(1))
+    return HF_DEFAULT_LOAD_ESTIMATE
+
+
+def warmup_model(model_name: str, max_wait: float = HF_MAX_COLD_START_WAIT) -> Dict:
+    """
+    Ping a HuggingFace model until its endpoint is loaded
+
+    Returns:
+        Dict with ready flag, cold_start_seconds and the estimates the endpoint reported
+    """
+    result = {
+        "model_name": model_name,
+        "ready": False,
+        "cold_start_seconds": 0.0,
+        "estimated_times": [],
+        "attempts": 0,
+        "error": None
+    }
+
+    if not LITELLM_AVAILABLE:
+        result["error"] = "litellm not available"
+        return result
+
+    start_time = time.time()
+    while True:
+        result["attempts"] += 1
+        try:
+            litellm.completion(
+                model=model_name,
+                messages=[{"role": "user", "content": "ping"}],
+                max_tokens=1,
+                timeout=60
+            )
+            result["ready"] = True
+            break
+        except Exception as e:
+            wait = parse_model_loading(e)
+            elapsed = time.time() - start_time
+            if wait is None:
+                result["error"] = str(e)[:300]
+                break
+            result["estimated_times"].append(wait)
+            if elapsed + wait > max_wait:
+                result["error"] = f"Still loading after {elapsed:.0f}s (estimate {wait:.0f}s more)"
+                break
+            time.sleep(wait)
+
+    result["cold_start_seconds"] = time.time() - start_time
+    return result
+
+
+class HFWarmup:
+    """Warm up HuggingFace-hosted models in background threads"""
+
+    def __init__(self, model_names: List[str], max_wait: float = HF_MAX_COLD_START_WAIT):
+        self.model_names = [m for m in model_names if is_huggingface_model(m)]
+        self.max_wait = max_wait
+        self.results = {}
+        self._threads = {}
+
+    def start(self):
+        """Start pinging every HuggingFace model concurrently"""
+        if self.model_names:
+            print(f"🔥 Warming up {len(self.model_names)} HuggingFace endpoint(s) in background")
+        for model_name in self.model_names:
+            thread = threading.Thread(target=self._run, args=(model_name,), daemon=True)
+            self._threads[model_name] = thread
+            thread.start()
+
+    def _run(self, model_name: str):
+        self.results[model_name] = warmup_model(model_name, self.max_wait)
+
+    def wait(self, model_name: str) -> Optional[Dict]:
+        """Block until the model's warmup finishes; None for models not being warmed"""
+        thread = self._threads.get(model_name)
+        if thread is None:
+            return None
+
+        if thread.is_alive():
+            print(f"  ⏳ Waiting for {model_name} warmup to finish...")
+        thread.join()
+
+        result = self.results[model_name]
+        if result["ready"]:
+            print(f"  🔥 {model_name} ready (cold start {result['cold_start_seconds']:.1f}s)")
+        else:
+            print(f"  ⚠️  {model_name} warmup did not complete: {result['error']}")
+        return result
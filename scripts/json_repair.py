@@ -0,0 +1,338 @@
+#!/usr/bin/env python3
+"""
+json_repair.py
+
+Tolerant parsing of evaluator JSON responses.
+
+Evaluators are asked for JSON but answer with code fences, a sentence of preamble,
+trailing commas or - at max_tokens - a truncated object. A failed json.loads()
+used to turn a whole chapter's review into an "Error parsing" result. Instead,
+parse_evaluator_json() tries, cheapest first:
+
+    1. json.loads() on the response as is
+    2. local repair: strip fences, extract the outermost JSON object, drop
+       trailing commas and close a truncated object at its last complete value
+    3. a targeted "fix this JSON" follow-up - only the broken JSON and what is
+       wrong with it, never the chapter - if the caller supplies a fixer
+
+and validates the result against the evaluator's schema, coercing what it can
+(numeric strings, missing optional lists). Outcomes are counted per evaluator
+model; get_parse_stats() reports parse-failure and repair rates.
+
+Schemas are plain dicts: field → type, tuple of types, nested dict, or [item
+schema] for lists. A field name ending in "?" is optional.
+"""
+
+import json
+import re
+import threading
+from typing import Callable, Dict, List, Optional, Tuple
+
+FENCE_RE = re.compile(r"```(?:json|JSON)?\s*(.*?)\s*```", re.DOTALL)
+TRAILING_COMMA_RE = re.compile(r",(\s*[}\]])")
+MAX_REPAIR_CANDIDATES = 200  # Cut points tried when closing a truncated object
+MAX_FIX_INPUT_CHARS = 20000
+DEFAULT_FIXER_MODEL = "gemini/gemini-2.5-flash"  # Cheap model for the follow-up - it only re-shapes JSON
+
+JSON_FIX_PROMPT = """The JSON below is malformed or does not match the required structure.
+
+Problems:
+{problems}
+
+Required structure (field: type; "?" marks optional fields):
+{schema}
+
+Return ONLY the corrected JSON object - keep every value that is present, do not add commentary.
+
+JSON:
+{text}
+"""
+
+OUTCOMES = ("clean", "repaired", "followup", "failed")
+
+
+class JSONRepairError(ValueError):
+    """Response could not be turned into schema-valid JSON"""
+
+    def __init__(self, message: str, raw: Optional[str] = None):
+        super().__init__(message)
+        self.raw = raw
+
+
+_stats_lock = threading.Lock()
+_stats = {}  # evaluator model → outcome counts
+
+
+def _record(model: str, outcome: str, schema_errors: int = 0):
+    with _stats_lock:
+        stats = _stats.setdefault(model, {**{outcome: 0 for outcome in OUTCOMES}, "schema_errors": 0})
+        stats[outcome] += 1
+        stats["schema_errors"] += schema_errors
+
+
+def get_parse_stats() -> Dict[str, Dict]:
+    """Per evaluator model: responses, outcome counts, parse-failure rate and repair rate"""
+    with _stats_lock:
+        report = {}
+        for model, stats in _stats.items():
+            responses = sum(stats[outcome] for outcome in OUTCOMES)
+            report[model] = {
+                "responses": responses,
+                **stats,
+                "parse_failure_rate": (responses - stats["clean"]) / responses if responses else 0.0,
+                "repair_rate": ((stats["repaired"] + stats["followup"]) / (responses - stats["clean"])
+                                if responses > stats["clean"] else 0.0),
+            }
+        return report
+
+
+def reset_parse_stats():
+    with _stats_lock:
+        _stats.clear()
+
+
+def strip_fences(text: str) -> str:
+    """Contents of the first ``` fenced block, or the text unchanged"""
+    match = FENCE_RE.search(text)
+    if match:
+        return match.group(1)
+    # An opening fence whose closing fence was cut off
+    if text.lstrip().startswith("```"):
+        return re.sub(r"^```(?:json|JSON)?\s*", "", text.lstrip())
+    return text
+
+
+def extract_json_object(text: str) -> Optional[str]:
+    """The outermost {...} in text (to the end of text if it is never closed), or None"""
+    start = text.find("{")
+    if start < 0:
+        return None
+    depth, in_string, escaped = 0, False, False
+    for i in range(start, len(text)):
+        char = text[i]
+        if in_string:
+            if escaped:
+                escaped = False
+            elif char == "\\":
+                escaped = True
+            elif char == '"':
+                in_string = False
+        elif char == '"':
+            in_string = True
+        elif char in "{[":
+            depth += 1
+        elif char in "}]":
+            depth -= 1
+            if depth == 0:
+                return text[start:i + 1]
+    return text[start:]
+
+
+def close_truncated(text: str, accept: Optional[Callable[[object], bool]] = None) -> Optional[object]:
+    """
+    Parse a JSON object cut off mid-way by closing it at its last complete value
+
+    Cut points are tried from the end: the open string (if any) closed where it
+    stops, then after every closing quote/bracket and before every comma, each
+    followed by the brackets still open there. With accept, the latest cut it
+    accepts wins (e.g. dropping a half-written last list item the schema rejects),
+    falling back to the latest cut that parses at all.
+    """
+    stack, in_string, escaped = [], False, False
+    cuts = []  # (cut index, open brackets at that point)
+    for i, char in enumerate(text):
+        if in_string:
+            if escaped:
+                escaped = False
+            elif char == "\\":
+                escaped = True
+            elif char == '"':
+                in_string = False
+                cuts.append((i + 1, tuple(stack)))
+            continue
+        if char == '"':
+            in_string = True
+        elif char in "{[":
+            stack.append("}" if char == "{" else "]")
+            cuts.append((i + 1, tuple(stack)))
+        elif char in "}]":
+            if stack:
+                stack.pop()
+            cuts.append((i + 1, tuple(stack)))
+        elif char == ",":
+            cuts.append((i, tuple(stack)))
+
+    candidates = []
+    if in_string:
+        body = text[:-1] if escaped else text
+        candidates.append(body + '"' + "".join(reversed(stack)))
+    for cut, open_brackets in reversed(cuts[-MAX_REPAIR_CANDIDATES:]):
+        candidates.append(text[:cut].rstrip().rstrip(",") + "".join(reversed(open_brackets)))
+
+    first_parsed = None
+    for candidate in candidates:
+        try:
+            value = json.loads(TRAILING_COMMA_RE.sub(r"\1", candidate))
+        except ValueError:
+            continue
+        if accept is None or accept(value):
+            return value
+        if first_parsed is None:
+            first_parsed = value
+    return first_parsed
+
+
+def repair_json(text: str, accept: Optional[Callable[[object], bool]] = None) -> Optional[object]:
+    """Best local repair of a response into a JSON value, or None (accept: see close_truncated)"""
+    if not text:
+        return None
+    candidate = extract_json_object(strip_fences(text))
+    if candidate is None:
+        return None
+    for attempt in (candidate, TRAILING_COMMA_RE.sub(r"\1", candidate)):
+        try:
+            return json.loads(attempt)
+        except ValueError:
+            pass
+    return close_truncated(candidate, accept)
+
+
+def _type_name(spec) -> str:
+    if isinstance(spec, list):
+        return f"[{_type_name(spec[0])}]"
+    if isinstance(spec, dict):
+        return "{" + ", ".join(f"{k}: {_type_name(v)}" for k, v in spec.items()) + "}"
+    if isinstance(spec, tuple):
+        return " | ".join(_type_name(s) for s in spec)
+    return {str: "string", int: "integer", float: "number", bool: "boolean"}.get(spec, spec.__name__)
+
+
+def describe_schema(schema: Dict) -> str:
+    """Schema as the field: type lines shown in the fix-up prompt"""
+    return "\n".join(f"{field}: {_type_name(spec)}" for field, spec in schema.items())
+
+
+def _coerce(value, spec, path: str, problems: List[str]):
+    """value converted to spec where unambiguous; problems appended otherwise"""
+    if isinstance(spec, dict):
+        if not isinstance(value, dict):
+            problems.append(f"{path}: expected an object")
+            return value
+        return validate(value, spec, path, problems)
+    if isinstance(spec, list):
+        if value is None:
+            return []
+        if not isinstance(value, list):
+            problems.append(f"{path}: expected a list")
+            return value
+        return [_coerce(item, spec[0], f"{path}[{i}]", problems) for i, item in enumerate(value)]
+
+    types = spec if isinstance(spec, tuple) else (spec,)
+    if isinstance(value, bool) and bool not in types:
+        problems.append(f"{path}: expected {_type_name(spec)}")
+        return value
+    if isinstance(value, types):
+        return value
+    if (int in types or float in types) and isinstance(value, str):
+        try:
+            number = float(value.strip().rstrip("%"))
+            return int(number) if number.is_integer() and int in types else number
+        except ValueError:
+            pass
+    if float in types and isinstance(value, int):
+        return float(value)
+    if str in types and isinstance(value, (int, float)):
+        return str(value)
+    problems.append(f"{path}: expected {_type_name(spec)}")
+    return value
+
+
+def validate(data: Dict, schema: Dict, path: str = "", problems: Optional[List[str]] = None) -> Dict:
+    """
+    data coerced to schema; schema violations are appended to problems
+
+    Missing optional fields are left out (missing optional lists become []);
+    fields not in the schema are kept as they are.
+    """
+    problems = [] if problems is None else problems
+    result = dict(data)
+    for field, spec in schema.items():
+        optional = field.endswith("?")
+        name = field.rstrip("?")
+        where = f"{path}.{name}" if path else name
+        if data.get(name) is None:
+            if isinstance(spec, list):
+                result[name] = []
+            if not optional:
+                problems.append(f"{where}: missing")
+            continue
+        result[name] = _coerce(data[name], spec, where, problems)
+    return result
+
+
+def _check(value, schema: Optional[Dict]) -> Tuple[Optional[Dict], List[str]]:
+    if not isinstance(value, dict):
+        return None, ["response is not a JSON object"]
+    if schema is None:
+        return value, []
+    problems = []
+    return validate(value, schema, problems=problems), problems
+
+
+def parse_evaluator_json(text: Optional[str], schema: Optional[Dict] = None, model: str = "unknown",
+                         fixer: Optional[Callable[[str], str]] = None) -> Dict:
+    """
+    Parse an evaluator response into a schema-valid dict
+
+    Args:
+        text: Raw response text
+        schema: Expected structure (see module docstring); None = any JSON object
+        model: Evaluator model, for the per-model parse statistics
+        fixer: Sends a prompt to a (cheap) model and returns its text - used only
+               when local repair fails
+
+    Raises:
+        JSONRepairError: If no stage produced a schema-valid object
+    """
+    text = text or ""
+    try:
+        data, problems = _check(json.loads(text), schema)
+        if data is not None and not problems:
+            _record(model, "clean")
+            return data
+    except ValueError:
+        data, problems = None, ["not valid JSON"]
+
+    repaired = repair_json(text, accept=lambda value: not _check(value, schema)[1])
+    if repaired is not None:
+        data, problems = _check(repaired, schema)
+        if data is not None and not problems:
+            _record(model, "repaired")
+            return data
+
+    schema_errors = len(problems) if data is not None else 0
+    broken = json.dumps(data) if data is not None else extract_json_object(strip_fences(text))
+    # A response with no JSON at all (a refusal, prose) has nothing to fix - a follow-up would invent it
+    if fixer is not None and broken:
+        prompt = JSON_FIX_PROMPT.format(problems="\n".join(f"- {p}" for p in problems[:20]),
+                                        schema=describe_schema(schema) if schema else "any JSON object",
+                                        text=broken[:MAX_FIX_INPUT_CHARS])
+        try:
+            fixed = repair_json(fixer(prompt))
+        except Exception:
+            fixed = None
+        if fixed is not None:
+            fixed_data, fixed_problems = _check(fixed, schema)
+            if fixed_data is not None and not fixed_problems:
+                _record(model, "followup", schema_errors)
+                return fixed_data
+
+    _record(model, "failed", schema_errors)
+    raise JSONRepairError(f"Unparseable evaluator response ({'; '.join(problems[:3])})", raw=text)
+
+
+def format_parse_stats(stats: Dict[str, Dict]) -> List[str]:
+    """One summary line per evaluator model"""
+    return [f"{model}: {s['responses']} responses, {s['parse_failure_rate'] * 100:.1f}% needed repair, "
+            f"{s['repaired']} repaired locally, {s['followup']} by follow-up, {s['failed']} failed"
+            for model, s in stats.items()]
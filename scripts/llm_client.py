@@ -0,0 +1,195 @@
+#!/usr/bin/env python3
+"""
+llm_client.py
+
+Shared LiteLLM client layer for the AR7 scripts.
+
+Every call is normalized against the learned param capability cache, so params a
+model has already rejected are dropped/clamped before the request goes out. When a
+provider rejects a param we haven't seen before, it is recorded and the call is
+retried once with the corrected params.
+
+HuggingFace serverless endpoints that answer "model loading" are waited out rather
+than failed; the time spent waiting is reported separately via get_last_call_stats().
+
+Models mapped in config/local_backend.json are routed to a local OpenAI-compatible
+server once local_backend.enable_local_backend() has been called.
+
+stream_text() streams a response through a monitor (see response_classifier.py) so a
+refusal or wrong-language answer can be abandoned after its first few hundred characters.
+A stream also stops at its next chunk once a shutdown signal has been received.
+
+The usage block of every response (tokens, cached tokens, cost) is recorded with
+usage_accounting, tagged by whatever usage_scope() the caller is in.
+"""
+
+import threading
+import time
+from typing import Dict, List
+
+try:
+    import litellm
+    LITELLM_AVAILABLE = True
+except ImportError:
+    LITELLM_AVAILABLE = False
+
+from graceful_shutdown import ShutdownRequested, shutdown_requested
+from param_capabilities import ParamCapabilityCache
+from hf_warmup import HF_MAX_COLD_START_WAIT, is_huggingface_model, parse_model_loading
+from local_backend import route_model
+from usage_accounting import record_response_usage
+
+_capability_cache = None
+_call_stats = threading.local()
+
+
+class EarlyAbort(Exception):
+    """Raised when a streamed response is abandoned mid-stream"""
+
+    def __init__(self, label: str, partial_text: str):
+        super().__init__(f"Aborted mid-stream: {label}")
+        self.label = label
+        self.partial_text = partial_text
+
+
+def get_capability_cache() -> ParamCapabilityCache:
+    """Return the process-wide capability cache (loaded on first use)"""
+    global _capability_cache
+    if _capability_cache is None:
+        _capability_cache = ParamCapabilityCache()
+    return _capability_cache
+
+
+def get_last_call_stats() -> Dict:
+    """Stats for the most recent call on this thread (cold_start_seconds, finish_reason)"""
+    return dict(getattr(_call_stats, "last", {"cold_start_seconds": 0.0, "finish_reason": None}))
+
+
+def reset_call_stats():
+    """Forget this thread's last-call stats, so a call that does not record any reads as none"""
+    _call_stats.last = {"cold_start_seconds": 0.0, "finish_reason": None}
+
+
+def _completion_with_capabilities(model: str, messages: List[Dict], params: Dict):
+    """One completion, retried once if a newly rejected param was learned"""
+    cache = get_capability_cache()
+    request_params = cache.normalize(model, params)
+
+    try:
+        return litellm.completion(model=model, messages=messages, **request_params)
+    except Exception as e:
+        if not cache.learn(model, request_params, e):
+            raise
+
+    retry_params = cache.normalize(model, params)
+    dropped = sorted(set(request_params) - set(retry_params))
+    print(f"    🔧 {model}: learned param limits ({', '.join(dropped) or 'max_tokens clamped'}), retrying")
+    return litellm.completion(model=model, messages=messages, **retry_params)
+
+
+def completion(model: str, messages: List[Dict], **params):
+    """
+    Call litellm.completion with capability-normalized params
+
+    Args:
+        model: LiteLLM model name (e.g. 'openai/gpt-5-mini')
+        messages: Chat messages
+        **params: Request params (temperature, max_tokens, response_format, ...)
+
+    Returns:
+        The LiteLLM response object
+    """
+    if not LITELLM_AVAILABLE:
+        raise ImportError("litellm not available")
+
+    requested_model = model
+    model, params = route_model(model, params)
+
+    cold_start = 0.0
+    while True:
+        try:
+            response = _completion_with_capabilities(model, messages, params)
+            break
+        except Exception as e:
+            wait = parse_model_loading(e) if is_huggingface_model(model) else None
+            if wait is None or cold_start + wait > HF_MAX_COLD_START_WAIT:
+                _call_stats.last = {"cold_start_seconds": cold_start, "finish_reason": None}
+                raise
+            print(f"    ⏳ {model}: endpoint loading, waiting {wait:.0f}s")
+            time.sleep(wait)
+            cold_start += wait
+
+    finish_reason = None
+    if not params.get("stream"):
+        record_response_usage(requested_model, response)
+        if getattr(response, "choices", None):
+            finish_reason = response.choices[0].finish_reason
+    _call_stats.last = {"cold_start_seconds": cold_start, "finish_reason": finish_reason}
+    return response
+
+
+def stream_text(model: str, messages: List[Dict], monitor=None, **params) -> str:
+    """
+    Stream a completion and return its text, abandoning it early if the monitor says so
+
+    Args:
+        monitor: Object with feed(delta) -> abort label or None (e.g. StreamMonitor)
+
+    Raises:
+        EarlyAbort: If the monitor flagged the response mid-stream
+        ShutdownRequested: If the run is shutting down (Ctrl-C/SIGTERM)
+    """
+    stream = completion(model=model, messages=messages, stream=True, **params)
+    cold_start = get_last_call_stats()["cold_start_seconds"]
+
+    parts = []
+    chunks = []
+    finish_reason = None
+    for chunk in stream:
+        chunks.append(chunk)
+        choice = chunk.choices[0]
+        delta = choice.delta.content or ""
+        parts.append(delta)
+        finish_reason = choice.finish_reason or finish_reason
+
+        if shutdown_requested():
+            if hasattr(stream, "close"):
+                stream.close()
+            _record_stream_usage(model, chunks, messages)
+            raise ShutdownRequested()
+
+        if monitor is not None:
+            label = monitor.feed(delta)
+            if label:
+                if hasattr(stream, "close"):
+                    stream.close()
+                _record_stream_usage(model, chunks, messages)
+                _call_stats.last = {"cold_start_seconds": cold_start, "finish_reason": "aborted"}
+                raise EarlyAbort(label, "".join(parts))
+
+    _record_stream_usage(model, chunks, messages)
+    _call_stats.last = {"cold_start_seconds": cold_start, "finish_reason": finish_reason}
+    return "".join(parts)
+
+
+def _record_stream_usage(model: str, chunks: List, messages: List[Dict]):
+    """Rebuild a streamed response so its usage can be recorded like any other call"""
+    if not chunks:
+        return
+    try:
+        response = litellm.stream_chunk_builder(chunks, messages=messages)
+    except Exception:
+        return
+    if response is not None:
+        record_response_usage(model, response)
+
+
+def llm_call_with_structured_output(messages: List[Dict], model: str, **kwargs) -> str:
+    """Drop-in replacement for nimble_llm_caller - returns the response text"""
+    response = completion(model=model, messages=messages, **kwargs)
+    return response.choices[0].message.content
+
+
+def call_model_with_prompt(messages: List[Dict], model: str, **kwargs) -> str:
+    """Drop-in replacement for codexes.core.llm_caller - returns the response text"""
+    return llm_call_with_structured_output(messages=messages, model=model, **kwargs)
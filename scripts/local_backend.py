@@ -0,0 +1,128 @@
+#!/usr/bin/env python3
+"""
+local_backend.py
+
+Route the open-weight 7B models to a locally hosted OpenAI-compatible server.
+
+Mistral-7B-Instruct, Qwen2.5-7B-Instruct and DeepSeek-R1-Distill-Qwen-7B can run on
+CPU with quantized weights behind llama.cpp's llama-server or vLLM-CPU. Both expose
+/v1/chat/completions and batch concurrent requests continuously, so the runners
+submit all chapter prompts for a local model at once instead of one at a time.
+
+Example servers (one model per port, or one router in front of several):
+    llama-server -m qwen2.5-7b-instruct-q4_k_m.gguf --alias qwen2.5-7b-instruct-q4_k_m \\
+        --port 8080 --parallel 8 --cont-batching --ctx-size 131072
+    VLLM_TARGET_DEVICE=cpu vllm serve Qwen/Qwen2.5-7B-Instruct-AWQ \\
+        --served-model-name qwen2.5-7b-instruct-q4_k_m --port 8080
+
+Usage:
+    # Check which mapped models the local server is serving
+    uv run python local_backend.py
+
+    # Use a different server
+    AR7_LOCAL_LLM_BASE_URL=http://gpu-box:8000/v1 uv run python local_backend.py
+"""
+
+import argparse
+import json
+import os
+import sys
+import urllib.request
+from pathlib import Path
+from typing import Dict, List, Optional, Tuple
+
+DEFAULT_CONFIG_FILE = Path(__file__).parent.parent / "config" / "local_backend.json"
+BASE_URL_ENV = "AR7_LOCAL_LLM_BASE_URL"
+
+_active_config = None
+
+
+def load_local_config(config_file: Path = DEFAULT_CONFIG_FILE) -> Dict:
+    """Load the local backend config (base_url, concurrency, model map)"""
+    with open(config_file) as f:
+        config = json.load(f)
+
+    # Environment override so the same config works against a remote box
+    if os.environ.get(BASE_URL_ENV):
+        config["base_url"] = os.environ[BASE_URL_ENV]
+
+    return config
+
+
+def enable_local_backend(config_file: Path = DEFAULT_CONFIG_FILE) -> Dict:
+    """Turn on local routing for this process; returns the active config"""
+    global _active_config
+    _active_config = load_local_config(config_file)
+    print(f"🖥️  Local backend: {_active_config['base_url']} "
+          f"({len(_active_config['models'])} models, concurrency {_active_config['concurrency']})")
+    return _active_config
+
+
+def is_local_model(model_name: str) -> bool:
+    """True if local routing is enabled and this model is served locally"""
+    return _active_config is not None and model_name in _active_config["models"]
+
+
+def local_concurrency() -> int:
+    """Concurrent requests to submit to the local server"""
+    return _active_config["concurrency"] if _active_config else 1
+
+
+def route_model(model_name: str, params: Dict) -> Tuple[str, Dict]:
+    """
+    Map a hosted model id to the local server
+
+    Returns:
+        (model name for litellm, params with api_base/api_key added) - unchanged
+        if the model is not served locally
+    """
+    if not is_local_model(model_name):
+        return model_name, params
+
+    routed = dict(params)
+    routed.setdefault("api_base", _active_config["base_url"])
+    routed.setdefault("api_key", _active_config.get("api_key", "local"))
+    routed.setdefault("timeout", _active_config.get("timeout", 3600))
+    return f"openai/{_active_config['models'][model_name]}", routed
+
+
+def list_served_models(base_url: str) -> Optional[List[str]]:
+    """Ask the server which model names it serves (None if unreachable)"""
+    try:
+        with urllib.request.urlopen(f"{base_url.rstrip('/')}/models", timeout=5) as response:
+            data = json.load(response)
+        return [m.get("id") for m in data.get("data", [])]
+    except Exception:
+        return None
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Check the local OpenAI-compatible backend")
+    parser.add_argument("--config-file", default=str(DEFAULT_CONFIG_FILE))
+    args = parser.parse_args()
+
+    config = load_local_config(Path(args.config_file))
+    served = list_served_models(config["base_url"])
+
+    print(f"\n{'='*80}")
+    print(f"LOCAL BACKEND: {config['base_url']}")
+    print(f"{'='*80}\n")
+
+    if served is None:
+        print("❌ Server not reachable")
+        return 1
+
+    missing = 0
+    for model_name, local_name in config["models"].items():
+        if local_name in served:
+            print(f"  ✅ {model_name:<55} -> {local_name}")
+        else:
+            missing += 1
+            print(f"  ❌ {model_name:<55} -> {local_name} (not served)")
+
+    print(f"\nServed: {', '.join(served) or '(none)'}\n")
+    return 0 if missing == 0 else 1
+
+
+if __name__ == "__main__":
+    sys.exit(main())
@@ -0,0 +1,255 @@
+#!/usr/bin/env python3
+"""
+output_writer.py
+
+Concurrency-safe writes into a run's output directory.
+
+Generation, fact-checking and scoring can run at the same time against the same
+output/<run>/<model>/ tree, so no reader may ever see a half-written file:
+
+    - Every file is written to a hidden temp file in the destination directory
+      (.<name>.<random>.tmp - never matched by the *.txt / *.json globs) and
+      renamed over the destination, which is atomic on POSIX.
+    - A WriteBatch stages several files (e.g. a chapter, its reasoning trace and its
+      metadata), fsyncs them together, renames them all under the run's exclusive
+      commit lock and fsyncs each touched directory once - so a reader holding the
+      shared lock (read_lock) sees either none or all of them.
+    - Each stage can claim the run (claim_run) so two generation runs, say, can't
+      write the same output directory at once; stage_running() lets readers see
+      whether a stage is still producing files.
+
+A run directory is any directory holding a .run.lock file - open_run() creates it.
+Writes outside a run directory are still atomic, just not lock-coordinated. Locks
+are fcntl advisory locks; where fcntl is unavailable they are no-ops.
+
+Usage:
+    open_run(output_dir)
+    claim_run(output_dir, "generation")
+
+    with WriteBatch() as batch:
+        batch.write_text(model_dir / "chapter_7_africa.txt", text)
+        batch.write_json(model_dir / "chapter_7_africa_metadata.json", metadata)
+
+    with read_lock(model_dir):
+        chapters = list(model_dir.glob("*.txt"))
+"""
+
+import json
+import os
+import tempfile
+from contextlib import contextmanager
+from pathlib import Path
+from typing import Dict, List, Optional, Tuple
+
+try:
+    import fcntl
+    FCNTL_AVAILABLE = True
+except ImportError:
+    FCNTL_AVAILABLE = False
+
+RUN_LOCK_FILENAME = ".run.lock"
+
+_claims = {}  # (run_dir, stage) → open lock file, held for the life of the process
+
+
+class RunLockedError(RuntimeError):
+    """Another process already holds this stage of the run"""
+
+
+def open_run(run_dir: Path) -> Path:
+    """Create the run directory and its commit lock file; return the run directory"""
+    run_dir = Path(run_dir)
+    run_dir.mkdir(parents=True, exist_ok=True)
+    (run_dir / RUN_LOCK_FILENAME).touch(exist_ok=True)
+    return run_dir
+
+
+def find_run_lock(path: Path) -> Optional[Path]:
+    """The .run.lock of the nearest enclosing run directory, if any"""
+    path = Path(path).resolve()
+    for directory in [path, *path.parents] if path.is_dir() else path.parents:
+        lock_file = directory / RUN_LOCK_FILENAME
+        if lock_file.exists():
+            return lock_file
+    return None
+
+
+@contextmanager
+def _flock(lock_file: Optional[Path], exclusive: bool):
+    if lock_file is None or not FCNTL_AVAILABLE:
+        yield
+        return
+    # A fresh open file description per acquisition, so threads of one process
+    # contend with each other as well as with other processes
+    with open(lock_file, "a") as f:
+        fcntl.flock(f.fileno(), fcntl.LOCK_EX if exclusive else fcntl.LOCK_SH)
+        try:
+            yield
+        finally:
+            fcntl.flock(f.fileno(), fcntl.LOCK_UN)
+
+
+@contextmanager
+def read_lock(path: Path):
+    """Hold the enclosing run's shared lock - no batch commits while it is held"""
+    with _flock(find_run_lock(path), exclusive=False):
+        yield
+
+
+def claim_run(run_dir: Path, stage: str):
+    """
+    Claim one stage of a run for this process (released when the process exits)
+
+    Raises:
+        RunLockedError: If another live process has already claimed the stage
+    """
+    run_dir = open_run(run_dir)
+    key = (str(run_dir.resolve()), stage)
+    if key in _claims or not FCNTL_AVAILABLE:
+        return
+
+    lock_file = run_dir / f".{stage}.lock"
+    f = open(lock_file, "a+")
+    try:
+        fcntl.flock(f.fileno(), fcntl.LOCK_EX | fcntl.LOCK_NB)
+    except BlockingIOError:
+        f.seek(0)
+        holder = f.read().strip() or "unknown"
+        f.close()
+        raise RunLockedError(f"{stage} is already running in {run_dir} (pid {holder})")
+
+    f.seek(0)
+    f.truncate()
+    f.write(str(os.getpid()))
+    f.flush()
+    _claims[key] = f
+
+
+def stage_running(run_dir: Path, stage: str) -> bool:
+    """True if a live process has claimed this stage of the run"""
+    lock_file = Path(run_dir) / f".{stage}.lock"
+    if not FCNTL_AVAILABLE or not lock_file.exists():
+        return False
+    if (str(Path(run_dir).resolve()), stage) in _claims:
+        return True
+    with open(lock_file, "a") as f:
+        try:
+            fcntl.flock(f.fileno(), fcntl.LOCK_SH | fcntl.LOCK_NB)
+        except BlockingIOError:
+            return True
+        fcntl.flock(f.fileno(), fcntl.LOCK_UN)
+    return False
+
+
+def _fsync_dir(directory: Path):
+    try:
+        fd = os.open(directory, os.O_RDONLY)
+    except OSError:
+        return  # Directories can't be opened for fsync on every platform
+    try:
+        os.fsync(fd)
+    finally:
+        os.close(fd)
+
+
+def _current_umask() -> int:
+    mask = os.umask(0)
+    os.umask(mask)
+    return mask
+
+
+_UMASK = _current_umask()
+
+
+def _file_mode(path: Path) -> int:
+    """Mode the destination should end up with: its current mode, or what open() would give a new file"""
+    try:
+        return os.stat(path).st_mode & 0o7777
+    except OSError:
+        return 0o666 & ~_UMASK
+
+
+class WriteBatch:
+    """Files staged as temp files and committed together"""
+
+    def __init__(self, durable: bool = True):
+        """
+        Args:
+            durable: fsync files and directories on commit. False still commits
+                atomically (for readers) but may lose the batch on power loss -
+                fine for progress files rewritten every few seconds
+        """
+        self.durable = durable
+        self.staged: List[Tuple[str, Path]] = []  # (temp file, destination)
+
+    def write_text(self, path: Path, text: str):
+        """Stage text for path (visible to readers only after commit)"""
+        path = Path(path)
+        path.parent.mkdir(parents=True, exist_ok=True)
+        fd, tmp_name = tempfile.mkstemp(dir=path.parent, prefix=f".{path.name}.", suffix=".tmp")
+        try:
+            # mkstemp creates the file 0600 and the rename keeps it - match a plain open() instead
+            if hasattr(os, "fchmod"):
+                os.fchmod(fd, _file_mode(path))
+            with os.fdopen(fd, "w", encoding="utf-8") as f:
+                f.write(text)
+        except BaseException:
+            os.unlink(tmp_name)
+            raise
+        self.staged.append((tmp_name, path))
+
+    def write_json(self, path: Path, data, indent: int = 2):
+        """Stage data as JSON for path"""
+        self.write_text(path, json.dumps(data, indent=indent))
+
+    def commit(self):
+        """fsync every staged file, rename them into place under the commit lock, fsync the directories"""
+        if not self.staged:
+            return
+
+        if self.durable:
+            for tmp_name, _ in self.staged:
+                fd = os.open(tmp_name, os.O_RDONLY)
+                try:
+                    os.fsync(fd)
+                finally:
+                    os.close(fd)
+
+        # Every destination in one batch shares a run (lock the first one's)
+        with _flock(find_run_lock(self.staged[0][1].parent), exclusive=True):
+            for tmp_name, path in self.staged:
+                os.replace(tmp_name, path)
+
+        if self.durable:
+            for directory in {path.parent for _, path in self.staged}:
+                _fsync_dir(directory)
+        self.staged = []
+
+    def abort(self):
+        """Discard every staged file"""
+        for tmp_name, _ in self.staged:
+            if os.path.exists(tmp_name):
+                os.unlink(tmp_name)
+        self.staged = []
+
+    def __enter__(self):
+        return self
+
+    def __exit__(self, exc_type, exc, tb):
+        if exc_type is None:
+            self.commit()
+        else:
+            self.abort()
+        return False
+
+
+def atomic_write_text(path: Path, text: str, durable: bool = True):
+    """Write one file atomically (a batch of one)"""
+    with WriteBatch(durable=durable) as batch:
+        batch.write_text(path, text)
+
+
+def atomic_write_json(path: Path, data: Dict, durable: bool = True):
+    """Write one JSON file atomically"""
+    with WriteBatch(durable=durable) as batch:
+        batch.write_json(path, data)
@@ -0,0 +1,220 @@
+#!/usr/bin/env python3
+"""
+paragraph_cache.py
+
+Paragraph-level incremental fact-checking of revised chapters.
+
+Every fact-check result records the chapter's paragraphs (as split by
+fact_check_chunking.split_paragraphs) by content hash, and every issue the
+paragraph it was found in. When the chapter is checked again, the previous
+*_factcheck.json is the cache:
+
+    - paragraphs whose hash was verified before keep their prior issues
+    - changed and new paragraphs are packed into re-check windows, each with
+      its neighbouring paragraphs as read-only context
+    - issues the checker reports inside a context paragraph are dropped - that
+      paragraph keeps its prior issues, so they would be counted twice
+    - the result reports how much of the chapter was actually re-verified
+
+Prior results are only reused when they came from the same checker model and
+checker version (a hash of the fact-check prompt).
+"""
+
+import hashlib
+import json
+from pathlib import Path
+from typing import Dict, List, Optional
+
+from fact_check_chunking import SENTENCE_SPLIT_RE, TOKEN_RE, _tail, split_paragraphs
+
+CONTEXT_PARAGRAPHS = 1  # Unchanged neighbours shown on each side of a changed run
+CONTEXT_MARKER = "[CONTEXT - already verified, do not report issues here]"
+RECHECK_MARKER = "[RE-CHECK]"
+
+
+def paragraph_hash(text: str) -> str:
+    """Content hash of a paragraph, insensitive to whitespace changes"""
+    return hashlib.sha256(" ".join(text.split()).encode("utf-8")).hexdigest()[:16]
+
+
+def chapter_paragraphs(text: str, max_words: int) -> List[Dict]:
+    """split_paragraphs() units, each with its "hash" """
+    return [{**unit, "hash": paragraph_hash(unit["text"])} for unit in split_paragraphs(text, max_words)]
+
+
+def load_prior_check(result_file: Path, checker_model: str, checker_version: str) -> Optional[Dict]:
+    """
+    Verified paragraphs of a previous fact-check of this chapter
+
+    Returns:
+        {"paragraphs": {hash: [issues]}, "confidence": ...} or None if there is no
+        usable prior result (missing, claim-mode, other checker or version)
+    """
+    try:
+        prior = json.loads(Path(result_file).read_text(encoding="utf-8"))
+    except (OSError, ValueError):
+        return None
+    if (prior.get("checker_model") != checker_model or prior.get("checker_version") != checker_version
+            or not prior.get("paragraphs")):
+        return None
+
+    paragraphs = {p["hash"]: [] for p in prior["paragraphs"] if p.get("verified")}
+    for issue in prior.get("issues") or []:
+        index = issue.get("paragraph")
+        if isinstance(index, int) and 0 <= index < len(prior["paragraphs"]):
+            paragraph_hash_ = prior["paragraphs"][index]["hash"]
+            if paragraph_hash_ in paragraphs:
+                paragraphs[paragraph_hash_].append(issue)
+    return {"paragraphs": paragraphs, "confidence": prior.get("confidence")}
+
+
+def _head(text: str, max_words: int) -> str:
+    """The first whole sentences of text totalling at most max_words (first words if none fit)"""
+    head, words = [], 0
+    for sentence in SENTENCE_SPLIT_RE.split(text):
+        count = len(sentence.split())
+        if words + count > max_words:
+            break
+        head.append(sentence)
+        words += count
+    return " ".join(head) if head else " ".join(text.split()[:max_words])
+
+
+def make_recheck_windows(paragraphs: List[Dict], changed: List[int], window_words: int,
+                         context_words: int, context: int = CONTEXT_PARAGRAPHS) -> List[Dict]:
+    """
+    Windows covering only the changed paragraphs, each run with its neighbours as context
+
+    Runs of consecutive changed paragraphs are capped at window_words -
+    2 * context_words; context is trimmed to ~context_words per side. Several
+    short runs share a window while it stays within window_words.
+
+    Returns:
+        Windows in the make_windows() format plus "paragraphs" (indices to re-check)
+        and "context_paragraphs" (indices shown as context only)
+    """
+    budget = max(1, window_words - 2 * context_words)
+    runs = []
+    for i in changed:
+        run = runs[-1] if runs else None
+        if run and i == run[-1] + 1 and sum(paragraphs[j]["words"] for j in run) + paragraphs[i]["words"] <= budget:
+            run.append(i)
+        else:
+            runs.append([i])
+
+    segments = []
+    for run in runs:
+        before = [j for j in range(max(0, run[0] - context), run[0])]
+        after = [j for j in range(run[-1] + 1, min(len(paragraphs), run[-1] + 1 + context))]
+        before_text = _tail("\n\n".join(paragraphs[j]["text"] for j in before), context_words) if before else ""
+        after_text = _head("\n\n".join(paragraphs[j]["text"] for j in after), context_words) if after else ""
+        parts = [f"{CONTEXT_MARKER}\n{before_text}"] if before_text else []
+        parts.append(f"{RECHECK_MARKER}\n" + "\n\n".join(paragraphs[j]["text"] for j in run))
+        if after_text:
+            parts.append(f"{CONTEXT_MARKER}\n{after_text}")
+        checked_words = sum(paragraphs[j]["words"] for j in run)
+        extra_words = len(before_text.split()) + len(after_text.split())
+        segments.append({"text": "\n\n".join(parts), "paragraphs": run,
+                         "context_paragraphs": (before if before_text else []) + (after if after_text else []),
+                         "words": checked_words + extra_words, "context_words": extra_words})
+
+    groups = []
+    for segment in segments:
+        if groups and sum(s["words"] for s in groups[-1]) + segment["words"] <= window_words:
+            groups[-1].append(segment)
+        else:
+            groups.append([segment])
+
+    windows = []
+    for group in groups:
+        indices = [j for segment in group for j in segment["paragraphs"]]
+        context_indices = sorted({j for segment in group for j in segment["context_paragraphs"]} - set(indices))
+        sections = []
+        for j in indices:
+            if paragraphs[j]["section"] and paragraphs[j]["section"] not in sections:
+                sections.append(paragraphs[j]["section"])
+        windows.append({
+            "index": len(windows),
+            "text": "\n\n---\n\n".join(segment["text"] for segment in group),
+            "words": sum(segment["words"] for segment in group),
+            "sections": sections,
+            "overlap_words": sum(segment["context_words"] for segment in group),
+            "paragraphs": indices,
+            "context_paragraphs": context_indices
+        })
+    return windows
+
+
+def recheck_note(window: Dict, total: int, paragraph_count: int) -> str:
+    """Context line telling the evaluator only the [RE-CHECK] passages are to be reviewed"""
+    return (f"NOTE: This chapter was revised since its last fact-check. This is re-check {window['index'] + 1} "
+            f"of {total}, covering {len(window['paragraphs'])} of its {paragraph_count} paragraphs. Only report "
+            f"issues in passages marked {RECHECK_MARKER}; passages marked [CONTEXT] were already verified and are "
+            f"shown for context only. Do not report content as missing because it is not in this excerpt.\n\n")
+
+
+def _normalized(text) -> str:
+    return " ".join(TOKEN_RE.findall(str(text or "").lower()))
+
+
+def attribute_issue(issue: Dict, paragraphs: List[Dict], candidates: Optional[List[int]] = None) -> int:
+    """
+    Paragraph an issue belongs to, from the text it quotes in "location"
+
+    The candidate paragraph containing the quote wins; otherwise the one sharing
+    the most words with it (the first candidate if nothing matches).
+    """
+    candidates = list(range(len(paragraphs))) if candidates is None else candidates
+    quote = _normalized(issue.get("location") or issue.get("issue"))
+    if quote:
+        for i in candidates:
+            if quote in _normalized(paragraphs[i]["text"]):
+                return i
+    quote_tokens = set(quote.split())
+    best, best_overlap = candidates[0], 0
+    for i in candidates:
+        overlap = len(quote_tokens & set(_normalized(paragraphs[i]["text"]).split()))
+        if overlap > best_overlap:
+            best, best_overlap = i, overlap
+    return best
+
+
+def quotes_context(issue: Dict, paragraphs: List[Dict], checked: List[int], context: List[int]) -> bool:
+    """Whether an issue quotes a context paragraph of its window rather than one it re-checked"""
+    quote = _normalized(issue.get("location"))
+    if not quote or any(quote in _normalized(paragraphs[i]["text"]) for i in checked):
+        return False
+    return any(quote in _normalized(paragraphs[i]["text"]) for i in context)
+
+
+def reused_issues(paragraphs: List[Dict], prior: Dict) -> List[Dict]:
+    """Prior issues of unchanged paragraphs, re-pointed at their current paragraph index"""
+    issues = []
+    for i, paragraph in enumerate(paragraphs):
+        for issue in prior["paragraphs"].get(paragraph["hash"], []):
+            issue = {k: v for k, v in issue.items() if k != "windows"}
+            issues.append({**issue, "paragraph": i, "reused": True})
+    return issues
+
+
+def paragraph_records(paragraphs: List[Dict], rechecked: set, unverified: set) -> List[Dict]:
+    """Per-paragraph record kept with the chapter result (the cache for the next run)"""
+    return [{
+        "hash": paragraph["hash"],
+        "words": paragraph["words"],
+        "rechecked": i in rechecked,
+        "verified": i not in unverified
+    } for i, paragraph in enumerate(paragraphs)]
+
+
+def reverification_stats(paragraphs: List[Dict], rechecked: set) -> Dict:
+    """How much of the chapter was actually sent to the checker this run"""
+    words = sum(p["words"] for p in paragraphs)
+    words_rechecked = sum(paragraphs[i]["words"] for i in rechecked)
+    return {
+        "paragraphs": len(paragraphs),
+        "paragraphs_rechecked": len(rechecked),
+        "words": words,
+        "words_rechecked": words_rechecked,
+        "fraction_rechecked": words_rechecked / words if words else 0.0
+    }
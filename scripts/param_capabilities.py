@@ -0,0 +1,256 @@
+#!/usr/bin/env python3
+"""
+param_capabilities.py
+
+Learned per-model parameter capabilities.
+
+Records which request params each provider/model rejected (e.g. response_format,
+oversized max_tokens, temperature on reasoning models) and persists them to disk,
+so later requests are normalized before they cost a network round trip.
+
+Usage:
+    # Show what has been learned so far
+    uv run python param_capabilities.py
+
+    # Forget everything learned for one model
+    uv run python param_capabilities.py --reset openai/gpt-5-mini
+"""
+
+import argparse
+import json
+import re
+import sys
+import threading
+from pathlib import Path
+from datetime import datetime
+from typing import Dict, List, Optional
+
+from output_writer import atomic_write_json
+
+DEFAULT_CACHE_FILE = Path("output/param_capabilities.json")
+
+# Params we know how to learn about; anything else is passed through untouched
+LEARNABLE_PARAMS = ["response_format", "temperature", "max_tokens", "top_p", "seed"]
+
+# litellm.UnsupportedParamsError: "... does not support parameters: {'temperature': 0.3}, ..."
+UNSUPPORTED_PARAMS_RE = re.compile(r"does not support parameters?:?\s*\{([^}]*)\}")
+
+# Phrases providers use when a max_tokens value is too large
+MAX_TOKENS_HINTS = ["max_tokens", "max_completion_tokens", "output tokens", "completion tokens"]
+
+# HTTP status prefixes ("Error code: 400 - ...") - never a token limit
+STATUS_CODE_RE = re.compile(r"(?:error|status)[ _]?code:?\s*\d{3}", re.IGNORECASE)
+
+# Numbers stated as the ceiling: "at most 16384", "35000 > 8192", "<= `8192`", "[1, 8192]"
+LIMIT_RES = [
+    re.compile(r"(?:at most|less than or equal to|no more than|not exceed|up to|maximum(?: value)?(?: is| of)?"
+               r"|max(?:imum)? allowed(?: is)?|limit(?: is| of)?)\s*:?\s*`?(\d{3,7})`?", re.IGNORECASE),
+    re.compile(r"\d+\s*>\s*`?(\d{3,7})`?"),
+    re.compile(r"(?:<=|≤)\s*`?(\d{3,7})`?"),
+    re.compile(r"\[\s*\d+\s*,\s*(\d{3,7})\s*\]"),
+]
+
+# The param itself is rejected (e.g. reasoning models want max_completion_tokens)
+UNSUPPORTED_HINTS = ["unsupported parameter", "not supported", "does not support", "unsupported_parameter"]
+
+
+def _parse_max_tokens_limit(error_str: str, requested: int) -> Optional[int]:
+    """Extract the provider's max_tokens ceiling from an error message.
+
+    Providers phrase this differently ("35000 > 8192", "supports at most 16384
+    completion tokens", "must be less than or equal to `8192`"). Only numbers
+    stated as a ceiling count - never a bare number or the HTTP status - and of
+    those the largest below what we asked for.
+    """
+    if "context length" in error_str.lower():
+        # Prompt + completion overflow - not a property of the param itself
+        return None
+
+    text = STATUS_CODE_RE.sub("", error_str)
+    candidates = [int(match.group(1)) for pattern in LIMIT_RES for match in pattern.finditer(text)]
+    candidates = [n for n in candidates if 256 <= n < requested]
+    return max(candidates) if candidates else None
+
+
+def detect_rejected_params(error: Exception, params: Dict) -> Dict:
+    """
+    Work out which of the sent params caused a provider rejection
+
+    Args:
+        error: Exception raised by the completion call
+        params: Params that were sent with the request
+
+    Returns:
+        Dict with "unsupported" (list of param names to drop) and
+        "max_tokens_limit" (int or None)
+
+    >>> detect_rejected_params(Exception("Error code: 400 - Unsupported parameter: 'max_tokens' is not "
+    ...     "supported with this model. Use 'max_completion_tokens' instead."), {"max_tokens": 8000})
+    {'unsupported': ['max_tokens'], 'max_tokens_limit': None}
+    >>> detect_rejected_params(Exception("Error code: 400 - max_tokens is too large"), {"max_tokens": 8000})
+    {'unsupported': [], 'max_tokens_limit': None}
+    >>> detect_rejected_params(Exception("Error code: 400 - max_tokens: 35000 > 8192, which is the maximum "
+    ...     "allowed number of output tokens"), {"max_tokens": 35000})
+    {'unsupported': [], 'max_tokens_limit': 8192}
+    >>> detect_rejected_params(Exception("BadRequestError: max_tokens must be less than or equal to `16384`"),
+    ...     {"max_tokens": 32000})
+    {'unsupported': [], 'max_tokens_limit': 16384}
+    >>> detect_rejected_params(Exception("400 This model supports at most 4096 completion tokens"),
+    ...     {"max_tokens": 8000})
+    {'unsupported': [], 'max_tokens_limit': 4096}
+    """
+    error_str = str(error)
+    lowered = error_str.lower()
+    found = {"unsupported": [], "max_tokens_limit": None}
+
+    match = UNSUPPORTED_PARAMS_RE.search(error_str)
+    if match:
+        names = re.findall(r"['\"](\w+)['\"]\s*:", match.group(1))
+        found["unsupported"] = [n for n in names if n in params]
+        return found
+
+    # Only treat it as a param problem if the provider said it was a bad request
+    if not any(s in lowered for s in ["400", "badrequest", "invalid", "unsupported", "not supported", "does not support"]):
+        return found
+
+    if "max_tokens" in params and "max_tokens" in lowered and any(h in lowered for h in UNSUPPORTED_HINTS):
+        found["unsupported"].append("max_tokens")
+        return found
+
+    if "max_tokens" in params and any(h in lowered for h in MAX_TOKENS_HINTS):
+        limit = _parse_max_tokens_limit(error_str, int(params["max_tokens"]))
+        if limit:
+            found["max_tokens_limit"] = limit
+            return found
+
+    for name in LEARNABLE_PARAMS:
+        if name == "max_tokens" or name not in params:
+            continue
+        if name in lowered:
+            found["unsupported"].append(name)
+
+    # "json_object"/"json mode" errors don't always name the param
+    if "response_format" in params and "response_format" not in found["unsupported"]:
+        if "json_object" in lowered or "json mode" in lowered:
+            found["unsupported"].append("response_format")
+
+    return found
+
+
+class ParamCapabilityCache:
+    """Per-model record of rejected params, persisted as JSON"""
+
+    def __init__(self, cache_file: Path = DEFAULT_CACHE_FILE):
+        self.cache_file = Path(cache_file)
+        self._lock = threading.Lock()
+        self.models = {}
+        self.load()
+
+    def load(self):
+        """Load learned capabilities from disk (missing/corrupt file = start empty)"""
+        if not self.cache_file.exists():
+            return
+        try:
+            data = json.loads(self.cache_file.read_text(encoding='utf-8'))
+            self.models = data.get("models", {})
+        except (json.JSONDecodeError, OSError) as e:
+            print(f"⚠️  Ignoring unreadable capability cache {self.cache_file}: {e}")
+            self.models = {}
+
+    def save(self):
+        """Persist learned capabilities (write to temp file, then rename)"""
+        atomic_write_json(self.cache_file, {
+            "updated_at": datetime.now().isoformat(),
+            "models": self.models
+        })
+
+    def normalize(self, model: str, params: Dict) -> Dict:
+        """Return a copy of params with known-bad values removed or clamped"""
+        record = self.models.get(model)
+        if not record:
+            return dict(params)
+
+        normalized = {k: v for k, v in params.items() if k not in record.get("unsupported", [])}
+
+        limit = record.get("max_tokens_limit")
+        if limit and normalized.get("max_tokens") and normalized["max_tokens"] > limit:
+            normalized["max_tokens"] = limit
+
+        return normalized
+
+    def learn(self, model: str, params: Dict, error: Exception) -> bool:
+        """
+        Record params rejected by a failed call
+
+        Returns:
+            True if something new was learned (so a retry is worthwhile)
+        """
+        found = detect_rejected_params(error, params)
+        if not found["unsupported"] and not found["max_tokens_limit"]:
+            return False
+
+        with self._lock:
+            record = self.models.setdefault(model, {"unsupported": [], "max_tokens_limit": None})
+            learned = False
+
+            for name in found["unsupported"]:
+                if name not in record["unsupported"]:
+                    record["unsupported"].append(name)
+                    learned = True
+
+            limit = found["max_tokens_limit"]
+            if limit and (record.get("max_tokens_limit") is None or limit < record["max_tokens_limit"]):
+                record["max_tokens_limit"] = limit
+                learned = True
+
+            if learned:
+                record["updated_at"] = datetime.now().isoformat()
+                record["last_error"] = str(error)[:300]
+                self.save()
+
+        return learned
+
+    def reset(self, model: Optional[str] = None):
+        """Forget learned capabilities for one model (or all models)"""
+        with self._lock:
+            if model:
+                self.models.pop(model, None)
+            else:
+                self.models = {}
+            self.save()
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Inspect learned model param capabilities")
+    parser.add_argument("--cache-file", default=str(DEFAULT_CACHE_FILE))
+    parser.add_argument("--reset", nargs="?", const="", metavar="MODEL",
+                        help="Forget learned params for MODEL (or all models if omitted)")
+
+    args = parser.parse_args()
+
+    cache = ParamCapabilityCache(Path(args.cache_file))
+
+    if args.reset is not None:
+        cache.reset(args.reset or None)
+        print(f"✅ Reset {'all models' if not args.reset else args.reset}")
+        return 0
+
+    if not cache.models:
+        print(f"No capabilities learned yet ({cache.cache_file})")
+        return 0
+
+    print(f"\n{'='*80}")
+    print(f"LEARNED PARAM CAPABILITIES ({cache.cache_file})")
+    print(f"{'='*80}\n")
+
+    for model, record in sorted(cache.models.items()):
+        unsupported = ", ".join(record.get("unsupported", [])) or "-"
+        limit = record.get("max_tokens_limit") or "-"
+        print(f"  {model:<55} drop: {unsupported:<30} max_tokens ≤ {limit}")
+
+    print()
+    return 0
+
+
+if __name__ == "__main__":
+    sys.exit(main())
@@ -0,0 +1,83 @@
+#!/usr/bin/env python3
+"""
+provider_rate_limit.py
+
+Per-provider request-rate limiting for runners that call evaluators from a
+worker pool.
+
+Each provider (the LiteLLM prefix of the model name - "gemini" for
+"gemini/gemini-2.5-pro", "openai" for an unprefixed name such as "gpt-4o", as
+LiteLLM routes it) gets its own requests-per-minute budget. Callers take a
+slot with wait(model) right before each request; slots are handed out at an even
+spacing of 60/rpm seconds, so any number of threads share the budget without
+bursting past it. Defaults are deliberately conservative and can be overridden
+per provider on the command line ("--rpm gemini=30").
+"""
+
+import threading
+import time
+from typing import Dict, Optional
+
+from scheduler import provider_of
+
+DEFAULT_RPM = 60
+DEFAULT_PROVIDER_RPM = {
+    "gemini": 60,
+    "vertex_ai": 60,
+    "openai": 300,
+    "anthropic": 50,
+    "xai": 60,
+    "deepseek": 60,
+    "mistral": 60,
+    "openrouter": 60,
+    "huggingface": 30,
+}
+
+
+def provider_key(model: str) -> str:
+    """Lowercased provider a model's requests count against (unprefixed names are OpenAI's)"""
+    return provider_of(model).lower() if "/" in model else "openai"
+
+
+class ProviderRateLimiter:
+    """Evenly spaced request slots per provider, shared by all threads"""
+
+    def __init__(self, provider_rpm: Optional[Dict[str, float]] = None, default_rpm: float = DEFAULT_RPM):
+        """
+        Args:
+            provider_rpm: Requests per minute by provider (scheduler.parse_limits), over
+                DEFAULT_PROVIDER_RPM (0 = unlimited)
+            default_rpm: Limit for providers not listed
+        """
+        self.provider_rpm = {**DEFAULT_PROVIDER_RPM,
+                             **{provider.lower(): rpm for provider, rpm in (provider_rpm or {}).items()}}
+        self.default_rpm = default_rpm
+        self._lock = threading.Lock()
+        self._next_slot = {}  # provider → monotonic time of its next free slot
+        self.stats = {}       # provider → {"requests", "waited_seconds"}
+
+    def rpm(self, model: str) -> float:
+        return self.provider_rpm.get(provider_key(model), self.default_rpm)
+
+    def wait(self, model: str) -> float:
+        """Block until the model's provider has a free slot; returns seconds waited"""
+        provider = provider_key(model)
+        rpm = self.rpm(model)
+        with self._lock:
+            now = time.monotonic()
+            slot = max(now, self._next_slot.get(provider, now))
+            if rpm > 0:
+                self._next_slot[provider] = slot + 60.0 / rpm
+            stats = self.stats.setdefault(provider, {"requests": 0, "waited_seconds": 0.0})
+            stats["requests"] += 1
+            stats["waited_seconds"] += slot - now
+
+        if slot > now:
+            time.sleep(slot - now)
+        return slot - now
+
+    def summary(self) -> Dict:
+        """Requests, limit and total wait per provider this run"""
+        with self._lock:
+            return {provider: {**stats, "rpm": self.provider_rpm.get(provider, self.default_rpm)}
+                    for provider, stats in self.stats.items()}
@@ -0,0 +1,90 @@
+#!/usr/bin/env python3
+"""
+quality_gate.py
+
+Cheap, deterministic checks that decide whether a chapter is good enough to keep
+or must be regenerated with a stronger model - no LLM calls.
+
+Checks:
+    length           - at least min_words of final content
+    response         - not a refusal, empty or wrong-language response
+    citation_density - in-text citations per 1000 words (Author et al., 2021 / [12]),
+                       only when a minimum is given (prompts with citation requirements)
+    calibrated_terms - IPCC calibrated likelihood/confidence language is present
+"""
+
+import re
+from typing import Dict, Optional
+
+from response_classifier import MIN_WORDS, classify_response
+from reasoning_traces import strip_reasoning
+
+MIN_CITATIONS_PER_1K_WORDS = 2.0
+MIN_CALIBRATED_TERMS = 3
+
+AUTHOR_YEAR = r"[A-Z][A-Za-z'\-]+(?: et al\.?| (?:and|&) [A-Z][A-Za-z'\-]+)?,? (?:19|20)\d{2}[a-z]?"
+
+# Parenthetical groups - author-year citations are only counted inside these
+PARENTHETICAL_RE = re.compile(r"\(([^()]{1,300})\)")
+AUTHOR_YEAR_RE = re.compile(AUTHOR_YEAR)
+# Narrative: Smith et al. (2021)
+NARRATIVE_RE = re.compile(r"[A-Z][A-Za-z'\-]+(?: et al\.?| (?:and|&) [A-Z][A-Za-z'\-]+)? \((?:19|20)\d{2}[a-z]?\)")
+# Numeric: [12] / [3, 4]
+NUMERIC_RE = re.compile(r"\[\d+(?:\s*[,\-–]\s*\d+)*\]")
+
+CALIBRATED_TERMS_RE = re.compile(
+    r"\b(?:virtually certain|extremely likely|very likely|likely|about as likely as not|unlikely|"
+    r"very unlikely|extremely unlikely|exceptionally unlikely|"
+    r"(?:very high|high|medium|low|very low) confidence)\b",
+    re.IGNORECASE
+)
+
+
+def count_citations(text: str) -> int:
+    """Number of in-text citations (author-year and numeric)"""
+    parenthetical = sum(len(AUTHOR_YEAR_RE.findall(group)) for group in PARENTHETICAL_RE.findall(text))
+    return parenthetical + len(NARRATIVE_RE.findall(text)) + len(NUMERIC_RE.findall(text))
+
+
+def count_calibrated_terms(text: str) -> int:
+    """Occurrences of IPCC calibrated likelihood/confidence language"""
+    return len(CALIBRATED_TERMS_RE.findall(text))
+
+
+def check_chapter(text: str, min_words: int = MIN_WORDS,
+                  min_citations_per_1k: Optional[float] = MIN_CITATIONS_PER_1K_WORDS,
+                  min_calibrated_terms: int = MIN_CALIBRATED_TERMS) -> Dict:
+    """
+    Run every gate check on a chapter
+
+    With min_citations_per_1k=None the citation density is measured but not gated.
+
+    Returns:
+        Dict with "passed", "failures" (names of failed checks) and the measured
+        values for each check
+    """
+    content = strip_reasoning(text or "")
+    classification = classify_response(content, min_words=min_words)
+    word_count = classification["word_count"]
+    citations = count_citations(content)
+    citations_per_1k = citations / word_count * 1000 if word_count else 0.0
+    calibrated = count_calibrated_terms(content)
+
+    checks = {
+        "length": word_count >= min_words,
+        "response": classification["label"] in ("ok", "too_short", "truncated"),
+        "calibrated_terms": calibrated >= min_calibrated_terms
+    }
+    if min_citations_per_1k is not None:
+        checks["citation_density"] = citations_per_1k >= min_citations_per_1k
+    failures = [name for name, ok in checks.items() if not ok]
+
+    return {
+        "passed": not failures,
+        "failures": failures,
+        "word_count": word_count,
+        "response_label": classification["label"],
+        "citations": citations,
+        "citations_per_1k_words": citations_per_1k,
+        "calibrated_terms": calibrated
+    }
@@ -0,0 +1,108 @@
+#!/usr/bin/env python3
+"""
+reasoning_traces.py
+
+Separate DeepSeek-R1-style reasoning traces from the final chapter text.
+
+The R1 distill models emit "<think>...</think>" before the answer (often with the
+opening tag supplied by the chat template, so only "</think>" appears in the output).
+Only the final text should be counted, fact-checked and scored; the reasoning is
+kept alongside the chapter as <chapter>.reasoning.txt with its own token count.
+"""
+
+import re
+from pathlib import Path
+from typing import Callable, Tuple
+
+from output_writer import atomic_write_text
+
+try:
+    import litellm
+    LITELLM_AVAILABLE = True
+except ImportError:
+    LITELLM_AVAILABLE = False
+
+THINK_BLOCK_RE = re.compile(r"<think>(.*?)</think>", re.DOTALL | re.IGNORECASE)
+THINK_OPEN = "<think>"
+THINK_CLOSE = "</think>"
+
+REASONING_SUFFIX = ".reasoning.txt"
+
+
+def split_reasoning(text: str) -> Tuple[str, str]:
+    """
+    Split a response into (reasoning, final_content)
+
+    Handles complete <think> blocks, a bare closing tag (opening tag was in the
+    prompt template) and an unterminated <think> (truncated before the answer).
+    """
+    if not text:
+        return "", text or ""
+
+    lowered = text.lower()
+    if THINK_OPEN not in lowered and THINK_CLOSE not in lowered:
+        return "", text
+
+    reasoning_parts = [m.strip() for m in THINK_BLOCK_RE.findall(text)]
+    content = THINK_BLOCK_RE.sub("", text)
+
+    lowered = content.lower()
+    if THINK_CLOSE in lowered:
+        # Everything before a stray closing tag is reasoning
+        idx = lowered.rindex(THINK_CLOSE)
+        reasoning_parts.insert(0, content[:idx].strip())
+        content = content[idx + len(THINK_CLOSE):]
+    elif THINK_OPEN in lowered:
+        # Never closed - the model ran out of tokens while still reasoning
+        idx = lowered.index(THINK_OPEN)
+        reasoning_parts.append(content[idx + len(THINK_OPEN):].strip())
+        content = content[:idx]
+
+    reasoning = "\n\n".join(p for p in reasoning_parts if p)
+    return reasoning, content.strip()
+
+
+def strip_reasoning(text: str) -> str:
+    """Final content only - for readers of chapters written before the split existed"""
+    return split_reasoning(text)[1]
+
+
+def count_tokens(text: str) -> int:
+    """Token count for a piece of text (LiteLLM default tokenizer, ~4 chars/token fallback)
+
+    The default tokenizer is used deliberately: model-specific HuggingFace
+    tokenizers would be downloaded on first use.
+    """
+    if not text:
+        return 0
+    if LITELLM_AVAILABLE:
+        try:
+            return litellm.token_counter(text=text)
+        except Exception:
+            pass
+    return max(1, len(text) // 4)
+
+
+def is_reasoning_file(path: Path) -> bool:
+    """True for <chapter>.reasoning.txt side files"""
+    return path.name.endswith(REASONING_SUFFIX)
+
+
+def save_reasoning(output_dir: Path, chapter_key: str, reasoning: str,
+                   write: Callable[[Path, str], None] = atomic_write_text) -> dict:
+    """Write <chapter>.reasoning.txt and return its stats for the metadata file
+
+    Args:
+        write: Writer for the trace (e.g. a WriteBatch's write_text to commit it
+            together with the chapter)
+    """
+    if not reasoning:
+        return {"reasoning_file": None, "reasoning_tokens": 0, "reasoning_words": 0}
+
+    reasoning_file = output_dir / f"{chapter_key}{REASONING_SUFFIX}"
+    write(reasoning_file, reasoning)
+    return {
+        "reasoning_file": str(reasoning_file),
+        "reasoning_tokens": count_tokens(reasoning),
+        "reasoning_words": len(reasoning.split())
+    }
@@ -0,0 +1,220 @@
+#!/usr/bin/env python3
+"""
+response_classifier.py
+
+Inline classification of chapter responses so bad generations fail fast.
+
+Flags refusals/apologies, empty or too-short output, truncation (finish_reason
+"length") and wrong-language output right after each call - or mid-stream when
+streaming - so the runner can retry or fall back immediately instead of letting the
+chapter flow into fact-checking and scoring.
+"""
+
+import re
+import time
+from typing import Callable, Dict, Optional
+
+from llm_client import EarlyAbort, get_last_call_stats, reset_call_stats
+from reasoning_traces import THINK_CLOSE, THINK_OPEN, split_reasoning
+
+MIN_WORDS = 500  # Same threshold analyze_generation_results applies after the run
+
+# Only the opening of a response is checked - a full chapter may legitimately
+# contain "cannot" or "sorry" further down
+REFUSAL_HEAD_CHARS = 600
+
+REFUSAL_PATTERNS = [
+    re.compile(p, re.IGNORECASE) for p in [
+        r"\bI(?:'m| am) (?:sorry|unable|not able)\b",
+        r"\bI can(?:'t|not) (?:help|assist|provide|write|generate|produce|comply|complete)\b",
+        r"\bI apologi[sz]e\b",
+        r"\bas an AI(?: language model)?\b",
+        r"\bI (?:won't|will not) be able to\b",
+        r"\bunable to (?:fulfil+|comply with|complete) (?:this|your) request\b",
+        r"\bI do not have (?:access|the ability)\b",
+    ]
+]
+
+ENGLISH_STOPWORDS = {
+    "the", "of", "and", "to", "in", "a", "is", "that", "for", "are", "on", "with",
+    "as", "by", "be", "this", "from", "at", "or", "an", "it", "which", "have", "has",
+    "not", "their", "these", "was", "were", "can", "will", "more", "than", "climate"
+}
+MIN_STOPWORD_RATIO = 0.08
+MAX_NON_LATIN_RATIO = 0.3
+
+# Labels where retrying the same model with the same budget is pointless
+NO_RETRY_LABELS = {"truncated"}
+
+
+def _non_latin_ratio(text: str) -> float:
+    """Share of letters outside the Latin script (CJK, Cyrillic, ...)"""
+    letters = [c for c in text if c.isalpha()]
+    if not letters:
+        return 0.0
+    non_latin = sum(1 for c in letters if ord(c) > 0x24F)
+    return non_latin / len(letters)
+
+
+def _stopword_ratio(words) -> float:
+    if not words:
+        return 0.0
+    return sum(1 for w in words if w.lower().strip(".,;:()") in ENGLISH_STOPWORDS) / len(words)
+
+
+def looks_like_refusal(text: str) -> bool:
+    """True if the opening of the response is a refusal or apology"""
+    head = text[:REFUSAL_HEAD_CHARS]
+    return any(p.search(head) for p in REFUSAL_PATTERNS)
+
+
+def looks_wrong_language(text: str) -> bool:
+    """True if the text is evidently not English"""
+    if _non_latin_ratio(text) > MAX_NON_LATIN_RATIO:
+        return True
+    words = text.split()
+    return len(words) >= 50 and _stopword_ratio(words) < MIN_STOPWORD_RATIO
+
+
+def classify_response(text: Optional[str], finish_reason: Optional[str] = None,
+                      min_words: int = MIN_WORDS) -> Dict:
+    """
+    Classify a chapter response
+
+    Returns:
+        Dict with "ok" (bool), "label" (ok | empty | refusal | wrong_language |
+        truncated | too_short), "reason", "word_count" and "usable" - a truncated
+        chapter that still clears min_words is kept (flagged) rather than discarded
+    """
+    text = text or ""
+    word_count = len(text.split())
+
+    def verdict(label: str, reason: str = "") -> Dict:
+        usable = label == "ok" or (label == "truncated" and word_count >= min_words)
+        return {"ok": label == "ok", "label": label, "reason": reason,
+                "word_count": word_count, "usable": usable}
+
+    if not text.strip():
+        return verdict("empty", "No content returned")
+    if looks_like_refusal(text):
+        return verdict("refusal", text[:120].replace("\n", " "))
+    if looks_wrong_language(text):
+        return verdict("wrong_language", f"non-Latin ratio {_non_latin_ratio(text):.2f}")
+    if finish_reason == "length":
+        return verdict("truncated", "Stopped at max_tokens")
+    if word_count < min_words:
+        return verdict("too_short", f"{word_count} < {min_words} words")
+    return verdict("ok")
+
+
+class StreamMonitor:
+    """Watch a streamed response and call it bad as soon as the opening shows it"""
+
+    def __init__(self, check_after_chars: int = 300):
+        self.check_after_chars = check_after_chars
+        self.text = ""
+        self.abort_label = None
+
+    def feed(self, delta: str) -> Optional[str]:
+        """Add a streamed chunk; returns a label once the response should be aborted"""
+        self.text += delta or ""
+        if self.abort_label:
+            return self.abort_label
+
+        # Judge the answer, not the reasoning trace in front of it
+        lowered = self.text.lower()
+        if THINK_CLOSE in lowered:
+            answer = self.text[lowered.rindex(THINK_CLOSE) + len(THINK_CLOSE):]
+        elif THINK_OPEN in lowered:
+            return None
+        else:
+            answer = self.text
+
+        if len(answer) < self.check_after_chars:
+            return None
+
+        if looks_like_refusal(answer):
+            self.abort_label = "refusal"
+        elif len(answer) <= REFUSAL_HEAD_CHARS * 2 and looks_wrong_language(answer):
+            self.abort_label = "wrong_language"
+        return self.abort_label
+
+
+def call_with_classification(call: Callable[[str], str], model_name: str,
+                             fallback_model: Optional[str] = None, max_attempts: int = 2,
+                             min_words: int = MIN_WORDS) -> Dict:
+    """
+    Call a model, classify the response, retry/fall back on a bad one
+
+    Args:
+        call: Function taking a model name and returning the response text
+        model_name: Primary model
+        fallback_model: Model to try once the primary's attempts are used up
+        max_attempts: Attempts on the primary model
+        min_words: Minimum words for a usable chapter
+
+    Returns:
+        Dict with text (final content only), reasoning (any <think> trace split off),
+        model used, final classification, attempt log and the total cold-start
+        seconds spent across attempts
+    """
+    plan = [model_name] * max_attempts
+    if fallback_model and fallback_model != model_name:
+        plan.append(fallback_model)
+
+    attempts = []
+    best = None
+    cold_start = 0.0
+
+    i = 0
+    while i < len(plan):
+        model = plan[i]
+        start_time = time.time()
+        # Stats are read from a side channel - never let a previous attempt's leak into this one
+        reset_call_stats()
+        try:
+            reasoning, text = split_reasoning(call(model))
+            stats = get_last_call_stats()
+            cold_start += stats.get("cold_start_seconds", 0.0)
+            classification = classify_response(text, stats.get("finish_reason"), min_words)
+        except EarlyAbort as e:
+            reasoning, text = split_reasoning(e.partial_text)
+            classification = {"ok": False, "label": e.label, "reason": "aborted mid-stream",
+                              "word_count": len(text.split()), "usable": False}
+
+        attempts.append({
+            "model": model,
+            "label": classification["label"],
+            "reason": classification["reason"],
+            "word_count": classification["word_count"],
+            "seconds": time.time() - start_time
+        })
+
+        candidate = {"text": text, "reasoning": reasoning, "model": model, "classification": classification}
+        if classification["ok"]:
+            best = candidate
+            break
+        if best is None or classification["word_count"] > best["classification"]["word_count"]:
+            best = candidate
+
+        print(f"       ⚠️  {classification['label']} from {model}: {classification['reason'][:80]}")
+
+        # A truncated chapter will truncate again on the same model - go to the fallback
+        if classification["label"] in NO_RETRY_LABELS and model == model_name:
+            i = max_attempts
+        else:
+            i += 1
+
+        if i < len(plan):
+            action = "falling back to" if plan[i] != model_name else "retrying"
+            print(f"       🔁 {action} {plan[i]}")
+
+    return {
+        "text": best["text"],
+        "reasoning": best["reasoning"],
+        "model": best["model"],
+        "classification": best["classification"],
+        "fallback_used": best["model"] != model_name,
+        "attempts": attempts,
+        "cold_start_seconds": cold_start
+    }
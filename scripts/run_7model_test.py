@@ -3,6 +3,10 @@
 run_7model_test.py
 
 Test all 7 models with 3 sample chapters through complete pipeline including PDF generation.
+
+Every finished chapter is journaled (run_journal.jsonl); rerunning with the same
+--output-dir resumes, skipping chapters already generated. Ctrl-C/SIGTERM cancels the
+in-flight work and writes partial summaries before exiting.
 """
 
 import argparse
@@ -10,6 +14,7 @@ import json
 import subprocess
 import sys
 import time
+from concurrent.futures import ThreadPoolExecutor
 from pathlib import Path
 from datetime import datetime
 from typing import Dict, List
@@ -18,15 +23,20 @@ from typing import Dict, List
 from load_env import load_parent_env
 load_parent_env()
 
-sys.path.insert(0, str(Path(__file__).parent / "nimble" / "codexes-factory" / "src"))
-
-try:
-    from nimble_llm_caller import llm_call_with_structured_output
-except ImportError:
-    import litellm
-    def llm_call_with_structured_output(messages, model, **kwargs):
-        response = litellm.completion(model=model, messages=messages, **kwargs)
-        return response.choices[0].message.content
+# Every call goes through llm_client: local routing, the capability cache, the HF wait and usage recording
+from llm_client import llm_call_with_structured_output, stream_text
+from reasoning_traces import save_reasoning
+from usage_accounting import get_usage_tracker, summarize_usage, usage_scope
+from response_classifier import StreamMonitor, call_with_classification
+from hf_warmup import HFWarmup, is_huggingface_model
+from local_backend import enable_local_backend, is_local_model, local_concurrency
+from eta_estimator import ETAEstimator, format_duration, load_history, print_accuracy
+from scheduler import MatrixScheduler, parse_deadline, parse_limits, print_makespan_report, provider_of
+from graceful_shutdown import ShutdownRequested, install_signal_handlers, shutdown_requested
+from run_journal import RunJournal
+from output_writer import RunLockedError, WriteBatch, atomic_write_json, atomic_write_text, claim_run
+
+from smoke_test import run_smoke_test, print_smoke_matrix, save_smoke_results
 
 # All 7 models (lite/flash tier)
 MODELS = {
@@ -46,8 +56,14 @@ DEFAULT_CHAPTERS = [
 ]
 
 
-def generate_chapter(chapter_key: str, prompt_data: Dict, model_name: str, output_dir: Path) -> Dict:
-    """Generate a single chapter"""
+def generate_chapter(chapter_key: str, prompt_data: Dict, model_name: str, output_dir: Path,
+                     fallback_model: str = None, stream: bool = False, timeout: float = None) -> Dict:
+    """Generate a single chapter
+
+    The response is classified as soon as it arrives (mid-stream with stream=True);
+    refusals, empty/short and wrong-language output are retried or sent to the
+    fallback model instead of being saved for fact-checking and scoring.
+    """
     print(f"    📝 {chapter_key[:40]}...")
 
     messages = prompt_data.get("messages", [])
@@ -56,40 +72,86 @@ def generate_chapter(chapter_key: str, prompt_data: Dict, model_name: str, outpu
     if not messages:
         return {"success": False, "error": "No messages"}
 
+    call_params = {
+        "temperature": params.get("temperature", 0.3),
+        "max_tokens": min(params.get("max_tokens", 12000), 16000)  # Limit for compatibility
+    }
+    if timeout:
+        # Deadline mode: give up on the request when the window closes
+        call_params["timeout"] = timeout
+
+    def call(model: str) -> str:
+        if stream:
+            return stream_text(model=model, messages=messages, monitor=StreamMonitor(), **call_params)
+        return llm_call_with_structured_output(messages=messages, model=model, **call_params)
+
     start_time = time.time()
     try:
-        response = llm_call_with_structured_output(
-            messages=messages,
-            model=model_name,
-            temperature=params.get("temperature", 0.3),
-            max_tokens=min(params.get("max_tokens", 12000), 16000)  # Limit for compatibility
-        )
-
-        duration = time.time() - start_time
-        word_count = len(response.split())
-
-        # Save
-        output_file = output_dir / f"{chapter_key}.txt"
-        output_file.write_text(response, encoding='utf-8')
+        with usage_scope(stage="generation", requested_model=model_name, chapter_key=chapter_key) as usage:
+            outcome = call_with_classification(call, model_name, fallback_model=fallback_model)
+        response = outcome["text"]
+        classification = outcome["classification"]
 
-        metadata_file = output_dir / f"{chapter_key}_metadata.json"
-        metadata = {
-            "chapter_key": chapter_key,
-            "model": model_name,
-            "generated_at": datetime.now().isoformat(),
-            "duration_seconds": duration,
-            "word_count": word_count,
-            "params": params
-        }
-        metadata_file.write_text(json.dumps(metadata, indent=2), encoding='utf-8')
+        cold_start = outcome["cold_start_seconds"]
+        duration = time.time() - start_time - cold_start
+        word_count = len(response.split())
 
-        print(f"       ✅ {word_count} words in {duration:.1f}s")
+        if not classification["usable"]:
+            # Keep the rejected text for inspection, out of the way of the .txt globs
+            rejected_file = output_dir / f"{chapter_key}.rejected.json"
+            atomic_write_json(rejected_file, {**outcome, "generated_at": datetime.now().isoformat()})
+            print(f"       ❌ REJECTED: {classification['label']} after {len(outcome['attempts'])} attempt(s)")
+            return {
+                "success": False,
+                "chapter_key": chapter_key,
+                "error": f"rejected: {classification['label']}",
+                "response_label": classification["label"],
+                "attempts": outcome["attempts"],
+                "cold_start_seconds": cold_start,
+                "usage": usage.usage
+            }
+
+        # Chapter, reasoning trace and metadata become visible to readers together
+        with WriteBatch() as batch:
+            output_file = output_dir / f"{chapter_key}.txt"
+            batch.write_text(output_file, response)
+
+            # Reasoning traces (<think>...</think>) are kept out of the chapter text
+            reasoning_stats = save_reasoning(output_dir, chapter_key, outcome["reasoning"],
+                                             write=batch.write_text)
+
+            metadata_file = output_dir / f"{chapter_key}_metadata.json"
+            metadata = {
+                "chapter_key": chapter_key,
+                "model": outcome["model"],
+                "requested_model": model_name,
+                "fallback_used": outcome["fallback_used"],
+                "response_label": classification["label"],
+                "attempts": outcome["attempts"],
+                "generated_at": datetime.now().isoformat(),
+                "duration_seconds": duration,
+                "cold_start_seconds": cold_start,
+                "word_count": word_count,
+                **reasoning_stats,
+                "usage": usage.usage,
+                "params": params
+            }
+            batch.write_json(metadata_file, metadata)
+
+        flag = "" if classification["ok"] else f" ({classification['label']})"
+        print(f"       ✅ {word_count} words in {duration:.1f}s{flag}")
 
         return {
             "success": True,
             "chapter_key": chapter_key,
             "word_count": word_count,
             "duration": duration,
+            "cold_start_seconds": cold_start,
+            "response_label": classification["label"],
+            "reasoning_tokens": reasoning_stats["reasoning_tokens"],
+            "usage": usage.usage,
+            "retries": len(outcome["attempts"]) - 1,
+            "fallback_used": outcome["fallback_used"],
             "output_file": str(output_file)
         }
 
@@ -103,8 +165,19 @@ def generate_chapter(chapter_key: str, prompt_data: Dict, model_name: str, outpu
 
 
 def generate_model(model_id: str, model_name: str, prompts_data: Dict,
-                  output_dir: Path, chapters: List[str]) -> Dict:
-    """Generate chapters for one model"""
+                  output_dir: Path, chapters: List[str], warmup: Dict = None,
+                  fallback_model: str = None, stream: bool = False, eta: ETAEstimator = None,
+                  journal: RunJournal = None, prompts_file: str = None) -> Dict:
+    """Generate chapters for one model
+
+    Args:
+        warmup: HFWarmup result for HuggingFace-hosted models (cold start reported separately)
+        fallback_model: Model used when this model's responses keep failing classification
+        stream: Stream responses so refusals are caught mid-stream
+        eta: Run-wide ETA estimator, updated and printed as each chapter completes
+        journal: Run journal - chapters it has as done are reused, new results are appended
+        prompts_file: Prompts file the chapters were generated from (recorded in the summary)
+    """
 
     print(f"\n{'='*80}")
     print(f"MODEL: {model_id} ({model_name})")
@@ -114,41 +187,165 @@ def generate_model(model_id: str, model_name: str, prompts_data: Dict,
     model_output_dir.mkdir(parents=True, exist_ok=True)
 
     results = []
+    resumed = {}
+    available = []
     for chapter_key in chapters:
         if chapter_key not in prompts_data:
             print(f"    ⚠️  Skipping {chapter_key} - not in prompts")
             continue
-
-        result = generate_chapter(chapter_key, prompts_data[chapter_key], model_name, model_output_dir)
-        results.append(result)
-        time.sleep(1)  # Rate limiting
-
-    # Summary
+        done = journal.completed(model_id, model_name, chapter_key) if journal else None
+        if done:
+            print(f"    ↩️  {chapter_key[:40]} - already generated")
+            resumed[chapter_key] = done
+            continue
+        available.append(chapter_key)
+
+    def run_chapter(chapter_key: str) -> Dict:
+        if shutdown_requested():
+            return {"success": False, "skipped": True, "chapter_key": chapter_key, "error": "skipped: shutdown"}
+        result = generate_chapter(chapter_key, prompts_data[chapter_key], model_name, model_output_dir,
+                                  fallback_model=fallback_model, stream=stream)
+        if journal:
+            journal.record(model_id, model_name, chapter_key, result)
+        if eta:
+            eta.complete(model_name, chapter_key, result.get("duration"))
+            print(eta.status_line(model_name))
+        return result
+
+    if is_local_model(model_name):
+        # Local server batches concurrent requests continuously - submit every
+        # chapter at once, no quota to pace against
+        print(f"    🖥️  Local backend: {len(available)} chapters, {local_concurrency()} concurrent")
+        with ThreadPoolExecutor(max_workers=local_concurrency()) as executor:
+            results = list(executor.map(run_chapter, available))
+    else:
+        for chapter_key in available:
+            results.append(run_chapter(chapter_key))
+            time.sleep(1)  # Rate limiting
+
+    new_results = dict(zip(available, results))
+    results = [resumed.get(c) or new_results[c] for c in chapters if c in resumed or c in new_results]
+    return summarize_model(model_id, model_name, results, model_output_dir, warmup, prompts_file)
+
+
+def summarize_model(model_id: str, model_name: str, results: List[Dict], model_output_dir: Path,
+                    warmup: Dict = None, prompts_file: str = None) -> Dict:
+    """
+    Build and save generation_summary.json for one model's chapter results
+
+    The prompts file is recorded so evaluators can apply its citation_requirements.
+    """
     successful = [r for r in results if r.get("success")]
     failed = [r for r in results if not r.get("success")]
     total_words = sum(r.get("word_count", 0) for r in successful)
     total_time = sum(r.get("duration", 0) for r in successful)
+    cold_start_time = sum(r.get("cold_start_seconds", 0) for r in results)
+    if warmup:
+        cold_start_time += warmup["cold_start_seconds"]
 
     summary = {
         "model_id": model_id,
         "model_name": model_name,
+        "backend": "local" if is_local_model(model_name) else "api",
+        "prompts_file": prompts_file,
         "total_chapters": len(results),
         "successful": len(successful),
         "failed": len(failed),
+        "skipped": sum(1 for r in failed if r.get("skipped")),
+        "resumed": sum(1 for r in successful if r.get("resumed")),
+        "rejected_responses": sum(1 for r in failed if r.get("response_label")),
+        "retried_chapters": sum(1 for r in successful if r.get("retries")),
+        "fallback_chapters": sum(1 for r in successful if r.get("fallback_used")),
         "total_words": total_words,
         "total_time": total_time,
+        "cold_start_time": cold_start_time,
+        "warmup": warmup,
         "avg_words": total_words / len(successful) if successful else 0,
+        "usage": summarize_usage(results, total_words),
         "results": results
     }
 
     summary_file = model_output_dir / "generation_summary.json"
-    summary_file.write_text(json.dumps(summary, indent=2), encoding='utf-8')
+    atomic_write_json(summary_file, summary)
 
-    print(f"  ✅ {len(successful)}/{len(results)} successful, {total_words:,} words")
+    print(f"  ✅ {model_id}: {len(successful)}/{len(results)} successful, {total_words:,} words")
 
     return summary
 
 
+def generate_matrix_lpt(prompts_data: Dict, output_dir: Path, chapters: List[str], warmup: HFWarmup,
+                        provider_limits: Dict[str, int], fallback_model: str = None,
+                        stream: bool = False, eta: ETAEstimator = None, deadline_seconds: float = None,
+                        journal: RunJournal = None, prompts_file: str = None):
+    """Generate the whole models × chapters matrix, longest predicted chapter first per provider
+
+    Providers run concurrently, each within its own concurrency limit; local-backend
+    models share one "local" provider sized to the local server's concurrency.
+    With deadline_seconds, only the cells predicted to finish in time are run
+    (complete chapter columns first) and the rest are reported as skipped.
+    Cells the journal already has as done are reused rather than scheduled.
+
+    Returns:
+        (summaries by model_id, makespan report comparing against the naive order)
+    """
+    tasks = []
+    resumed = {}
+    for model_id, model_name in MODELS.items():
+        (output_dir / model_id).mkdir(parents=True, exist_ok=True)
+        for chapter_key in chapters:
+            if chapter_key not in prompts_data:
+                continue
+            done = journal.completed(model_id, model_name, chapter_key) if journal else None
+            if done:
+                resumed[(model_id, chapter_key)] = done
+            else:
+                tasks.append({"model_id": model_id, "model_name": model_name, "chapter_key": chapter_key})
+    if resumed:
+        print(f"  ↩️  {len(resumed)} cells already generated - resuming with {len(tasks)}")
+
+    limits = dict(provider_limits)
+    limits.setdefault("local", local_concurrency())
+    scheduler = MatrixScheduler(
+        provider_limits=limits,
+        predict=eta.predict if eta else None,
+        provider_for=lambda name: "local" if is_local_model(name) else provider_of(name),
+        on_skip=(lambda task: eta.complete(task["model_name"], task["chapter_key"], None)) if eta else None
+    )
+
+    def run_task(task: Dict) -> Dict:
+        model_name = task["model_name"]
+        print(f"  ▶️  {task['model_id']}")
+        result = generate_chapter(task["chapter_key"], prompts_data[task["chapter_key"]], model_name,
+                                  output_dir / task["model_id"], fallback_model=fallback_model, stream=stream,
+                                  timeout=task.get("timeout"))
+        if journal:
+            journal.record(task["model_id"], model_name, task["chapter_key"], result)
+        if eta:
+            eta.complete(model_name, task["chapter_key"], result.get("duration"))
+            print(eta.status_line(model_name))
+        return result
+
+    # HuggingFace endpoints still warming up hold only their own provider's slots
+    def run_after_warmup(task: Dict) -> Dict:
+        waited_from = time.time()
+        warmup.wait(task["model_name"])
+        if task.get("timeout"):
+            task = {**task, "timeout": max(1.0, task["timeout"] - (time.time() - waited_from))}
+        return run_task(task)
+
+    results = scheduler.run(tasks, run_after_warmup, deadline_seconds=deadline_seconds)
+
+    new_results = {(t["model_id"], t["chapter_key"]): r for t, r in zip(tasks, results)}
+    summaries_by_model = {}
+    for model_id, model_name in MODELS.items():
+        model_results = [resumed.get((model_id, c)) or new_results[(model_id, c)] for c in chapters
+                         if (model_id, c) in resumed or (model_id, c) in new_results]
+        summaries_by_model[model_id] = summarize_model(model_id, model_name, model_results,
+                                                       output_dir / model_id, warmup.wait(model_name), prompts_file)
+
+    return summaries_by_model, scheduler.makespan_report()
+
+
 def compile_markdown_book(model_id: str, model_dir: Path, chapters: List[str]) -> str:
     """Compile chapters into markdown book"""
 
@@ -170,7 +367,7 @@ def compile_markdown_book(model_id: str, model_dir: Path, chapters: List[str]) -
         book_md += "\n\n---\n\n"
 
     book_file = model_dir / f"AR7_7MODEL_TEST_{model_id.upper()}.md"
-    book_file.write_text(book_md, encoding='utf-8')
+    atomic_write_text(book_file, book_md)
 
     return str(book_file)
 
@@ -206,11 +403,54 @@ def generate_pdf(markdown_file: Path, pdf_dir: Path) -> bool:
         return False
 
 
+def flush_interrupted(output_dir: Path, chapters: List[str], journal: RunJournal, eta: ETAEstimator,
+                      prompts_file: str = None) -> int:
+    """Write per-model and master summaries of the journaled work after Ctrl-C/SIGTERM"""
+    summaries = [summarize_model(model_id, model_name, journal.results(model_id, chapters), output_dir / model_id,
+                                 prompts_file=prompts_file)
+                 for model_id, model_name in MODELS.items()]
+    master_summary = {
+        "generated_at": datetime.now().isoformat(),
+        "test_type": "7_model_3_chapter_complete_pipeline",
+        "interrupted": True,
+        "chapters": chapters,
+        "models": summaries,
+        "journal": journal.counts(),
+        "total_words": sum(s["total_words"] for s in summaries),
+        "total_cost": sum(s["usage"]["cost"] for s in summaries),
+        "eta_accuracy": eta.accuracy_report()
+    }
+    atomic_write_json(output_dir / "7MODEL_TEST_SUMMARY.json", master_summary)
+    get_usage_tracker().save(output_dir / "usage_log.json")
+
+    counts = journal.counts()
+    print(f"\n⏸️  Interrupted: {counts['successful']} chapters done, partial summary in {output_dir}/")
+    print(f"   Rerun the same command to resume")
+    return 130
+
+
 def main():
     parser = argparse.ArgumentParser(description="7-Model AR7 Test")
     parser.add_argument("--chapters", default="summary_for_policymakers,chapter_2_vulnerabilities_impacts_risks,chapter_7_africa")
     parser.add_argument("--output-dir", default="output/ar7_7model_test")
     parser.add_argument("--prompts-file", default="prompts/ar7_model_comparison_prompts.json")
+    parser.add_argument("--smoke", action="store_true",
+                       help="Only validate every model/chapter path with a few tokens each")
+    parser.add_argument("--fallback-model",
+                       help="Model to use when a response is refused/empty/short after retries")
+    parser.add_argument("--stream", action="store_true",
+                       help="Stream responses so refusals and wrong-language output abort early")
+    parser.add_argument("--local-backend", action="store_true",
+                       help="Serve the open-weight 7B models from the local server in config/local_backend.json")
+    parser.add_argument("--scheduler", choices=["sequential", "lpt"], default="sequential",
+                       help="sequential: one model at a time; lpt: all providers at once, longest chapters first")
+    parser.add_argument("--provider-concurrency", nargs="*",
+                       help="Concurrent requests per provider for --scheduler lpt, e.g. gemini=4 openai=2")
+    parser.add_argument("--deadline",
+                       help="Finish by this time (2h, 90m or 14:30): run only the cells predicted to fit, "
+                            "complete chapters across models first (implies --scheduler lpt)")
+    parser.add_argument("--no-resume", action="store_true",
+                       help="Regenerate every chapter instead of resuming from the run journal")
 
     args = parser.parse_args()
 
@@ -222,6 +462,15 @@ def main():
     output_dir = Path(args.output_dir)
     output_dir.mkdir(parents=True, exist_ok=True)
 
+    if args.local_backend:
+        enable_local_backend()
+
+    if args.smoke:
+        smoke_results = run_smoke_test(MODELS, prompts_data, chapters)
+        print_smoke_matrix(smoke_results)
+        save_smoke_results(smoke_results, output_dir / "smoke_test_results.json")
+        return 0 if smoke_results["failed"] == 0 else 1
+
     print(f"\n{'='*80}")
     print(f"AR7 7-MODEL COMPREHENSIVE TEST")
     print(f"{'='*80}")
@@ -231,11 +480,64 @@ def main():
     print(f"Chapters: {', '.join(chapters)}")
     print(f"{'='*80}\n")
 
+    deadline_at = time.time() + parse_deadline(args.deadline) if args.deadline else None
+
+    install_signal_handlers()
+    try:
+        # One generation run per output directory; evaluators claim their own stages
+        claim_run(output_dir, "generation")
+    except RunLockedError as e:
+        print(f"❌ {e}")
+        return 1
+    journal = RunJournal(output_dir, resume=not args.no_resume)
+    pending = [(model_id, name, c) for model_id, name in MODELS.items() for c in chapters
+               if c in prompts_data and not journal.completed(model_id, name, c)]
+
     # PHASE 1: Generate all models
-    all_summaries = []
-    for model_id, model_name in MODELS.items():
-        summary = generate_model(model_id, model_name, prompts_data, output_dir, chapters)
-        all_summaries.append(summary)
+    # HuggingFace serverless endpoints warm up in the background while the other
+    # models generate; their requests are only scheduled once warmup completes
+    warmup = HFWarmup([name for name in MODELS.values() if not is_local_model(name)])
+    warmup.start()
+
+    # ETA seeded from the durations of earlier runs, refined as chapters complete
+    eta = ETAEstimator(load_history())
+    eta.plan([(name, c) for _, name, c in pending])
+    for name in MODELS.values():
+        if is_local_model(name):
+            eta.set_concurrency(name, local_concurrency())
+    concurrent = args.scheduler == "lpt" or args.deadline
+    if concurrent:
+        # Providers run side by side - the run takes as long as the busiest provider
+        provider_limits = {p: int(v) for p, v in parse_limits(args.provider_concurrency).items()}
+        eta.set_provider_slots({"local": local_concurrency(), **provider_limits},
+                               provider_for=lambda name: "local" if is_local_model(name) else provider_of(name))
+    print(f"⏳ Estimated generation time: {format_duration(eta.remaining())}\n")
+
+    makespan_report = None
+    try:
+        if concurrent:
+            summaries_by_model, makespan_report = generate_matrix_lpt(
+                prompts_data, output_dir, chapters, warmup, provider_limits,
+                fallback_model=args.fallback_model, stream=args.stream, eta=eta,
+                deadline_seconds=deadline_at - time.time() if deadline_at else None, journal=journal,
+                prompts_file=args.prompts_file
+            )
+            print_makespan_report(makespan_report)
+        else:
+            summaries_by_model = {}
+            generation_order = sorted(MODELS.items(), key=lambda item: is_huggingface_model(item[1]))
+            for model_id, model_name in generation_order:
+                warmup_result = warmup.wait(model_name)
+                summaries_by_model[model_id] = generate_model(
+                    model_id, model_name, prompts_data, output_dir, chapters, warmup=warmup_result,
+                    fallback_model=args.fallback_model, stream=args.stream, eta=eta, journal=journal,
+                    prompts_file=args.prompts_file
+                )
+    except ShutdownRequested:
+        return flush_interrupted(output_dir, chapters, journal, eta, args.prompts_file)
+    eta_accuracy = eta.accuracy_report()
+    print_accuracy(eta_accuracy)
+    all_summaries = [summaries_by_model[model_id] for model_id in MODELS]
 
     # PHASE 2: Compile markdown books
     print(f"\n{'='*80}")
@@ -269,7 +571,9 @@ def main():
 
     for summary in all_summaries:
         status = "✅" if summary["failed"] == 0 else "⚠️"
-        print(f"{status} {summary['model_id']:<25} {summary['successful']}/{summary['total_chapters']} chapters, {summary['total_words']:,} words")
+        print(f"{status} {summary['model_id']:<25} {summary['successful']}/{summary['total_chapters']} chapters, {summary['total_words']:,} words, ${summary['usage']['cost']:.4f}")
+        if summary["cold_start_time"] > 0:
+            print(f"   {'':<25} cold start {summary['cold_start_time']:.1f}s (excluded from generation time)")
 
     # Save master summary
     master_summary = {
@@ -279,11 +583,21 @@ def main():
         "models": all_summaries,
         "total_models": len(all_summaries),
         "total_chapters": sum(s["total_chapters"] for s in all_summaries),
-        "total_words": sum(s["total_words"] for s in all_summaries)
+        "total_words": sum(s["total_words"] for s in all_summaries),
+        "total_input_tokens": sum(s["usage"]["input_tokens"] for s in all_summaries),
+        "total_output_tokens": sum(s["usage"]["output_tokens"] for s in all_summaries),
+        "total_cost": sum(s["usage"]["cost"] for s in all_summaries),
+        "total_cold_start_time": sum(s["cold_start_time"] for s in all_summaries),
+        "eta_accuracy": eta_accuracy,
+        "scheduler": "lpt" if args.deadline else args.scheduler,
+        "deadline": args.deadline,
+        "makespan": makespan_report
     }
 
     master_file = output_dir / "7MODEL_TEST_SUMMARY.json"
-    master_file.write_text(json.dumps(master_summary, indent=2), encoding='utf-8')
+    atomic_write_json(master_file, master_summary)
+
+    get_usage_tracker().save(output_dir / "usage_log.json")
 
     print(f"\n📊 Summary: {master_file}")
     print(f"📁 PDFs: {pdf_dir}/")
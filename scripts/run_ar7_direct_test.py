@@ -4,6 +4,9 @@ run_ar7_direct_test.py
 
 Direct end-to-end test that generates AR7 chapters for all models
 without relying on external pipeline scripts.
+
+Finished chapters are journaled (run_journal.jsonl) so a rerun with the same
+--output-dir resumes; Ctrl-C/SIGTERM writes a partial master summary before exiting.
 """
 
 import argparse
@@ -14,17 +17,15 @@ from pathlib import Path
 from datetime import datetime
 from typing import Dict, List
 
-# Add nimble/codexes-factory/src to path
-sys.path.insert(0, str(Path(__file__).parent / "nimble" / "codexes-factory" / "src"))
+# Every call goes through llm_client: the capability cache, the HF wait and usage recording
+from llm_client import llm_call_with_structured_output
 
-try:
-    from nimble_llm_caller import llm_call_with_structured_output
-except ImportError:
-    print("ERROR: nimble-llm-caller not available. Using basic litellm...")
-    import litellm
-    def llm_call_with_structured_output(messages, model, **kwargs):
-        response = litellm.completion(model=model, messages=messages, **kwargs)
-        return response.choices[0].message.content
+from reasoning_traces import save_reasoning
+from usage_accounting import get_usage_tracker, summarize_usage, usage_scope
+from response_classifier import call_with_classification
+from graceful_shutdown import ShutdownRequested, install_signal_handlers
+from run_journal import RunJournal
+from output_writer import RunLockedError, WriteBatch, atomic_write_json, atomic_write_text, claim_run
 
 # Model configurations
 MODELS = {
@@ -33,7 +34,8 @@ MODELS = {
     "openai_mini": "openai/gpt-5-mini",
 }
 
-def generate_chapter(chapter_key: str, prompt_data: Dict, model_name: str, output_dir: Path) -> Dict:
+def generate_chapter(chapter_key: str, prompt_data: Dict, model_name: str, output_dir: Path,
+                     fallback_model: str = None) -> Dict:
     """Generate a single chapter using specified model"""
 
     print(f"  📝 Generating: {chapter_key}")
@@ -51,31 +53,62 @@ def generate_chapter(chapter_key: str, prompt_data: Dict, model_name: str, outpu
     # Generate
     start_time = time.time()
     try:
-        response = llm_call_with_structured_output(
-            messages=messages,
-            model=model_name,
-            temperature=params.get("temperature", 0.3),
-            max_tokens=params.get("max_tokens", 12000)
-        )
+        with usage_scope(stage="generation", requested_model=model_name, chapter_key=chapter_key) as usage:
+            outcome = call_with_classification(
+                lambda model: llm_call_with_structured_output(
+                    messages=messages,
+                    model=model,
+                    temperature=params.get("temperature", 0.3),
+                    max_tokens=params.get("max_tokens", 12000)
+                ),
+                model_name,
+                fallback_model=fallback_model
+            )
+        response = outcome["text"]
+        classification = outcome["classification"]
+
+        cold_start = outcome["cold_start_seconds"]
+        duration = time.time() - start_time - cold_start
+
+        if not classification["usable"]:
+            print(f"    ❌ REJECTED: {classification['label']} after {len(outcome['attempts'])} attempt(s)")
+            return {
+                "success": False,
+                "chapter_key": chapter_key,
+                "error": f"rejected: {classification['label']}",
+                "response_label": classification["label"],
+                "attempts": outcome["attempts"],
+                "usage": usage.usage
+            }
 
-        duration = time.time() - start_time
         word_count = len(response.split())
 
-        # Save response
-        output_file = output_dir / f"{chapter_key}.txt"
-        output_file.write_text(response, encoding='utf-8')
-
-        # Save metadata
-        metadata_file = output_dir / f"{chapter_key}_metadata.json"
-        metadata = {
-            "chapter_key": chapter_key,
-            "model": model_name,
-            "generated_at": datetime.now().isoformat(),
-            "duration_seconds": duration,
-            "word_count": word_count,
-            "params": params
-        }
-        metadata_file.write_text(json.dumps(metadata, indent=2), encoding='utf-8')
+        # Chapter, reasoning trace and metadata become visible to readers together
+        with WriteBatch() as batch:
+            output_file = output_dir / f"{chapter_key}.txt"
+            batch.write_text(output_file, response)
+
+            # Reasoning traces (<think>...</think>) are kept out of the chapter text
+            reasoning_stats = save_reasoning(output_dir, chapter_key, outcome["reasoning"],
+                                             write=batch.write_text)
+
+            # Save metadata
+            metadata_file = output_dir / f"{chapter_key}_metadata.json"
+            metadata = {
+                "chapter_key": chapter_key,
+                "model": outcome["model"],
+                "fallback_used": outcome["fallback_used"],
+                "response_label": classification["label"],
+                "attempts": outcome["attempts"],
+                "generated_at": datetime.now().isoformat(),
+                "duration_seconds": duration,
+                "cold_start_seconds": cold_start,
+                "word_count": word_count,
+                **reasoning_stats,
+                "usage": usage.usage,
+                "params": params
+            }
+            batch.write_json(metadata_file, metadata)
 
         print(f"    ✅ {word_count} words in {duration:.1f}s")
 
@@ -84,6 +117,10 @@ def generate_chapter(chapter_key: str, prompt_data: Dict, model_name: str, outpu
             "chapter_key": chapter_key,
             "word_count": word_count,
             "duration": duration,
+            "cold_start_seconds": cold_start,
+            "response_label": classification["label"],
+            "reasoning_tokens": reasoning_stats["reasoning_tokens"],
+            "usage": usage.usage,
             "output_file": str(output_file)
         }
 
@@ -97,8 +134,9 @@ def generate_chapter(chapter_key: str, prompt_data: Dict, model_name: str, outpu
 
 
 def generate_all_chapters(model_id: str, model_name: str, prompts_data: Dict,
-                         output_dir: Path, chapters: List[str] = None) -> Dict:
-    """Generate all chapters for a single model"""
+                         output_dir: Path, chapters: List[str] = None,
+                         fallback_model: str = None, journal: RunJournal = None) -> Dict:
+    """Generate all chapters for a single model (reusing chapters the journal has as done)"""
 
     print(f"\n{'='*80}")
     print(f"MODEL: {model_id} ({model_name})")
@@ -121,13 +159,22 @@ def generate_all_chapters(model_id: str, model_name: str, prompts_data: Dict,
             print(f"  ⚠️  Skipping {chapter_key} - not in prompts file")
             continue
 
+        done = journal.completed(model_id, model_name, chapter_key) if journal else None
+        if done:
+            print(f"  ↩️  {chapter_key} - already generated")
+            results.append(done)
+            continue
+
         result = generate_chapter(
             chapter_key=chapter_key,
             prompt_data=prompts_data[chapter_key],
             model_name=model_name,
-            output_dir=model_output_dir
+            output_dir=model_output_dir,
+            fallback_model=fallback_model
         )
         results.append(result)
+        if journal:
+            journal.record(model_id, model_name, chapter_key, result)
 
         # Brief pause to avoid rate limits
         time.sleep(1)
@@ -147,12 +194,13 @@ def generate_all_chapters(model_id: str, model_name: str, prompts_data: Dict,
         "total_words": total_words,
         "total_time": total_time,
         "avg_words": total_words / len(successful) if successful else 0,
+        "usage": summarize_usage(results, total_words),
         "results": results
     }
 
     # Save summary
     summary_file = model_output_dir / "generation_summary.json"
-    summary_file.write_text(json.dumps(summary, indent=2), encoding='utf-8')
+    atomic_write_json(summary_file, summary)
 
     print(f"\n{'='*80}")
     print(f"SUMMARY: {model_id}")
@@ -197,7 +245,7 @@ def compile_markdown_book(model_id: str, model_dir: Path, prompts_data: Dict) ->
 
     # Save compiled book
     book_file = model_dir / f"AR7_COMPLETE_BOOK_{model_id.upper()}.md"
-    book_file.write_text(book_md, encoding='utf-8')
+    atomic_write_text(book_file, book_md)
 
     print(f"  ✅ Saved: {book_file}")
     return str(book_file)
@@ -211,6 +259,10 @@ def main():
     parser.add_argument("--prompts-file", default="prompts/ar7_model_comparison_prompts.json")
     parser.add_argument("--compile-books", action="store_true",
                        help="Compile markdown books after generation")
+    parser.add_argument("--fallback-model",
+                       help="Model to use when a response is refused/empty/short after retries")
+    parser.add_argument("--no-resume", action="store_true",
+                       help="Regenerate every chapter instead of resuming from the run journal")
 
     args = parser.parse_args()
 
@@ -246,17 +298,39 @@ def main():
     print(f"Output: {output_dir}")
     print(f"{'='*80}\n")
 
+    install_signal_handlers()
+    try:
+        # One generation run per output directory; evaluators claim their own stages
+        claim_run(output_dir, "generation")
+    except RunLockedError as e:
+        print(f"❌ {e}")
+        return 1
+    journal = RunJournal(output_dir, resume=not args.no_resume)
+
     # Generate for all models
     all_summaries = []
-    for model_id, model_name in models_to_run.items():
-        summary = generate_all_chapters(
-            model_id=model_id,
-            model_name=model_name,
-            prompts_data=prompts_data,
-            output_dir=output_dir,
-            chapters=chapters
-        )
-        all_summaries.append(summary)
+    try:
+        for model_id, model_name in models_to_run.items():
+            summary = generate_all_chapters(
+                model_id=model_id,
+                model_name=model_name,
+                prompts_data=prompts_data,
+                output_dir=output_dir,
+                chapters=chapters,
+                fallback_model=args.fallback_model,
+                journal=journal
+            )
+            all_summaries.append(summary)
+    except ShutdownRequested:
+        atomic_write_json(output_dir / "MASTER_SUMMARY.json", {
+            "generated_at": datetime.now().isoformat(),
+            "interrupted": True,
+            "models": all_summaries,
+            "journal": journal.counts()
+        })
+        get_usage_tracker().save(output_dir / "usage_log.json")
+        print(f"\n⏸️  Interrupted: {journal.counts()['successful']} chapters done - rerun the same command to resume")
+        return 130
 
     # Compile markdown books if requested
     if args.compile_books:
@@ -284,11 +358,16 @@ def main():
         "models": all_summaries,
         "total_models": len(all_summaries),
         "total_chapters": sum(s["total_chapters"] for s in all_summaries),
-        "total_words": sum(s["total_words"] for s in all_summaries)
+        "total_words": sum(s["total_words"] for s in all_summaries),
+        "total_input_tokens": sum(s["usage"]["input_tokens"] for s in all_summaries),
+        "total_output_tokens": sum(s["usage"]["output_tokens"] for s in all_summaries),
+        "total_cost": sum(s["usage"]["cost"] for s in all_summaries)
     }
 
     master_file = output_dir / "MASTER_SUMMARY.json"
-    master_file.write_text(json.dumps(master_summary, indent=2), encoding='utf-8')
+    atomic_write_json(master_file, master_summary)
+
+    get_usage_tracker().save(output_dir / "usage_log.json")
 
     print(f"\n📊 Master summary: {master_file}")
     print(f"{'='*80}\n")
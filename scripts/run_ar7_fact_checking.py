@@ -19,24 +19,74 @@ Usage:
     uv run python run_ar7_fact_checking.py \
         --model-outputs output/ar7_model_comparison \
         --model-id google_gemini3
+
+    # Verify each unique claim once across all models (see claim_dedup.py)
+    uv run python run_ar7_fact_checking.py \
+        --model-outputs output/ar7_model_comparison \
+        --claim-mode
+
+    # Check 8 chapters at a time, at most 30 requests/minute to Gemini
+    uv run python run_ar7_fact_checking.py \
+        --model-outputs output/ar7_model_comparison \
+        --workers 8 --rpm gemini=30
+
+Chapters longer than --window-words are checked in overlapping windows split on
+section boundaries, concurrently; issues repeated in the overlaps are merged and
+errors_found / error_rate are computed over the whole chapter.
+
+With --workers N, N chapters are checked at once; every evaluator request takes a
+slot from a per-provider rate limiter (see provider_rate_limit.py) and each
+*_factcheck.json is written as soon as its chapter completes. The limiter (with
+its default per-provider limits) is only active with --workers > 1 or --rpm.
+
+Results record each paragraph by content hash. Re-running over a revised chapter
+only re-checks its changed and new paragraphs (with their neighbours as context)
+and keeps the prior issues of the rest - see paragraph_cache.py; --full-recheck
+checks everything again.
+
+With --secondary-checkers, critical/major issues (and every issue of a chapter the
+primary rated low confidence) are put to the secondary checkers in turn until
+agreement settles them; disputed issues are kept but not counted in errors_found
+(see fact_check_ensemble.py).
 """
 
 import argparse
-import json
 import sys
+import time
+from concurrent.futures import ThreadPoolExecutor, as_completed
 from pathlib import Path
 from datetime import datetime
-from typing import Dict, List, Optional
+from typing import Dict, List, Optional, Tuple
 import os
 from dotenv import load_dotenv
 
+from reasoning_traces import is_reasoning_file, strip_reasoning
+from usage_accounting import get_usage_tracker, usage_scope
+from claim_dedup import (DEFAULT_CLAIM_BATCH_SIZE, apportion_usage, claim_batches, claim_stats, cluster_claims,
+                         cluster_spellings, collect_verdicts, extract_claims, format_claims, project_verdicts)
+from calibrated_language import analyze_calibrated_language, calibrated_note
+from citation_checker import check_chapter_citations, citation_note, requirements_for_model
+from claim_verdict_store import DEFAULT_TTL_DAYS, DEFAULT_VERDICT_STORE, ClaimVerdictStore, prompt_version
+from fact_check_ensemble import (DEFAULT_AGREEMENT_THRESHOLD, format_issues, run_ensemble,
+                                 summarize_agreement)
+from fact_check_chunking import (DEFAULT_OVERLAP_WORDS, DEFAULT_WINDOW_WORDS, DEFAULT_WINDOW_WORKERS,
+                                 check_windows, error_rate, lowest_confidence, make_windows, merge_issues,
+                                 window_note, window_summary)
+from eta_estimator import format_duration
+from json_repair import (DEFAULT_FIXER_MODEL, JSONRepairError, format_parse_stats, get_parse_stats,
+                         parse_evaluator_json)
+from output_writer import RunLockedError, atomic_write_json, claim_run
+from paragraph_cache import (attribute_issue, chapter_paragraphs, load_prior_check, make_recheck_windows,
+                             paragraph_records, quotes_context, recheck_note, reused_issues,
+                             reverification_stats)
+from provider_rate_limit import ProviderRateLimiter
+from scheduler import parse_limits
+
 # Load environment variables
 load_dotenv()
 
-try:
-    from codexes.core.llm_caller import call_model_with_prompt
-except ModuleNotFoundError:
-    from src.codexes.core.llm_caller import call_model_with_prompt
+# Every evaluator call goes through llm_client: the capability cache, the HF wait and usage recording
+from llm_client import call_model_with_prompt
 
 
 FACT_CHECKER_PROMPT = """You are a climate science fact-checker verifying AI-generated content against published literature.
@@ -56,33 +106,113 @@ For each issue found, provide:
 - **Issue**: Explain what's wrong
 - **Correction**: What the correct information should be (if known)
 
-If the chapter is accurate, respond with: "No significant errors found."
+If there are no errors, return {{"issues": [], "overall_assessment": "No significant errors found.", "confidence": "high | medium | low"}} - always answer in JSON.
 
 Output format (JSON):
-{
+{{
   "errors_found": <number>,
   "error_rate": <errors per 1000 words>,
   "issues": [
-    {
+    {{
       "type": "factual_error",
       "severity": "major",
       "location": "quote from text",
       "issue": "explanation",
       "correction": "correct information"
-    }
+    }}
   ],
   "overall_assessment": "brief summary",
   "confidence": "high | medium | low"
-}
+}}
 
 ---
 
-CHAPTER TO REVIEW:
+{citation_note}{calibrated_note}{window_note}CHAPTER TO REVIEW:
 
 {chapter_content}
 """
 
 
+FACT_CHECKER_SCHEMA = {
+    "issues?": [{"type?": str, "severity?": str, "location?": str, "issue": str, "correction?": str}],
+    "overall_assessment?": str,
+    "confidence?": str
+}
+
+
+CLAIM_VERIFIER_PROMPT = """You are a climate science fact-checker verifying individual claims from AI-generated IPCC AR7 chapters against published literature.
+
+Each claim below is one sentence from a chapter, prefixed with its ID. Judge each claim on its own:
+
+- **supported**: Consistent with published literature and IPCC assessments
+- **incorrect**: Contradicts published literature (wrong numbers, trends, attributions or non-existent sources)
+- **misleading**: Technically defensible but oversimplified, exaggerated or with misused calibrated language (virtually certain, very likely, likely, medium confidence, etc.)
+- **unsupported**: A specific claim with no basis you can identify
+- **outdated**: Based on findings that have been superseded
+
+For every claim that is not supported, also provide:
+- **Type**: (factual_error | citation_issue | uncertainty_issue | outdated | statistical_error)
+- **Severity**: (critical | major | minor)
+- **Issue**: Explain what's wrong
+- **Correction**: What the correct information should be (if known)
+
+Output format (JSON), one entry per claim ID:
+{{
+  "claims": [
+    {{
+      "id": "c0",
+      "status": "supported | incorrect | misleading | unsupported | outdated",
+      "type": "factual_error",
+      "severity": "major",
+      "issue": "explanation",
+      "correction": "correct information"
+    }}
+  ]
+}}
+
+---
+
+CLAIMS TO VERIFY:
+
+{claims}
+"""
+
+ISSUE_REVIEW_PROMPT = """You are a climate science fact-checker giving a second opinion on issues another reviewer found in an AI-generated IPCC AR7 chapter.
+
+For each issue below, judge against published literature and IPCC assessments whether the reported problem is real:
+
+- **agree**: The quoted text really has this problem
+- **disagree**: The quoted text is correct - the reported problem is wrong
+- **uncertain**: You cannot tell from the literature you know
+
+Output format (JSON), one entry per issue ID:
+{{
+  "reviews": [
+    {{
+      "id": "i0",
+      "verdict": "agree | disagree | uncertain",
+      "severity": "critical | major | minor",
+      "comment": "one sentence on why"
+    }}
+  ]
+}}
+
+---
+
+ISSUES TO REVIEW:
+
+{issues}
+"""
+
+ISSUE_REVIEW_SCHEMA = {
+    "reviews": [{"id": str, "verdict": str, "severity?": str, "comment?": str}]
+}
+
+CLAIM_VERIFIER_SCHEMA = {
+    "claims": [{"id": str, "status": str, "type?": str, "severity?": str, "issue?": str, "correction?": str}]
+}
+
+
 def find_chapter_files(model_outputs_dir: Path, chapter_key: Optional[str] = None,
                       model_id: Optional[str] = None) -> List[Dict]:
     """
@@ -124,6 +254,10 @@ def find_chapter_files(model_outputs_dir: Path, chapter_key: Optional[str] = Non
                 chapter_files = list(chapter_dir.glob(f"*{ext}"))
 
                 for chapter_file in chapter_files:
+                    # Reasoning traces are stored beside chapters, not checked
+                    if is_reasoning_file(chapter_file):
+                        continue
+
                     # Extract chapter key from filename
                     file_chapter_key = chapter_file.stem
 
@@ -140,56 +274,293 @@ def find_chapter_files(model_outputs_dir: Path, chapter_key: Optional[str] = Non
     return files_to_check
 
 
-def fact_check_chapter(chapter_content: str, fact_checker_model: str = "gemini/gemini-2.0-flash-exp") -> Dict:
+def json_fixer(model: str = DEFAULT_FIXER_MODEL, limiter: Optional[ProviderRateLimiter] = None):
+    """Cheap follow-up call, on model, that repairs an evaluator's malformed JSON (see json_repair.py)"""
+    def fix(prompt: str) -> str:
+        if limiter:
+            limiter.wait(model)
+        return call_model_with_prompt(
+            messages=[{"role": "user", "content": prompt}],
+            model=model,
+            temperature=0,
+            max_tokens=4000,
+            response_format={"type": "json_object"}
+        )
+    return fix
+
+
+def review_issues(model: str, items: List[Dict], limiter: Optional[ProviderRateLimiter] = None,
+                  json_fixer_model: str = DEFAULT_FIXER_MODEL) -> Dict[str, Dict]:
+    """A secondary checker's verdicts on escalated issues (the review callback of run_ensemble)"""
+    if limiter:
+        limiter.wait(model)
+    response = call_model_with_prompt(
+        messages=[{"role": "user", "content": ISSUE_REVIEW_PROMPT.format(issues=format_issues(items))}],
+        model=model,
+        temperature=0.2,
+        max_tokens=4000,
+        response_format={"type": "json_object"}
+    )
+    result = parse_evaluator_json(response, ISSUE_REVIEW_SCHEMA, model=model,
+                                  fixer=json_fixer(json_fixer_model, limiter))
+    return {review["id"]: review for review in result["reviews"] if isinstance(review, dict)}
+
+
+def fact_check_chapter(chapter_content: str, fact_checker_model: str = "gemini/gemini-2.0-flash-exp",
+                       window_words: int = DEFAULT_WINDOW_WORDS, overlap_words: int = DEFAULT_OVERLAP_WORDS,
+                       window_workers: int = DEFAULT_WINDOW_WORKERS,
+                       citation_check: Optional[Dict] = None,
+                       calibrated_language: Optional[Dict] = None,
+                       limiter: Optional[ProviderRateLimiter] = None,
+                       prior: Optional[Dict] = None,
+                       json_fixer_model: str = DEFAULT_FIXER_MODEL) -> Dict:
     """
     Fact-check a single chapter using Gemini with grounding
 
     Args:
         chapter_content: The chapter text to check
         fact_checker_model: Model to use for fact-checking
+        window_words: Longer chapters are checked in overlapping windows of this size
+        overlap_words: Words repeated between consecutive windows
+        window_workers: Windows checked concurrently
+        citation_check: check_chapter_citations() result, shown to the checker
+        calibrated_language: analyze_calibrated_language() result, shown to the checker
+        limiter: Rate limiter every evaluator request waits on
+        prior: load_prior_check() result - only paragraphs not verified in it are re-checked
+        json_fixer_model: Model asked to repair malformed checker JSON
 
     Returns:
         Dictionary with fact-check results
     """
-    prompt = FACT_CHECKER_PROMPT.format(chapter_content=chapter_content)
-
-    messages = [
-        {"role": "user", "content": prompt}
-    ]
-
-    try:
+    overlap_words = min(overlap_words, window_words // 2)
+    paragraphs = chapter_paragraphs(chapter_content, window_words - overlap_words)
+    changed = [i for i, p in enumerate(paragraphs) if not prior or p["hash"] not in prior["paragraphs"]]
+    incremental = bool(prior) and len(changed) < len(paragraphs)
+    if incremental:
+        windows = make_recheck_windows(paragraphs, changed, window_words, overlap_words)
+    else:
+        windows = make_windows(chapter_content, window_words, overlap_words)
+
+    def check(window: Dict) -> Dict:
+        note = (recheck_note(window, len(windows), len(paragraphs)) if incremental
+                else window_note(window, len(windows)))
+        prompt = FACT_CHECKER_PROMPT.format(citation_note=citation_note(citation_check) if citation_check else "",
+                                            calibrated_note=(calibrated_note(calibrated_language)
+                                                             if calibrated_language else ""),
+                                            window_note=note,
+                                            chapter_content=window["text"])
         # Call LLM with grounding enabled
+        if limiter:
+            limiter.wait(fact_checker_model)
         response = call_model_with_prompt(
-            messages=messages,
+            messages=[{"role": "user", "content": prompt}],
             model=fact_checker_model,
             temperature=0.2,
             max_tokens=4000,
             response_format={"type": "json_object"}
         )
+        try:
+            return parse_evaluator_json(response, FACT_CHECKER_SCHEMA, model=fact_checker_model,
+                                        fixer=json_fixer(json_fixer_model, limiter))
+        except JSONRepairError as e:
+            return {"issues": [], "error": f"Error parsing fact-check response: {e}", "raw_response": response}
 
-        # Parse JSON response
-        result = json.loads(response)
-        return result
+    window_results = check_windows(windows, check, max_workers=window_workers)
+    failed = [r for r in window_results if r.get("error")]
 
-    except json.JSONDecodeError:
-        # If JSON parsing fails, return basic structure
+    if not paragraphs or (windows and len(failed) == len(windows)):
+        error = failed[0]["error"] if failed else "No content"
         return {
             "errors_found": 0,
             "error_rate": 0.0,
             "issues": [],
-            "overall_assessment": "Error parsing fact-check response",
+            "overall_assessment": f"Fact-checking failed: {error}",
             "confidence": "low",
-            "raw_response": response
+            "error": error,
+            "raw_response": failed[0].get("raw_response") if failed else None
         }
+
+    # Issues in the overlaps are reported by both windows - merge, then recount
+    issues = merge_issues(window_results, windows, text_fields=("location", "issue"))
+
+    # Pin every issue to its paragraph - the next run reuses them by paragraph hash
+    context_dropped = 0
+    if incremental:
+        rechecked_issues = []
+        for issue in issues:
+            candidates = [j for w in issue["windows"] for j in windows[w]["paragraphs"]]
+            context = [j for w in issue["windows"] for j in windows[w]["context_paragraphs"]]
+            # Reported in an already-verified neighbour - its prior issues are reused below
+            if quotes_context(issue, paragraphs, candidates, context):
+                context_dropped += 1
+                continue
+            issue["paragraph"] = attribute_issue(issue, paragraphs, candidates)
+            rechecked_issues.append(issue)
+        issues = sorted(reused_issues(paragraphs, prior) + rechecked_issues, key=lambda issue: issue["paragraph"])
+        unverified = {j for w, r in zip(windows, window_results) if r.get("error") for j in w["paragraphs"]}
+    else:
+        for issue in issues:
+            issue["paragraph"] = attribute_issue(issue, paragraphs)
+        # Windows do not map to paragraphs exactly, so a partial failure re-checks everything next run
+        unverified = set(range(len(paragraphs))) if failed else set()
+    rechecked = set(changed)
+
+    assessments = [r["overall_assessment"] for r in window_results if r.get("overall_assessment")]
+    if incremental:
+        assessments.insert(0, f"Re-checked {len(changed)} of {len(paragraphs)} paragraphs; "
+                              f"prior findings kept for the rest.")
+    confidence = lowest_confidence([r.get("confidence") for r in window_results]
+                                   + ([prior.get("confidence")] if incremental else []))
+    return {
+        "errors_found": len(issues),
+        "error_rate": error_rate(len(issues), len(chapter_content.split())),
+        "issues": issues,
+        "overall_assessment": " ".join(assessments),
+        "confidence": confidence or "low",
+        "windows_checked": len(windows),
+        "windows_failed": len(failed),
+        "windows": window_summary(windows, window_results),
+        "paragraphs": paragraph_records(paragraphs, rechecked, unverified),
+        "reverification": reverification_stats(paragraphs, rechecked),
+        "context_issues_dropped": context_dropped
+    }
+
+
+def read_chapter(file_path: Path, label: str = "") -> Optional[str]:
+    """Final-answer text of a chapter file, or None (with the reason printed after label) if unusable"""
+    try:
+        with open(file_path, 'r', encoding='utf-8') as f:
+            chapter_content = strip_reasoning(f.read())
     except Exception as e:
-        return {
-            "errors_found": 0,
-            "error_rate": 0.0,
-            "issues": [],
-            "overall_assessment": f"Fact-checking failed: {str(e)}",
-            "confidence": "low",
-            "error": str(e)
-        }
+        print(f"{label}❌ Error reading file: {e}")
+        return None
+
+    # Skip empty or very short chapters
+    if len(chapter_content.strip()) < 100:
+        print(f"{label}⚠️  Skipped (too short)")
+        return None
+    return chapter_content
+
+
+def fact_check_claims(files_to_check: List[Dict], fact_checker_model: str = "gemini/gemini-2.0-flash-exp",
+                      batch_size: int = DEFAULT_CLAIM_BATCH_SIZE,
+                      workers: int = DEFAULT_WINDOW_WORKERS,
+                      store: Optional[ClaimVerdictStore] = None,
+                      citation_requirements: Optional[Dict] = None,
+                      limiter: Optional[ProviderRateLimiter] = None,
+                      json_fixer_model: str = DEFAULT_FIXER_MODEL) -> Tuple[List[Dict], Dict]:
+    """
+    Fact-check every chapter at once by verifying each unique claim a single time
+
+    Claims are extracted from all chapters, near-duplicates across models are
+    clustered, one representative per cluster is verified (batch_size claims per
+    evaluator call) and the verdicts are projected back onto each chapter.
+
+    Args:
+        files_to_check: find_chapter_files() output
+        fact_checker_model: Model to use for verification
+        batch_size: Claims verified per evaluator call
+        workers: Batches verified concurrently
+        store: Verdict cache consulted before, and updated after, each verification
+        citation_requirements: load_citation_requirements() result per model_id for the citation check
+        limiter: Rate limiter every evaluator request waits on
+        json_fixer_model: Model asked to repair malformed verifier JSON
+
+    Returns:
+        (per-chapter results in the fact_check_chapter() format, claim statistics)
+    """
+    chapters = []
+    for file_info in files_to_check:
+        print(f"  Extracting claims: {file_info['model_id']}/{file_info['chapter_key']}...", end=" ", flush=True)
+        chapter_content = read_chapter(file_info["file_path"])
+        if chapter_content is None:
+            continue
+        claims = extract_claims(chapter_content)
+        chapters.append({**file_info, "content": chapter_content, "claims": claims})
+        print(f"{len(claims)} claims")
+
+    chapter_claims = [chapter["claims"] for chapter in chapters]
+    clusters = cluster_claims(chapter_claims)
+    cluster_index = {cluster["id"]: cluster for cluster in clusters}
+
+    cached = {}
+    if store:
+        for cluster in clusters:
+            verdict = store.get(cluster_spellings(cluster, chapter_claims))
+            if verdict:
+                cached[cluster["id"]] = {**verdict, "id": cluster["id"]}
+
+    batches = claim_batches([c for c in clusters if c["id"] not in cached], batch_size)
+    total_claims = sum(len(claims) for claims in chapter_claims)
+    print(f"\n🧩 {total_claims:,} claims → {len(clusters):,} unique → {len(cached):,} cached, "
+          f"{len(batches)} evaluator calls\n")
+
+    def verify(batch: Dict) -> Dict:
+        prompt = CLAIM_VERIFIER_PROMPT.format(claims=format_claims(batch))
+        if limiter:
+            limiter.wait(fact_checker_model)
+        with usage_scope(claim_batch=batch["index"]) as batch_usage:
+            response = call_model_with_prompt(
+                messages=[{"role": "user", "content": prompt}],
+                model=fact_checker_model,
+                temperature=0.2,
+                max_tokens=8000,
+                response_format={"type": "json_object"}
+            )
+            try:
+                result = parse_evaluator_json(response, CLAIM_VERIFIER_SCHEMA, model=fact_checker_model,
+                                              fixer=json_fixer(json_fixer_model, limiter))
+            except JSONRepairError as e:
+                result = {"claims": [], "error": f"Error parsing claim verification response: {e}"}
+
+        if store:
+            # Committed per batch, so an interrupted run keeps what it paid for
+            claim_usage = {field: (batch_usage.usage.get(field) or 0) / len(batch["claims"])
+                           for field in ("input_tokens", "output_tokens", "cost")}
+            for verdict in collect_verdicts([batch], [result]).values():
+                if verdict["status"] != "unverified":
+                    store.put(cluster_index[verdict["id"]]["representative"]["normalized"], verdict, claim_usage)
+
+        print(f"  ✅ Batch {batch['index'] + 1}/{len(batches)} verified")
+        return {**result, "usage": batch_usage.usage}
+
+    # Verification is shared by every model - its usage is apportioned per chapter below
+    with usage_scope(stage="fact_check", model_id="shared_claims"):
+        batch_results = check_windows(batches, verify, max_workers=workers)
+
+    verdicts = {**cached, **collect_verdicts(batches, batch_results)}
+    chapter_issues = project_verdicts(chapter_claims, clusters, verdicts)
+    chapter_usage = apportion_usage(batches, batch_results, clusters, len(chapters))
+
+    results = []
+    for chapter, issues, usage in zip(chapters, chapter_issues, chapter_usage):
+        word_count = len(chapter["content"].split())
+        unverified = sum(1 for claim in chapter["claims"]
+                         if verdicts[clusters[claim["cluster"]]["id"]]["status"] == "unverified")
+        results.append({
+            "errors_found": len(issues),
+            "error_rate": error_rate(len(issues), word_count),
+            "issues": issues,
+            "overall_assessment": (f"{len(chapter['claims'])} claims checked, {len(issues)} with issues, "
+                                   f"{unverified} unverified"),
+            "confidence": "low" if unverified > len(chapter["claims"]) / 2 else "medium",
+            "claims_checked": len(chapter["claims"]),
+            "claims_unverified": unverified,
+            "citation_check": check_chapter_citations(chapter["content"],
+                                                      (citation_requirements or {}).get(chapter["model_id"])),
+            "calibrated_language": analyze_calibrated_language(chapter["content"]),
+            "model_id": chapter["model_id"],
+            "chapter_key": chapter["chapter_key"],
+            "file_path": str(chapter["file_path"]),
+            "word_count": word_count,
+            "usage": usage,
+            "checked_at": datetime.now().isoformat()
+        })
+
+    stats = claim_stats(chapter_claims, clusters, batches, verdicts)
+    if store:
+        stats["cache"] = store.summary()
+    return results, stats
 
 
 def main():
@@ -216,14 +587,104 @@ def main():
         default="gemini/gemini-2.0-flash-exp",
         help="Model to use for fact-checking"
     )
+    parser.add_argument(
+        "--json-fixer-model",
+        default=DEFAULT_FIXER_MODEL,
+        help="Cheap model asked to repair malformed evaluator JSON when local repair fails"
+    )
     parser.add_argument(
         "--output-dir",
         default="output/ar7_fact_checking",
         help="Output directory for fact-check results"
     )
+    parser.add_argument(
+        "--window-words",
+        type=int,
+        default=DEFAULT_WINDOW_WORDS,
+        help="Maximum words per fact-check window"
+    )
+    parser.add_argument(
+        "--window-overlap",
+        type=int,
+        default=DEFAULT_OVERLAP_WORDS,
+        help="Words repeated between consecutive windows"
+    )
+    parser.add_argument(
+        "--window-workers",
+        type=int,
+        default=DEFAULT_WINDOW_WORKERS,
+        help="Windows of one chapter (or claim batches in --claim-mode) checked concurrently"
+    )
+    parser.add_argument(
+        "--workers",
+        type=int,
+        default=1,
+        help="Chapters fact-checked concurrently"
+    )
+    parser.add_argument(
+        "--rpm",
+        nargs="*",
+        help="Requests per minute per provider, e.g. gemini=30 (0 = unlimited); enables rate limiting, "
+             "which is otherwise only on with --workers > 1"
+    )
+    parser.add_argument(
+        "--secondary-checkers",
+        nargs="*",
+        default=[],
+        help="Models consulted in turn on critical/major and low-confidence issues (chapter mode)"
+    )
+    parser.add_argument(
+        "--agreement-threshold",
+        type=float,
+        default=DEFAULT_AGREEMENT_THRESHOLD,
+        help="Share of checkers agreeing that confirms an escalated issue"
+    )
+    parser.add_argument(
+        "--full-recheck",
+        action="store_true",
+        help="Check every paragraph again instead of only those changed since the previous result"
+    )
+    parser.add_argument(
+        "--claim-mode",
+        action="store_true",
+        help="Extract claims from every chapter, deduplicate them across models and verify each once"
+    )
+    parser.add_argument(
+        "--claim-batch-size",
+        type=int,
+        default=DEFAULT_CLAIM_BATCH_SIZE,
+        help="Claims verified per evaluator call in --claim-mode"
+    )
+    parser.add_argument(
+        "--verdict-store",
+        default=DEFAULT_VERDICT_STORE,
+        help="Claim verdict cache shared across --claim-mode runs"
+    )
+    parser.add_argument(
+        "--verdict-ttl-days",
+        type=float,
+        default=DEFAULT_TTL_DAYS,
+        help="Re-verify cached claim verdicts older than this (0 = never expire)"
+    )
+    parser.add_argument(
+        "--no-verdict-cache",
+        action="store_true",
+        help="Verify every claim in --claim-mode, ignoring and not updating the verdict store"
+    )
+    parser.add_argument(
+        "--citation-requirements",
+        help="Prompts file whose citation_requirements set the literature window and minimum citations "
+             "(default: the prompts file recorded in each model's generation_summary.json)"
+    )
 
     args = parser.parse_args()
 
+    try:
+        rpm_limits = parse_limits(args.rpm)
+    except ValueError:
+        print(f"❌ Invalid --rpm value {' '.join(args.rpm)!r}: expected provider=requests_per_minute, e.g. gemini=30")
+        return 1
+
     model_outputs_dir = Path(args.model_outputs)
     output_dir = Path(args.output_dir)
     output_dir.mkdir(parents=True, exist_ok=True)
@@ -232,6 +693,12 @@ def main():
         print(f"❌ Error: Model outputs directory not found: {model_outputs_dir}")
         return 1
 
+    try:
+        claim_run(output_dir, "fact_check")
+    except RunLockedError as e:
+        print(f"❌ {e}")
+        return 1
+
     print(f"\n{'='*80}")
     print(f"AR7 FACT-CHECKING")
     print(f"{'='*80}")
@@ -253,64 +720,161 @@ def main():
 
     print(f"Found {len(files_to_check)} chapters to fact-check\n")
 
+    # Each model's chapters are held to the citation requirements of the prompts they were generated from
+    citation_requirements = {model_id: requirements_for_model(model_outputs_dir / model_id, args.citation_requirements)
+                             for model_id in sorted({f["model_id"] for f in files_to_check})}
+    # A single worker makes one request at a time - throttle it only when limits are asked for
+    limiter = ProviderRateLimiter(rpm_limits) if args.workers > 1 or args.rpm is not None else None
+
     # Process each chapter
     results = []
-    for i, file_info in enumerate(files_to_check, 1):
-        model_id = file_info["model_id"]
-        chapter_key = file_info["chapter_key"]
-        file_path = file_info["file_path"]
-
-        print(f"[{i}/{len(files_to_check)}] Checking {model_id}/{chapter_key}...", end=" ", flush=True)
-
-        # Read chapter content
-        try:
-            with open(file_path, 'r', encoding='utf-8') as f:
-                chapter_content = f.read()
-        except Exception as e:
-            print(f"❌ Error reading file: {e}")
-            continue
-
-        # Skip empty or very short chapters
-        if len(chapter_content.strip()) < 100:
-            print("⚠️  Skipped (too short)")
-            continue
-
-        # Fact-check
-        fact_check_result = fact_check_chapter(chapter_content, args.fact_checker)
-
-        # Add metadata
-        fact_check_result.update({
-            "model_id": model_id,
-            "chapter_key": chapter_key,
-            "file_path": str(file_path),
-            "word_count": len(chapter_content.split()),
-            "checked_at": datetime.now().isoformat()
-        })
-
-        results.append(fact_check_result)
-
-        # Print summary
-        errors = fact_check_result.get("errors_found", 0)
-        if errors == 0:
-            print("✅ No errors")
-        else:
-            error_rate = fact_check_result.get("error_rate", 0)
-            print(f"⚠️  {errors} issues ({error_rate:.2f} per 1000 words)")
-
-        # Save individual result
-        result_file = output_dir / f"{model_id}_{chapter_key}_factcheck.json"
-        with open(result_file, 'w', encoding='utf-8') as f:
-            json.dump(fact_check_result, f, indent=2)
+    claims = None
+    if args.claim_mode:
+        store = None
+        if not args.no_verdict_cache:
+            store = ClaimVerdictStore(args.verdict_store, args.fact_checker, prompt_version(CLAIM_VERIFIER_PROMPT),
+                                      ttl_days=args.verdict_ttl_days)
+            store.purge_expired()
+        results, claims = fact_check_claims(files_to_check, args.fact_checker, batch_size=args.claim_batch_size,
+                                            workers=args.window_workers, store=store,
+                                            citation_requirements=citation_requirements, limiter=limiter,
+                                            json_fixer_model=args.json_fixer_model)
+        if store:
+            store.close()
+        for fact_check_result in results:
+            result_file = output_dir / f"{fact_check_result['model_id']}_{fact_check_result['chapter_key']}_factcheck.json"
+            atomic_write_json(result_file, fact_check_result)
+    else:
+        def check_file(file_info: Dict) -> Optional[Dict]:
+            model_id = file_info["model_id"]
+            chapter_key = file_info["chapter_key"]
+            file_path = file_info["file_path"]
+
+            chapter_content = read_chapter(file_path, label=f"  {model_id}/{chapter_key}: ")
+            if chapter_content is None:
+                return None
+
+            # The previous result is the paragraph cache - unchanged paragraphs keep their issues
+            result_file = output_dir / f"{model_id}_{chapter_key}_factcheck.json"
+            prior = None if args.full_recheck else load_prior_check(result_file, args.fact_checker, checker_version)
+
+            # Deterministic citation and calibrated-language checks first - their findings go into the prompt
+            citation_check = check_chapter_citations(chapter_content, citation_requirements[model_id])
+            calibrated_language = analyze_calibrated_language(chapter_content)
+
+            # Fact-check
+            with usage_scope(stage="fact_check", model_id=model_id, chapter_key=chapter_key) as usage:
+                fact_check_result = fact_check_chapter(chapter_content, args.fact_checker,
+                                                       window_words=args.window_words,
+                                                       overlap_words=args.window_overlap,
+                                                       window_workers=args.window_workers,
+                                                       citation_check=citation_check,
+                                                       calibrated_language=calibrated_language,
+                                                       limiter=limiter,
+                                                       prior=prior,
+                                                       json_fixer_model=args.json_fixer_model)
+
+                # Ensemble: escalated issues go to the secondary checkers until agreement settles them
+                if args.secondary_checkers and not fact_check_result.get("error"):
+                    paragraphs = chapter_paragraphs(chapter_content,
+                                                    args.window_words - min(args.window_overlap, args.window_words // 2))
+                    fact_check_result["ensemble"] = run_ensemble(
+                        fact_check_result["issues"], paragraphs, args.fact_checker, args.secondary_checkers,
+                        review=lambda model, items: review_issues(model, items, limiter, args.json_fixer_model),
+                        chapter_confidence=fact_check_result.get("confidence"),
+                        threshold=args.agreement_threshold)
+
+            # Disputed issues (this run's or reused) stay in the result but are not counted as errors
+            disputed = sum(1 for issue in fact_check_result.get("issues", [])
+                           if (issue.get("ensemble") or {}).get("status") == "disputed")
+            if disputed:
+                fact_check_result["disputed_issues"] = disputed
+                fact_check_result["errors_found"] = len(fact_check_result["issues"]) - disputed
+                fact_check_result["error_rate"] = error_rate(fact_check_result["errors_found"],
+                                                             len(chapter_content.split()))
+
+            # Add metadata
+            fact_check_result.update({
+                "model_id": model_id,
+                "chapter_key": chapter_key,
+                "file_path": str(file_path),
+                "word_count": len(chapter_content.split()),
+                "usage": usage.usage,
+                "citation_check": citation_check,
+                "calibrated_language": calibrated_language,
+                "checker_model": args.fact_checker,
+                "checker_version": checker_version,
+                "checked_at": datetime.now().isoformat()
+            })
+            return fact_check_result
+
+        checker_version = prompt_version(FACT_CHECKER_PROMPT)
+        workers = max(1, min(args.workers, len(files_to_check)))
+        if workers > 1:
+            print(f"⚙️  {workers} workers\n")
+        started = time.monotonic()
+        completed = {}  # files_to_check index → result
+        with ThreadPoolExecutor(max_workers=workers) as executor:
+            futures = {executor.submit(check_file, file_info): i for i, file_info in enumerate(files_to_check)}
+            for done, future in enumerate(as_completed(futures), 1):
+                file_info = files_to_check[futures[future]]
+                label = f"{file_info['model_id']}/{file_info['chapter_key']}"
+                try:
+                    fact_check_result = future.result()
+                except Exception as e:
+                    print(f"[{done}/{len(files_to_check)}] {label}: ❌ {e}")
+                    continue
+
+                # Progress: throughput and ETA over the chapters finished so far
+                elapsed = time.monotonic() - started
+                rate = done / elapsed if elapsed else 0.0
+                eta = (len(files_to_check) - done) / rate if rate else 0.0
+                progress = f"{rate * 60:.1f} chapters/min, ETA {format_duration(eta)}"
+                if fact_check_result is None:
+                    print(f"[{done}/{len(files_to_check)}] {label}: skipped | {progress}")
+                    continue
+                completed[futures[future]] = fact_check_result
+
+                # Print summary
+                errors = fact_check_result.get("errors_found", 0)
+                if errors == 0:
+                    status = "✅ No errors"
+                else:
+                    status = f"⚠️  {errors} issues ({fact_check_result.get('error_rate', 0):.2f} per 1000 words)"
+                reverification = fact_check_result.get("reverification")
+                if reverification and reverification["paragraphs_rechecked"] < reverification["paragraphs"]:
+                    status += f", {reverification['fraction_rechecked'] * 100:.0f}% re-verified"
+                if fact_check_result.get("disputed_issues"):
+                    status += f", {fact_check_result['disputed_issues']} disputed"
+                print(f"[{done}/{len(files_to_check)}] {label}: {status} | {progress}")
+
+                # Save individual result as soon as it completes
+                result_file = output_dir / f"{file_info['model_id']}_{file_info['chapter_key']}_factcheck.json"
+                atomic_write_json(result_file, fact_check_result)
+
+        # Summary in chapter order, whatever order they finished in
+        results = [completed[i] for i in sorted(completed)]
 
     # Save summary
+    reverified = [r["reverification"] for r in results if r.get("reverification")]
+    reverification = {field: sum(r[field] for r in reverified)
+                      for field in ("paragraphs", "paragraphs_rechecked", "words", "words_rechecked")}
+    reverification["fraction_rechecked"] = (reverification["words_rechecked"] / reverification["words"]
+                                            if reverification["words"] else 0.0)
     summary_file = output_dir / "fact_check_summary.json"
-    with open(summary_file, 'w', encoding='utf-8') as f:
-        json.dump({
-            "generated_at": datetime.now().isoformat(),
-            "fact_checker_model": args.fact_checker,
-            "total_chapters_checked": len(results),
-            "results": results
-        }, f, indent=2)
+    atomic_write_json(summary_file, {
+        "generated_at": datetime.now().isoformat(),
+        "fact_checker_model": args.fact_checker,
+        "total_chapters_checked": len(results),
+        "claims": claims,
+        "reverification": reverification if reverified else None,
+        "usage": get_usage_tracker().totals(stage="fact_check"),
+        "usage_by_model": get_usage_tracker().breakdown("model_id"),
+        "rate_limits": limiter.summary() if limiter else None,
+        "json_parsing": get_parse_stats(),
+        "ensemble": summarize_agreement(results) if args.secondary_checkers else None,
+        "results": results
+    })
 
     # Print summary statistics
     print(f"\n{'='*80}")
@@ -324,6 +888,45 @@ def main():
     print(f"Chapters with errors: {chapters_with_errors} ({chapters_with_errors/len(results)*100:.1f}%)")
     print(f"Total errors found: {total_errors}")
     print(f"Average errors per chapter: {total_errors/len(results):.2f}")
+    checks = [r["citation_check"] for r in results if r.get("citation_check")]
+    print(f"Citations: {sum(len(c['dangling_citations']) for c in checks)} dangling, "
+          f"{sum(len(c['unused_references']) for c in checks)} unused references, "
+          f"{sum(len(c['out_of_window']) for c in checks)} out of window, "
+          f"{sum(len(c['malformed_dois']) for c in checks)} malformed DOIs, "
+          f"{sum(1 for c in checks if not c['meets_minimum'])} chapters below the minimum")
+    if claims:
+        print(f"Claims: {claims['claims_extracted']:,} extracted, {claims['unique_claims']:,} unique "
+              f"({claims['dedup_ratio']:.1f}x dedup), {claims['evaluator_calls']} evaluator calls")
+        if claims.get("cache"):
+            cache = claims["cache"]
+            print(f"Verdict cache: {cache['hits']:,}/{cache['lookups']:,} hits ({cache['hit_rate']*100:.1f}%), "
+                  f"saved {cache['input_tokens_saved']:,} input / {cache['output_tokens_saved']:,} output tokens, "
+                  f"${cache['cost_saved']:.4f}")
+    for provider, limit in (limiter.summary() if limiter else {}).items():
+        print(f"Rate limit {provider}: {limit['requests']} requests at {limit['rpm']:g}/min, "
+              f"{limit['waited_seconds']:.0f}s waiting")
+    if reverified:
+        print(f"Re-verified: {reverification['paragraphs_rechecked']:,}/{reverification['paragraphs']:,} paragraphs, "
+              f"{reverification['words_rechecked']:,}/{reverification['words']:,} words "
+              f"({reverification['fraction_rechecked'] * 100:.1f}%)")
+    if args.secondary_checkers:
+        agreement = summarize_agreement(results)
+        totals = agreement["totals"]
+        mean = f"{totals['mean_agreement'] * 100:.0f}%" if totals["mean_agreement"] is not None else "n/a"
+        print(f"Ensemble: {totals['escalated']} issues escalated, {totals['confirmed']} confirmed, "
+              f"{totals['disputed']} disputed, {totals['unconfirmed']} unconfirmed, "
+              f"{totals['secondary_calls']} secondary calls, mean agreement {mean}")
+        for checker, stats in agreement["by_checker"].items():
+            rate = f"{stats['agreement_rate'] * 100:.0f}%" if stats["agreement_rate"] is not None else "n/a"
+            print(f"  {checker}: agreed with {args.fact_checker} on {stats['agreed']}/{stats['reviewed']} ({rate})")
+        for model_id, stats in agreement["by_model"].items():
+            rate = f"{stats['mean_agreement'] * 100:.0f}%" if stats["mean_agreement"] is not None else "n/a"
+            print(f"  {model_id}: {stats['confirmed']}/{stats['escalated']} escalated issues confirmed, "
+                  f"{stats['disputed']} disputed, mean agreement {rate}")
+    for line in format_parse_stats(get_parse_stats()):
+        print(f"JSON parsing - {line}")
+    usage = get_usage_tracker().totals(stage="fact_check")
+    print(f"Fact-checker usage: {usage['input_tokens']:,} input / {usage['output_tokens']:,} output tokens, ${usage['cost']:.4f}")
     print(f"\nResults saved to: {summary_file}")
     print(f"{'='*80}\n")
 
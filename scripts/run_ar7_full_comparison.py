@@ -15,17 +15,28 @@ Usage:
     # Run with custom chapter selection
     uv run python run_ar7_full_comparison.py \
         --chapters "summary_for_policymakers,technical_summary,chapter_1_point_of_departure"
+
+    # Smoke test every model against every real chapter prompt (a few tokens each)
+    uv run python run_ar7_full_comparison.py --smoke
 """
 
 import argparse
 import json
-import subprocess
 import sys
 from pathlib import Path
 from datetime import datetime
 from typing import Dict, List, Optional
 import time
 
+from smoke_test import run_smoke_test, print_smoke_matrix, save_smoke_results
+from response_classifier import classify_response
+from reasoning_traces import is_reasoning_file, split_reasoning
+from usage_accounting import cost_per_1000_words, load_model_usage
+from energy_accounting import estimate_energy, format_energy_cells
+from graceful_shutdown import ShutdownRequested, install_signal_handlers, run_subprocess
+from output_writer import atomic_write_json, atomic_write_text, read_lock, stage_running
+from bib_index import BibIndex, classify_references, format_rate, summarize_models
+
 # Model configurations
 MODELS = {
     "openai_gpt5": {
@@ -80,6 +91,7 @@ DEFAULT_TEST_CHAPTERS = [
 
 # Minimum word count threshold for success
 MIN_WORDS_PER_CHAPTER = 500  # Anything less is considered a failure
+SETTLE_SECONDS = 5  # A pipeline chapter file untouched this long is taken as complete
 
 
 def run_generation(output_dir: Path, chapters: List[str]) -> Dict:
@@ -106,7 +118,7 @@ def run_generation(output_dir: Path, chapters: List[str]) -> Dict:
     print(f"Running: {' '.join(cmd)}\n")
 
     start_time = time.time()
-    result = subprocess.run(cmd, capture_output=True, text=True)
+    result = run_subprocess(cmd)
     duration = time.time() - start_time
 
     print(result.stdout)
@@ -121,12 +133,14 @@ def run_generation(output_dir: Path, chapters: List[str]) -> Dict:
     }
 
 
-def analyze_generation_results(output_dir: Path, min_words: int = MIN_WORDS_PER_CHAPTER) -> Dict:
+def analyze_generation_results(output_dir: Path, min_words: int = MIN_WORDS_PER_CHAPTER,
+                               bib_index: Optional[BibIndex] = None) -> Dict:
     """Analyze generation outputs and create performance metrics
 
     Args:
         output_dir: Directory containing model outputs
         min_words: Minimum words per chapter to consider successful
+        bib_index: Local bibliographic index to classify each chapter's references against
     """
 
     print(f"\n{'='*80}")
@@ -135,6 +149,9 @@ def analyze_generation_results(output_dir: Path, min_words: int = MIN_WORDS_PER_
     print(f"Minimum words threshold: {min_words} per chapter\n")
 
     model_outputs_dir = output_dir / "model_outputs"
+    generation_running = stage_running(model_outputs_dir, "generation")
+    if generation_running:
+        print(f"⚠️  Generation is still running in {model_outputs_dir} - analyzing the chapters finished so far\n")
     results = {
         "models": {},
         "summary": {
@@ -172,7 +189,20 @@ def analyze_generation_results(output_dir: Path, min_words: int = MIN_WORDS_PER_
             results["summary"]["failed_models"] += 1
             continue
 
-        chapter_files = list(raw_json_dir.glob("*.txt"))
+        # Chapters and their metadata are read under one shared lock, so no batch commit lands in between
+        chapter_texts = {}
+        with read_lock(model_dir):
+            chapter_files = [f for f in raw_json_dir.glob("*.txt") if not is_reasoning_file(f)]
+            if generation_running:
+                # The pipeline subprocess writes these directly - skip files it may still be writing
+                chapter_files = [f for f in chapter_files if time.time() - f.stat().st_mtime > SETTLE_SECONDS]
+            for chapter_file in chapter_files:
+                try:
+                    chapter_texts[chapter_file] = chapter_file.read_text(encoding='utf-8')
+                except Exception as e:
+                    print(f"⚠️  {model_id}/{chapter_file.name}: Error reading - {e}")
+            # Token/cost totals, if the generator recorded usage for this model
+            usage = load_model_usage(model_dir)
 
         if not chapter_files:
             print(f"❌ {model_id}: No chapter files generated")
@@ -189,9 +219,10 @@ def analyze_generation_results(output_dir: Path, min_words: int = MIN_WORDS_PER_
         chapters = {}
         chapters_below_threshold = 0
 
-        for chapter_file in chapter_files:
+        for chapter_file, chapter_text in chapter_texts.items():
             try:
-                content = chapter_file.read_text(encoding='utf-8')
+                # Pipeline outputs may still carry <think> traces - count the answer only
+                reasoning, content = split_reasoning(chapter_text)
                 word_count = len(content.split())
                 total_words += word_count
 
@@ -201,17 +232,32 @@ def analyze_generation_results(output_dir: Path, min_words: int = MIN_WORDS_PER_
                 if is_below_threshold:
                     chapters_below_threshold += 1
 
+                # Same inline classifier the direct runners use, for pipeline outputs
+                response_label = classify_response(content, min_words=min_words)["label"]
+                if response_label in ("refusal", "empty", "wrong_language"):
+                    print(f"⚠️  {model_id}/{chapter_name}: {response_label}")
+
                 chapters[chapter_name] = {
                     "file": str(chapter_file),
                     "words": word_count,
-                    "below_threshold": is_below_threshold
+                    "below_threshold": is_below_threshold,
+                    "response_label": response_label,
+                    "reasoning_words": len(reasoning.split())
                 }
+                if bib_index:
+                    references = classify_references(content, bib_index)
+                    references["not_found_entries"] = [e["text"] for e in references.pop("entries")
+                                                       if e["status"] == "not_found"]
+                    chapters[chapter_name]["references"] = references
             except Exception as e:
-                print(f"⚠️  {model_id}/{chapter_file.name}: Error reading - {e}")
+                print(f"⚠️  {model_id}/{chapter_file.name}: Error analyzing - {e}")
 
         # Determine overall status
         avg_words = total_words / len(chapters) if chapters else 0
 
+        if usage:
+            usage["cost_per_1000_words"] = cost_per_1000_words(usage, total_words)
+
         # Consider it a failure if:
         # 1. Average words per chapter is below threshold
         # 2. More than half the chapters are below threshold
@@ -239,12 +285,25 @@ def analyze_generation_results(output_dir: Path, min_words: int = MIN_WORDS_PER_
             "total_words": total_words,
             "avg_words_per_chapter": avg_words,
             "chapters": chapters,
+            "usage": usage,
+            "energy": estimate_energy(usage, MODELS[model_id]["lite"]),
+            "references": (summarize_models({model_id: {k: c["references"] for k, c in chapters.items()}})[model_id]
+                           if bib_index else None),
             "failure_reason": failure_reason
         }
 
     return results
 
 
+def format_usage_cells(usage: Optional[Dict]) -> str:
+    """Input/output/cached tokens, cost and cost per 1000 words as table cells"""
+    if not usage:
+        return "- | - | - | - | - | "
+    per_1k = usage.get("cost_per_1000_words")
+    return (f"{usage['input_tokens']:,} | {usage['output_tokens']:,} | {usage['cached_tokens']:,} | "
+            f"${usage['cost']:.4f} | {f'${per_1k:.4f}' if per_1k is not None else '-'} | ")
+
+
 def generate_comparison_tables(results: Dict, output_dir: Path):
     """Generate markdown comparison tables"""
 
@@ -269,15 +328,22 @@ def generate_comparison_tables(results: Dict, output_dir: Path):
     performance_md += f"- **Total Words (from successful models):** {results['summary']['total_words']:,}\n\n"
 
     performance_md += "## Model Performance\n\n"
-    performance_md += "| Model | Provider | Status | Chapters | Total Words | Avg Words/Chapter | Notes |\n"
-    performance_md += "|-------|----------|--------|----------|-------------|-------------------|-------|\n"
+    performance_md += ("| Model | Provider | Status | Chapters | Total Words | Avg Words/Chapter | "
+                       "Input Tokens | Output Tokens | Cached Tokens | Cost | Cost/1K Words | "
+                       "Energy (kWh) | kgCO2e | Notes |\n")
+    performance_md += ("|-------|----------|--------|----------|-------------|-------------------|"
+                       "--------------|---------------|---------------|------|---------------|"
+                       "--------------|--------|-------|\n")
 
     for model_id, model_data in sorted(results["models"].items()):
         if model_data["status"] == "success":
             performance_md += f"| {model_id} | {model_data['provider']} | ✅ Success | "
             performance_md += f"{model_data['chapters_generated']} | "
             performance_md += f"{model_data['total_words']:,} | "
-            performance_md += f"{model_data['avg_words_per_chapter']:.0f} | - |\n"
+            performance_md += f"{model_data['avg_words_per_chapter']:.0f} | "
+            performance_md += format_usage_cells(model_data.get("usage"))
+            performance_md += format_energy_cells(model_data.get("energy"))
+            performance_md += "- |\n"
         else:
             error_msg = model_data.get('failure_reason') or model_data.get('error', 'Unknown error')
             performance_md += f"| {model_id} | {MODELS[model_id]['provider']} | "
@@ -291,10 +357,28 @@ def generate_comparison_tables(results: Dict, output_dir: Path):
             else:
                 performance_md += "- | - | - | "
 
+            performance_md += format_usage_cells(model_data.get("usage"))
+            performance_md += format_energy_cells(model_data.get("energy"))
             performance_md += f"{error_msg} |\n"
 
+    energies = [m["energy"] for m in results["models"].values() if m.get("energy")]
+    if energies:
+        performance_md += (f"\n**Estimated generation footprint:** {sum(e['kwh'] for e in energies):.3f} kWh, "
+                           f"{sum(e['kg_co2e'] for e in energies):.3f} kgCO2e "
+                           f"(coefficients from config/energy_coefficients.json)\n")
+
+    referenced = {m: d["references"] for m, d in results["models"].items() if d.get("references")}
+    if referenced:
+        performance_md += "\n## Reference Verification (local bibliographic index)\n\n"
+        performance_md += "| Model | References | Found | Near Match | Not Found | Hallucination Rate |\n"
+        performance_md += "|-------|------------|-------|------------|-----------|--------------------|\n"
+        for model_id, totals in sorted(referenced.items(), key=lambda item: item[1]["hallucination_rate"] or 0):
+            performance_md += (f"| {model_id} | {totals['references']} | {totals['found']} | "
+                               f"{totals['near_match']} | {totals['not_found']} | "
+                               f"{format_rate(totals['hallucination_rate'])} |\n")
+
     performance_file = tables_dir / "model_performance.md"
-    performance_file.write_text(performance_md)
+    atomic_write_text(performance_file, performance_md)
     print(f"✅ Created: {performance_file}")
 
     # Table 2: Cross-Model Comparison by Nation (successful models only)
@@ -345,7 +429,7 @@ def generate_comparison_tables(results: Dict, output_dir: Path):
         nation_md += "⚠️ No models met the success criteria.\n"
 
     nation_file = tables_dir / "nation_comparison.md"
-    nation_file.write_text(nation_md)
+    atomic_write_text(nation_file, nation_md)
     print(f"✅ Created: {nation_file}")
 
     # Table 3: Chapter-by-Chapter Comparison (successful models only)
@@ -363,33 +447,35 @@ def generate_comparison_tables(results: Dict, output_dir: Path):
 
             for chapter in sorted(all_chapters):
                 chapter_md += f"## {chapter}\n\n"
-                chapter_md += "| Model | Words | Provider | Status |\n"
-                chapter_md += "|-------|-------|----------|--------|\n"
+                chapter_md += "| Model | Words | Provider | Status | Hallucinated Refs |\n"
+                chapter_md += "|-------|-------|----------|--------|-------------------|\n"
 
                 chapter_words = []
                 for model_id, model_data in sorted(results["models"].items()):
                     if model_data["status"] == "success" and chapter in model_data["chapters"]:
                         words = model_data["chapters"][chapter]["words"]
                         below_threshold = model_data["chapters"][chapter]["below_threshold"]
-                        chapter_words.append((model_id, words, model_data["provider"], below_threshold))
+                        references = model_data["chapters"][chapter].get("references")
+                        chapter_words.append((model_id, words, model_data["provider"], below_threshold, references))
 
                 # Sort by word count descending
-                for model_id, words, provider, below_threshold in sorted(chapter_words, key=lambda x: x[1], reverse=True):
+                for model_id, words, provider, below_threshold, references in sorted(chapter_words, key=lambda x: x[1], reverse=True):
                     status_icon = "⚠️ Short" if below_threshold else "✅ OK"
-                    chapter_md += f"| {model_id} | {words:,} | {provider} | {status_icon} |\n"
+                    hallucinated = (f"{references['not_found']}/{references['references']}"
+                                    if references and references["references"] else "-")
+                    chapter_md += f"| {model_id} | {words:,} | {provider} | {status_icon} | {hallucinated} |\n"
 
                 chapter_md += "\n"
 
             chapter_file = tables_dir / "chapter_comparison.md"
-            chapter_file.write_text(chapter_md)
+            atomic_write_text(chapter_file, chapter_md)
             print(f"✅ Created: {chapter_file}")
     else:
         print(f"⚠️  No successful models - skipping chapter comparison")
 
     # Save JSON results
     json_file = tables_dir / "results.json"
-    with open(json_file, 'w') as f:
-        json.dump(results, f, indent=2)
+    atomic_write_json(json_file, results)
     print(f"✅ Created: {json_file}")
 
     return {
@@ -436,9 +522,42 @@ def main():
         default=MIN_WORDS_PER_CHAPTER,
         help=f"Minimum words per chapter to consider successful (default: {MIN_WORDS_PER_CHAPTER})"
     )
+    parser.add_argument(
+        "--smoke",
+        action="store_true",
+        help="Only send each chapter prompt to each model with a tiny max_tokens and report a pass/fail matrix"
+    )
+    parser.add_argument(
+        "--prompts-file",
+        default="prompts/ar7_model_comparison_prompts.json",
+        help="Prompts file used by --smoke"
+    )
+    parser.add_argument(
+        "--bib-index",
+        help="Local bibliographic index (bib_index.py --build) - adds per-model hallucinated-reference rates"
+    )
 
     args = parser.parse_args()
 
+    if args.smoke:
+        with open(args.prompts_file) as f:
+            prompts_data = json.load(f)
+
+        # Smoke every real chapter path unless a selection was given
+        if args.chapters:
+            smoke_chapters = [c.strip() for c in args.chapters.split(',')]
+        else:
+            smoke_chapters = prompts_data.get("prompt_keys", [])
+
+        smoke_results = run_smoke_test(
+            {mid: MODELS[mid]["lite"] for mid in MODELS},
+            prompts_data,
+            smoke_chapters
+        )
+        print_smoke_matrix(smoke_results)
+        save_smoke_results(smoke_results, Path(args.output_dir) / "smoke_test_results.json")
+        return 0 if smoke_results["failed"] == 0 else 1
+
     # Determine chapters to generate
     if args.chapters:
         chapters = [c.strip() for c in args.chapters.split(',')]
@@ -467,7 +586,13 @@ def main():
 
     # Phase 1: Generation
     if not args.skip_generation:
-        gen_result = run_generation(output_dir, chapters)
+        install_signal_handlers()
+        try:
+            gen_result = run_generation(output_dir, chapters)
+        except ShutdownRequested:
+            # The generation subprocess journals its progress; rerunning resumes it
+            print("\n⏸️  Generation interrupted - rerun the same command to resume")
+            return 130
 
         if not gen_result["success"]:
             print(f"\n❌ Generation failed with return code {gen_result['returncode']}")
@@ -478,7 +603,13 @@ def main():
         print("\n⏭️  Skipping generation (--skip-generation)")
 
     # Phase 2: Analysis
-    results = analyze_generation_results(output_dir, min_words=args.min_words)
+    bib_index = None
+    if args.bib_index:
+        try:
+            bib_index = BibIndex(args.bib_index)
+        except FileNotFoundError as e:
+            print(f"⚠️  {e} - skipping reference verification")
+    results = analyze_generation_results(output_dir, min_words=args.min_words, bib_index=bib_index)
 
     # Phase 3: Generate Tables
     table_files = generate_comparison_tables(results, output_dir)
@@ -14,15 +14,31 @@ Usage:
 
     # Single model test
     uv run python run_ar7_multimodel_comparison.py --model gemini/gemini-2.5-flash
+
+    # Cascade: lite for every chapter, premium only for chapters failing the quality gate
+    uv run python run_ar7_multimodel_comparison.py --cascade
+
+Each model's finished generation is journaled (run_journal.jsonl), so rerunning the
+same command resumes with the models not yet done. Ctrl-C/SIGTERM terminates the
+pipeline subprocess's whole process group before the partial results are written.
 """
 
 import argparse
 import json
+import shutil
 import subprocess
 import sys
 from pathlib import Path
 from datetime import datetime
-from typing import List, Dict
+from typing import List, Dict, Optional
+
+from eta_estimator import ETAEstimator, load_history
+from graceful_shutdown import ShutdownRequested, install_signal_handlers, run_subprocess
+from run_journal import RunJournal
+from output_writer import RunLockedError, atomic_write_json, atomic_write_text, claim_run
+from quality_gate import MIN_CITATIONS_PER_1K_WORDS, check_chapter
+from reasoning_traces import count_tokens, is_reasoning_file, strip_reasoning
+from usage_accounting import estimate_cost, load_model_usage
 
 # Model configurations
 MODELS = {
@@ -72,7 +88,7 @@ MODELS = {
 
 def run_model_generation(model_id: str, model_name: str, output_dir: Path,
                          prompt_file: str, schedule_file: str,
-                         chapters: List[str] = None) -> Dict:
+                         chapters: List[str] = None, model_output_dir: Path = None) -> Dict:
     """
     Run generation for a single model
 
@@ -83,13 +99,14 @@ def run_model_generation(model_id: str, model_name: str, output_dir: Path,
         prompt_file: Path to prompts.json
         schedule_file: Path to schedule file
         chapters: List of chapter keys to generate (None = all)
+        model_output_dir: Override for the model's output directory (cascade tiers)
 
     Returns:
         Dictionary with generation results
     """
 
     # Create model-specific output directory
-    model_output_dir = output_dir / model_id
+    model_output_dir = model_output_dir or output_dir / model_id
     model_output_dir.mkdir(parents=True, exist_ok=True)
 
     # Build command
@@ -124,7 +141,7 @@ def run_model_generation(model_id: str, model_name: str, output_dir: Path,
     # Run generation
     start_time = datetime.now()
     try:
-        result = subprocess.run(cmd, capture_output=True, text=True, timeout=3600)
+        result = run_subprocess(cmd, timeout=3600)
         end_time = datetime.now()
         duration = (end_time - start_time).total_seconds()
 
@@ -160,6 +177,201 @@ def run_model_generation(model_id: str, model_name: str, output_dir: Path,
         }
 
 
+def load_prompt_config(prompt_file: str) -> Dict:
+    """The prompt file's contents ({} if unreadable)"""
+    try:
+        with open(prompt_file) as f:
+            return json.load(f)
+    except (OSError, json.JSONDecodeError):
+        return {}
+
+
+def load_chapter_keys(prompt_file: str, chapters: Optional[List[str]]) -> Optional[List[str]]:
+    """Requested chapters, or every prompt key in the prompt file (None if unreadable)"""
+    if chapters:
+        return chapters
+    return load_prompt_config(prompt_file).get("prompt_keys")
+
+
+def prompt_tokens(prompt_config: Dict, chapter_keys: List[str]) -> Dict[str, int]:
+    """Input tokens of each chapter's prompt messages (0 where the prompt is not in the file)"""
+    tokens = {}
+    for chapter_key in chapter_keys:
+        prompt = prompt_config.get(chapter_key)
+        messages = prompt.get("messages", []) if isinstance(prompt, dict) else []
+        tokens[chapter_key] = count_tokens("\n\n".join(str(m.get("content", "")) for m in messages))
+    return tokens
+
+
+def find_chapter_outputs(model_output_dir: Path, chapter_keys: Optional[List[str]] = None) -> Dict[str, Path]:
+    """Map chapter keys to the pipeline's raw response files under a model directory"""
+    files = [f for f in model_output_dir.rglob("raw_json_responses/*.txt") if not is_reasoning_file(f)]
+    if chapter_keys is None:
+        return {f.stem: f for f in files}
+
+    outputs = {}
+    # The pipeline prefixes the key ("<run>_<chapter_key>.txt"); match the whole key at the end of
+    # the stem, longest keys first so "summary" could not claim technical_summary's file
+    for chapter_key in sorted(chapter_keys, key=len, reverse=True):
+        for f in sorted(files):
+            if (f.stem == chapter_key or f.stem.endswith(f"_{chapter_key}")) and f not in outputs.values():
+                outputs[chapter_key] = f
+                break
+    return outputs
+
+
+def estimate_chapters_cost(model_name: str, texts: Dict[str, str], input_tokens: Dict[str, int]) -> Optional[float]:
+    """Priced input (prompt) plus output (chapter) tokens of the chapters, None if any is unpriced"""
+    costs = [estimate_cost(model_name, input_tokens=input_tokens.get(chapter_key, 0), output_tokens=count_tokens(text))
+             for chapter_key, text in texts.items()]
+    return sum(costs) if costs and None not in costs else None
+
+
+def tier_cost(model_name: str, model_output_dir: Path, texts: Dict[str, str],
+              input_tokens: Dict[str, int]) -> Optional[float]:
+    """Recorded cost for a tier's directory, else estimated from its chapters' input and output tokens"""
+    usage = load_model_usage(model_output_dir) if model_output_dir.exists() else None
+    if usage and usage.get("cost"):
+        return usage["cost"]
+    return estimate_chapters_cost(model_name, texts, input_tokens)
+
+
+def run_cascade(model_id: str, output_dir: Path, prompt_file: str, schedule_file: str,
+                chapters: Optional[List[str]]) -> Dict:
+    """
+    Generate every chapter with the lite model, escalate gate failures to premium
+
+    Lite outputs go to <model_id>/lite, escalations to <model_id>/premium and the
+    chosen chapter texts to <model_id>/cascade/<chapter_key>.txt.
+
+    Returns:
+        Per-chapter gate results, escalation fraction, and actual vs all-premium
+        time and cost (all-premium is estimated: measured premium seconds per
+        chapter, or run history, and premium pricing applied to each chapter's prompt
+        and output tokens); the citation-density gate applies only when the
+        prompt file has citation_requirements
+    """
+    lite_name = MODELS[model_id]["lite"]
+    full_name = MODELS[model_id]["full"]
+    model_dir = output_dir / model_id
+    prompt_config = load_prompt_config(prompt_file)
+    chapter_keys = load_chapter_keys(prompt_file, chapters)
+    # Citation density is only a gate for prompts that ask for citations
+    min_citations_per_1k = MIN_CITATIONS_PER_1K_WORDS if prompt_config.get("citation_requirements") else None
+
+    lite_result = run_model_generation(model_id, lite_name, output_dir, prompt_file, schedule_file,
+                                       chapters=chapters, model_output_dir=model_dir / "lite")
+    lite_files = find_chapter_outputs(model_dir / "lite", chapter_keys)
+    chapter_keys = chapter_keys or sorted(lite_files)
+    lite_texts = {k: strip_reasoning(f.read_text(encoding='utf-8')) for k, f in lite_files.items()}
+
+    gates = {}
+    for chapter_key in chapter_keys:
+        if chapter_key in lite_texts:
+            gates[chapter_key] = {"lite": check_chapter(lite_texts[chapter_key],
+                                                              min_citations_per_1k=min_citations_per_1k)}
+        else:
+            gates[chapter_key] = {"lite": {"passed": False, "failures": ["missing"]}}
+
+    to_escalate = [k for k in chapter_keys if not gates[k]["lite"]["passed"]]
+    print(f"\n  🚦 {model_id}: {len(chapter_keys) - len(to_escalate)}/{len(chapter_keys)} chapters passed the lite gate")
+    for chapter_key in to_escalate:
+        print(f"     ↑ {chapter_key}: {', '.join(gates[chapter_key]['lite']['failures'])}")
+
+    premium_result = None
+    premium_texts = {}
+    if to_escalate and full_name == lite_name:
+        print(f"  ⚠️  {model_id} has no premium tier - keeping lite output")
+    elif to_escalate:
+        premium_result = run_model_generation(model_id, full_name, output_dir, prompt_file, schedule_file,
+                                              chapters=to_escalate, model_output_dir=model_dir / "premium")
+        premium_files = find_chapter_outputs(model_dir / "premium", to_escalate)
+        premium_texts = {k: strip_reasoning(f.read_text(encoding='utf-8')) for k, f in premium_files.items()}
+        for chapter_key, text in premium_texts.items():
+            gates[chapter_key]["premium"] = check_chapter(text, min_citations_per_1k=min_citations_per_1k)
+
+    # Final chapter set: premium where escalated and produced, lite otherwise
+    cascade_dir = model_dir / "cascade"
+    cascade_dir.mkdir(parents=True, exist_ok=True)
+    final_texts = {}
+    for chapter_key in chapter_keys:
+        if chapter_key in premium_texts:
+            final_texts[chapter_key] = premium_texts[chapter_key]
+            gates[chapter_key]["source"] = "premium"
+        elif chapter_key in lite_texts:
+            final_texts[chapter_key] = lite_texts[chapter_key]
+            gates[chapter_key]["source"] = "lite"
+        else:
+            gates[chapter_key]["source"] = None
+            continue
+        atomic_write_text(cascade_dir / f"{chapter_key}.txt", final_texts[chapter_key])
+
+    # Actual time vs running every chapter on premium
+    lite_seconds = lite_result.get("duration_seconds", 0.0)
+    premium_seconds = premium_result.get("duration_seconds", 0.0) if premium_result else 0.0
+    if premium_result and premium_texts:
+        per_chapter = premium_seconds / len(premium_texts)
+        all_premium_seconds = per_chapter * len(chapter_keys)
+    else:
+        estimator = ETAEstimator(load_history())
+        all_premium_seconds = sum(estimator.predict(full_name, k) for k in chapter_keys)
+    actual_seconds = lite_seconds + premium_seconds
+
+    # Actual cost vs premium pricing for every chapter (lite lengths as the proxy where not escalated)
+    input_tokens = prompt_tokens(prompt_config, chapter_keys)
+    lite_cost = tier_cost(lite_name, model_dir / "lite", lite_texts, input_tokens)
+    premium_cost = tier_cost(full_name, model_dir / "premium", premium_texts, input_tokens) if premium_texts else 0.0
+    all_premium_cost = estimate_chapters_cost(full_name, final_texts, input_tokens)
+    actual_cost = lite_cost + premium_cost if lite_cost is not None and premium_cost is not None else None
+
+    return {
+        "model_id": model_id,
+        "lite_model": lite_name,
+        "premium_model": full_name,
+        "chapters": len(chapter_keys),
+        "escalated": len(to_escalate),
+        "escalation_fraction": len(to_escalate) / len(chapter_keys) if chapter_keys else 0.0,
+        "premium_chapters_used": len(premium_texts),
+        "actual_seconds": actual_seconds,
+        "all_premium_seconds_estimate": all_premium_seconds,
+        "seconds_saved": all_premium_seconds - actual_seconds,
+        "actual_cost": actual_cost,
+        "all_premium_cost_estimate": all_premium_cost,
+        "cost_saved": (all_premium_cost - actual_cost) if actual_cost is not None and all_premium_cost is not None else None,
+        "lite_result": lite_result,
+        "premium_result": premium_result,
+        "gates": gates,
+        "success": bool(final_texts),
+        "output_dir": str(cascade_dir)
+    }
+
+
+def print_cascade_report(results: List[Dict]):
+    """Escalation fraction and time/cost saved per model and overall"""
+    print(f"\n{'='*80}")
+    print("CASCADE REPORT")
+    print(f"{'='*80}\n")
+    print(f"{'Model':<20} {'Escalated':>12} {'Time (min)':>12} {'All-premium':>12} {'Cost':>10} {'All-premium':>12}")
+
+    def money(value):
+        return f"${value:.2f}" if value is not None else "-"
+
+    for r in results:
+        print(f"{r['model_id']:<20} {r['escalated']:>4}/{r['chapters']:<3} ({r['escalation_fraction']:>4.0%})"
+              f" {r['actual_seconds']/60:>12.1f} {r['all_premium_seconds_estimate']/60:>12.1f}"
+              f" {money(r['actual_cost']):>10} {money(r['all_premium_cost_estimate']):>12}")
+
+    chapters = sum(r["chapters"] for r in results)
+    escalated = sum(r["escalated"] for r in results)
+    saved_seconds = sum(r["seconds_saved"] for r in results)
+    costs_saved = [r["cost_saved"] for r in results]
+    if chapters:
+        print(f"\nEscalated {escalated}/{chapters} chapters ({escalated / chapters:.0%})")
+    print(f"Time saved vs all-premium: {saved_seconds/60:.1f} min (estimated)")
+    if costs_saved and None not in costs_saved:
+        print(f"Cost saved vs all-premium: ${sum(costs_saved):.2f} (estimated)")
+
+
 def main():
     parser = argparse.ArgumentParser(
         description="AR7 Multi-Model Comparison Generation",
@@ -181,6 +393,16 @@ def main():
         choices=list(MODELS.keys()),
         help="Generate with single model only"
     )
+    parser.add_argument(
+        "--cascade",
+        action="store_true",
+        help="Generate with lite models, escalate chapters failing the quality gate to premium"
+    )
+    parser.add_argument(
+        "--no-resume",
+        action="store_true",
+        help="Regenerate every model instead of resuming from the run journal"
+    )
     parser.add_argument(
         "--chapters",
         help="Comma-separated list of chapter keys (default: all 29)"
@@ -214,7 +436,11 @@ def main():
     # Determine which models to run
     models_to_run = []
 
-    if args.validation_run:
+    if args.cascade:
+        print("\n🚦 CASCADE RUN - lite first, premium for chapters failing the quality gate")
+        model_ids = [args.model] if args.model else list(MODELS.keys())
+        models_to_run = [(mid, f"{MODELS[mid]['lite']} → {MODELS[mid]['full']}") for mid in model_ids]
+    elif args.validation_run:
         print("\n🔬 VALIDATION RUN - Using lite/flash models")
         models_to_run = [(mid, MODELS[mid]["lite"]) for mid in MODELS.keys()]
     elif args.full_run:
@@ -241,33 +467,68 @@ def main():
         print(f"  • {mid:<25} {mname:<40} ({MODELS[mid]['provider']})")
     print()
 
+    install_signal_handlers()
+    try:
+        # One generation run per output directory; evaluators claim their own stages
+        claim_run(output_dir, "generation")
+    except RunLockedError as e:
+        print(f"❌ {e}")
+        return 1
+    journal = RunJournal(output_dir, resume=not args.no_resume)
+    mode = "cascade" if args.cascade else "validation" if args.validation_run else "full"
+    task_key = f"{mode}:{','.join(chapters) if chapters else 'all'}"
+    results_file = output_dir / "generation_results.json"
+
     # Run generations
     results = []
-    for model_id, model_name in models_to_run:
-        result = run_model_generation(
-            model_id=model_id,
-            model_name=model_name,
-            output_dir=output_dir,
-            prompt_file=args.prompt_file,
-            schedule_file=args.schedule_file,
-            chapters=chapters
-        )
-        results.append(result)
-
-        # Save intermediate results
-        results_file = output_dir / "generation_results.json"
-        with open(results_file, 'w') as f:
-            json.dump({
+    try:
+        for model_id, model_name in models_to_run:
+            done = journal.completed(model_id, model_name, task_key)
+            if done:
+                print(f"  ↩️  {model_id}: already generated - skipping")
+                results.append(done)
+                continue
+
+            if args.cascade:
+                result = run_cascade(model_id, output_dir, args.prompt_file, args.schedule_file, chapters)
+            else:
+                result = run_model_generation(
+                    model_id=model_id,
+                    model_name=model_name,
+                    output_dir=output_dir,
+                    prompt_file=args.prompt_file,
+                    schedule_file=args.schedule_file,
+                    chapters=chapters
+                )
+            results.append(result)
+            journal.record(model_id, model_name, task_key, result)
+
+            # Save intermediate results
+            atomic_write_json(results_file, {
                 "generated_at": datetime.now().isoformat(),
-                "mode": "validation" if args.validation_run else "full",
+                "mode": mode,
                 "results": results
-            }, f, indent=2)
+            })
+    except ShutdownRequested:
+        atomic_write_json(results_file, {
+            "generated_at": datetime.now().isoformat(),
+            "mode": mode,
+            "interrupted": True,
+            "results": results
+        })
+        print(f"\n⏸️  Interrupted after {len(results)}/{len(models_to_run)} models, pipeline subprocess stopped")
+        print(f"   Partial results: {results_file} - rerun the same command to resume")
+        return 130
 
     # Summary report
     print(f"\n{'='*80}")
     print(f"GENERATION COMPLETE")
     print(f"{'='*80}\n")
 
+    if args.cascade:
+        print_cascade_report(results)
+        print()
+
     successful = [r for r in results if r.get("success")]
     failed = [r for r in results if not r.get("success")]
 
@@ -18,13 +18,15 @@ Usage:
 """
 
 import argparse
-import json
 import subprocess
 import sys
 from pathlib import Path
 from datetime import datetime
 from typing import Dict, List
 
+from graceful_shutdown import install_signal_handlers, run_subprocess
+from output_writer import atomic_write_json
+
 
 def run_command(cmd: List[str], description: str, timeout: int = 600) -> Dict:
     """Run a command and return results"""
@@ -35,7 +37,7 @@ def run_command(cmd: List[str], description: str, timeout: int = 600) -> Dict:
 
     start_time = datetime.now()
     try:
-        result = subprocess.run(cmd, capture_output=True, text=True, timeout=timeout)
+        result = run_subprocess(cmd, timeout=timeout)
         end_time = datetime.now()
         duration = (end_time - start_time).total_seconds()
 
@@ -92,6 +94,7 @@ def main():
     )
 
     args = parser.parse_args()
+    install_signal_handlers()  # Ctrl-C also stops the running step's process group
 
     output_dir = Path(args.output_dir)
     output_dir.mkdir(parents=True, exist_ok=True)
@@ -138,8 +141,7 @@ def main():
         results["completed_at"] = datetime.now().isoformat()
 
         # Save results
-        with open(output_dir / "validation_results.json", 'w') as f:
-            json.dump(results, f, indent=2)
+        atomic_write_json(output_dir / "validation_results.json", results)
 
         return 1
 
@@ -246,8 +248,7 @@ def main():
     print(f"\n{'='*80}\n")
 
     # Save final results
-    with open(output_dir / "validation_results.json", 'w') as f:
-        json.dump(results, f, indent=2)
+    atomic_write_json(output_dir / "validation_results.json", results)
 
     return 0 if all_success else 1
 
@@ -4,14 +4,28 @@ run_fact_checking.py
 
 Fact-check sample chapters from AR7 model comparison.
 Uses an evaluator model to verify scientific claims.
+
+Chapters are checked in full: long ones are split into overlapping windows on
+section boundaries that are checked concurrently (see fact_check_chunking.py).
 """
 
 import argparse
-import json
 import sys
 from pathlib import Path
 from datetime import datetime
-from typing import Dict, List
+from typing import Dict, List, Optional
+
+import llm_client
+from json_repair import (DEFAULT_FIXER_MODEL, JSONRepairError, format_parse_stats, get_parse_stats,
+                         parse_evaluator_json)
+from reasoning_traces import strip_reasoning
+from usage_accounting import add_usage, empty_usage, get_usage_tracker, usage_scope
+from calibrated_language import analyze_calibrated_language, calibrated_note
+from citation_checker import check_chapter_citations, citation_note, requirements_for_model
+from fact_check_chunking import (DEFAULT_OVERLAP_WORDS, DEFAULT_WINDOW_WORDS, DEFAULT_WINDOW_WORKERS,
+                                 check_windows, count_by_severity, error_rate, make_windows, merge_issues,
+                                 window_note, window_summary)
+from output_writer import RunLockedError, atomic_write_json, atomic_write_text, claim_run
 
 # Try to import LiteLLM
 try:
@@ -29,7 +43,7 @@ Your task is to identify any factual errors, misrepresentations, or unsupported
 CHAPTER: {chapter_name}
 MODEL: {model_name}
 
-CONTENT:
+{citation_note}{calibrated_note}{window_note}CONTENT:
 {content}
 
 Please analyze this content and identify:
@@ -69,23 +83,34 @@ Respond in JSON format:
 If no significant issues are found, return an empty issues array.
 """
 
+FACT_CHECK_SCHEMA = {
+    "issues?": [{"location?": str, "type?": str, "severity?": str, "description": str, "correction?": str}],
+    "overall_assessment?": str,
+    "confidence_score?": (int, float)
+}
+
 
 def fact_check_chapter(chapter_file: Path, model_name: str,
-                       evaluator_model: str = "gemini/gemini-2.5-pro") -> Dict:
-    """Fact-check a single chapter"""
+                       evaluator_model: str = "gemini/gemini-2.5-pro",
+                       window_words: int = DEFAULT_WINDOW_WORDS,
+                       overlap_words: int = DEFAULT_OVERLAP_WORDS,
+                       window_workers: int = DEFAULT_WINDOW_WORKERS,
+                       citation_requirements: Optional[Dict] = None,
+                       json_fixer_model: str = DEFAULT_FIXER_MODEL) -> Dict:
+    """Fact-check a single chapter (in overlapping windows if longer than window_words)"""
 
     print(f"  🔍 Fact-checking: {chapter_file.name}")
 
     # Read chapter content
     try:
-        content = chapter_file.read_text(encoding='utf-8')
+        # Only the final answer is evaluated, never a <think> reasoning trace
+        content = strip_reasoning(chapter_file.read_text(encoding='utf-8'))
         word_count = len(content.split())
-
-        # Limit content for fact-checking (first 5000 words)
-        if word_count > 5000:
-            words = content.split()[:5000]
-            content = ' '.join(words) + "\n\n[Content truncated for fact-checking...]"
-            print(f"    ⚠️  Truncated to 5000 words for evaluation")
+        windows = make_windows(content, window_words, overlap_words)
+        citation_check = check_chapter_citations(content, citation_requirements)
+        calibrated_language = analyze_calibrated_language(content)
+        if len(windows) > 1:
+            print(f"    🪟 {word_count:,} words in {len(windows)} windows")
 
     except Exception as e:
         print(f"    ❌ Error reading file: {e}")
@@ -103,6 +128,9 @@ def fact_check_chapter(chapter_file: Path, model_name: str,
             "chapter": chapter_name,
             "model": model_name,
             "word_count": word_count,
+            "windows_checked": len(windows),
+            "citation_check": citation_check,
+            "calibrated_language": calibrated_language,
             "simulated": True,
             "total_issues": 0,
             "critical_issues": 0,
@@ -113,22 +141,65 @@ def fact_check_chapter(chapter_file: Path, model_name: str,
             "confidence_score": 0
         }
 
-    # Perform actual fact-checking
-    try:
+    def check(window: Dict) -> Dict:
         prompt = FACT_CHECK_PROMPT.format(
             chapter_name=chapter_name,
             model_name=model_name,
-            content=content
+            citation_note=citation_note(citation_check),
+            calibrated_note=calibrated_note(calibrated_language),
+            window_note=window_note(window, len(windows)),
+            content=window["text"]
         )
-
-        response = litellm.completion(
+        response = llm_client.completion(
             model=evaluator_model,
             messages=[{"role": "user", "content": prompt}],
             temperature=0.2,
             response_format={"type": "json_object"}
         )
+        try:
+            return parse_evaluator_json(response.choices[0].message.content, FACT_CHECK_SCHEMA,
+                                        model=evaluator_model, fixer=fix_json)
+        except JSONRepairError as e:
+            return {"issues": [], "error": str(e), "raw_response": e.raw}
+
+    def fix_json(fix_prompt: str) -> str:
+        return llm_client.completion(
+            model=json_fixer_model,
+            messages=[{"role": "user", "content": fix_prompt}],
+            temperature=0,
+            response_format={"type": "json_object"}
+        ).choices[0].message.content
 
-        result = json.loads(response.choices[0].message.content)
+    # Perform actual fact-checking
+    try:
+        with usage_scope(stage="fact_check", model_id=model_name, chapter_key=chapter_file.stem) as usage:
+            window_results = check_windows(windows, check, max_workers=window_workers)
+
+        failed_windows = [r["error"] for r in window_results if r.get("error")]
+        if len(failed_windows) == len(windows):
+            raise RuntimeError(failed_windows[0])
+
+        # Issues in the overlaps are reported by both windows - merge, then recount
+        issues = merge_issues(window_results, windows, text_fields=("location", "description"))
+        severities = count_by_severity(issues)
+        scores = [(r["confidence_score"], w["words"]) for r, w in zip(window_results, windows)
+                  if isinstance(r.get("confidence_score"), (int, float))]
+        scored_words = sum(words for _, words in scores)
+        assessments = [r["overall_assessment"] for r in window_results if r.get("overall_assessment")]
+        result = {
+            "total_issues": len(issues),
+            "critical_issues": severities["critical"],
+            "major_issues": severities["major"],
+            "minor_issues": severities["minor"],
+            "errors_found": len(issues),
+            "error_rate": error_rate(len(issues), word_count),
+            "issues": issues,
+            "overall_assessment": " ".join(assessments),
+            "confidence_score": sum(score * words for score, words in scores) / scored_words if scored_words else 0,
+            "windows_checked": len(windows),
+            "windows_failed": len(failed_windows),
+            "windows": window_summary(windows, window_results)
+        }
 
         print(f"    ✅ Issues found: {result.get('total_issues', 0)}")
         if result.get('critical_issues', 0) > 0:
@@ -144,7 +215,10 @@ def fact_check_chapter(chapter_file: Path, model_name: str,
             "model": model_name,
             "word_count": word_count,
             "simulated": False,
-            **result
+            **result,
+            "citation_check": citation_check,
+            "calibrated_language": calibrated_language,
+            "usage": usage.usage
         }
 
     except Exception as e:
@@ -164,8 +238,20 @@ def main():
                        help="Number of sample chapters to check per model")
     parser.add_argument("--evaluator", default="gemini/gemini-2.5-pro",
                        help="Model to use for fact-checking")
+    parser.add_argument("--json-fixer-model", default=DEFAULT_FIXER_MODEL,
+                       help="Cheap model asked to repair malformed evaluator JSON when local repair fails")
     parser.add_argument("--chapters",
                        help="Specific chapters to check (comma-separated)")
+    parser.add_argument("--window-words", type=int, default=DEFAULT_WINDOW_WORDS,
+                       help="Maximum words per fact-check window")
+    parser.add_argument("--window-overlap", type=int, default=DEFAULT_OVERLAP_WORDS,
+                       help="Words repeated between consecutive windows")
+    parser.add_argument("--window-workers", type=int, default=DEFAULT_WINDOW_WORKERS,
+                       help="Windows of one chapter checked concurrently")
+
+    parser.add_argument("--citation-requirements",
+                       help="Prompts file whose citation_requirements set the literature window and minimum "
+                       "(default: the prompts file recorded in each model's generation_summary.json)")
 
     args = parser.parse_args()
 
@@ -175,6 +261,12 @@ def main():
         print(f"ERROR: Output directory not found: {output_dir}")
         return 1
 
+    try:
+        claim_run(output_dir, "fact_check")
+    except RunLockedError as e:
+        print(f"❌ {e}")
+        return 1
+
     print(f"\n{'='*80}")
     print(f"AR7 FACT-CHECKING - SAMPLE CHAPTERS")
     print(f"{'='*80}")
@@ -205,6 +297,7 @@ def main():
             continue
 
         model_name = model_dir.name
+        citation_requirements = requirements_for_model(model_dir, args.citation_requirements)
         print(f"\n{'='*80}")
         print(f"MODEL: {model_name}")
         print(f"{'='*80}")
@@ -218,7 +311,11 @@ def main():
                 print(f"  ⚠️  Skipping {chapter_key} - file not found")
                 continue
 
-            result = fact_check_chapter(chapter_file, model_name, args.evaluator)
+            result = fact_check_chapter(chapter_file, model_name, args.evaluator,
+                                        window_words=args.window_words, overlap_words=args.window_overlap,
+                                        window_workers=args.window_workers,
+                                        citation_requirements=citation_requirements,
+                                        json_fixer_model=args.json_fixer_model)
             model_results.append(result)
 
         all_results[model_name] = model_results
@@ -243,15 +340,18 @@ def main():
         "generated_at": datetime.now().isoformat(),
         "evaluator_model": args.evaluator,
         "chapters_checked": target_chapters,
-        "models": all_results
+        "models": all_results,
+        "usage": get_usage_tracker().totals(stage="fact_check"),
+        "json_parsing": get_parse_stats()
     }
 
-    with open(results_file, 'w') as f:
-        json.dump(full_results, f, indent=2)
+    atomic_write_json(results_file, full_results)
 
     print(f"\n{'='*80}")
     print(f"FACT-CHECKING COMPLETE")
     print(f"{'='*80}")
+    for line in format_parse_stats(get_parse_stats()):
+        print(f"JSON parsing - {line}")
     print(f"Results saved to: {results_file}")
 
     # Generate summary report
@@ -273,13 +373,18 @@ def main():
         critical = sum(r.get("critical_issues", 0) for r in successful)
         major = sum(r.get("major_issues", 0) for r in successful)
         minor = sum(r.get("minor_issues", 0) for r in successful)
+        usage = empty_usage()
+        for result in successful:
+            add_usage(usage, result.get("usage"))
 
         report += f"### {model_name}\n\n"
         report += f"- Chapters checked: {len(successful)}\n"
         report += f"- Total issues: {total_issues}\n"
         report += f"- Critical: {critical} 🔴\n"
         report += f"- Major: {major} 🟡\n"
-        report += f"- Minor: {minor} 🟢\n\n"
+        report += f"- Minor: {minor} 🟢\n"
+        report += (f"- Evaluator usage: {usage['input_tokens']:,} input / {usage['output_tokens']:,} output tokens, "
+                   f"${usage['cost']:.4f}\n\n")
 
         if total_issues > 0:
             report += "**Issues by Chapter:**\n\n"
@@ -290,7 +395,7 @@ def main():
 
     report += f"\n## Detailed Results\n\nSee `fact_check_results.json` for complete details.\n"
 
-    report_file.write_text(report)
+    atomic_write_text(report_file, report)
     print(f"Report saved to: {report_file}")
     print(f"{'='*80}\n")
 
@@ -0,0 +1,101 @@
+#!/usr/bin/env python3
+"""
+run_journal.py
+
+Append-only journal of completed work, so an interrupted run can resume.
+
+Each finished task (a chapter, or a whole model for the subprocess runners) is
+appended to <output_dir>/run_journal.jsonl as one JSON line and fsynced before the
+runner moves on, so the journal survives Ctrl-C, SIGTERM and an OOM kill. A torn
+last line from a crash mid-write is ignored on load.
+
+On the next run with the same output directory, tasks whose latest journal entry
+succeeded - and whose output still exists - are reused instead of regenerated.
+"""
+
+import json
+import os
+import threading
+from datetime import datetime
+from pathlib import Path
+from typing import Dict, List, Optional
+
+JOURNAL_FILENAME = "run_journal.jsonl"
+
+
+class RunJournal:
+    """Durable record of finished (model_id, task_key) results for one output directory"""
+
+    def __init__(self, output_dir: Path, resume: bool = True):
+        """
+        Args:
+            output_dir: Run output directory; the journal lives at output_dir/run_journal.jsonl
+            resume: Load the existing journal (False starts over, keeping the old file as .bak)
+        """
+        self.path = Path(output_dir) / JOURNAL_FILENAME
+        self.path.parent.mkdir(parents=True, exist_ok=True)
+        self._lock = threading.Lock()
+        self.entries = {}  # (model_id, task_key) → latest entry
+
+        if self.path.exists():
+            if resume:
+                self._load()
+            else:
+                os.replace(self.path, self.path.with_suffix(".jsonl.bak"))
+
+    def _load(self):
+        with open(self.path, encoding="utf-8") as f:
+            for line in f:
+                try:
+                    entry = json.loads(line)
+                except json.JSONDecodeError:
+                    continue  # Torn write from an interrupted run
+                self.entries[(entry["model_id"], entry["task_key"])] = entry
+
+    def record(self, model_id: str, model_name: str, task_key: str, result: Dict):
+        """Append a finished task's result and fsync before returning"""
+        entry = {
+            "model_id": model_id,
+            "model_name": model_name,
+            "task_key": task_key,
+            "recorded_at": datetime.now().isoformat(),
+            "result": result
+        }
+        line = json.dumps(entry) + "\n"
+        with self._lock:
+            with open(self.path, "a", encoding="utf-8") as f:
+                f.write(line)
+                f.flush()
+                os.fsync(f.fileno())
+            self.entries[(model_id, task_key)] = entry
+
+    def completed(self, model_id: str, model_name: str, task_key: str) -> Optional[Dict]:
+        """
+        The journaled result if this task already succeeded with the same model and
+        its output file/directory still exists, else None
+        """
+        with self._lock:
+            entry = self.entries.get((model_id, task_key))
+        if not entry or entry["model_name"] != model_name or not entry["result"].get("success"):
+            return None
+
+        output = entry["result"].get("output_file") or entry["result"].get("output_dir")
+        if output and not Path(output).exists():
+            return None
+        return {**entry["result"], "resumed": True}
+
+    def results(self, model_id: str, task_keys: List[str]) -> List[Dict]:
+        """Latest journaled result of each task that has one, in task_keys order"""
+        with self._lock:
+            return [self.entries[(model_id, key)]["result"] for key in task_keys
+                    if (model_id, key) in self.entries]
+
+    def counts(self) -> Dict:
+        """Journaled tasks by outcome"""
+        with self._lock:
+            results = [e["result"] for e in self.entries.values()]
+        return {
+            "tasks": len(results),
+            "successful": sum(1 for r in results if r.get("success")),
+            "failed": sum(1 for r in results if not r.get("success"))
+        }
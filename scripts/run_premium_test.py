@@ -4,6 +4,9 @@ run_premium_test.py
 
 Premium tier test: Technical Summary + Chapter 2 with all 7 premium models.
 Includes full evaluation pipeline and PDF generation.
+
+Finished chapters are journaled (run_journal.jsonl) so a rerun with the same
+--output-dir resumes; Ctrl-C/SIGTERM writes partial summaries before exiting.
 """
 
 import argparse
@@ -19,16 +22,18 @@ from typing import Dict, List
 from load_env import load_parent_env
 load_parent_env()
 
-sys.path.insert(0, str(Path(__file__).parent / "nimble" / "codexes-factory" / "src"))
+# Every call goes through llm_client: the capability cache, the HF wait and usage recording
+from llm_client import llm_call_with_structured_output
 
-try:
-    from nimble_llm_caller import llm_call_with_structured_output
-except ImportError:
-    import litellm
-    litellm.drop_params = True
-    def llm_call_with_structured_output(messages, model, **kwargs):
-        response = litellm.completion(model=model, messages=messages, **kwargs)
-        return response.choices[0].message.content
+from reasoning_traces import save_reasoning
+from usage_accounting import get_usage_tracker, summarize_usage, usage_scope
+from response_classifier import call_with_classification
+from hf_warmup import HFWarmup, is_huggingface_model
+from eta_estimator import ETAEstimator, format_duration, load_history, print_accuracy
+from scheduler import MatrixScheduler, parse_deadline, print_makespan_report
+from graceful_shutdown import ShutdownRequested, install_signal_handlers
+from run_journal import RunJournal
+from output_writer import RunLockedError, WriteBatch, atomic_write_json, atomic_write_text, claim_run
 
 # All 7 models - PREMIUM TIER
 PREMIUM_MODELS = {
@@ -47,8 +52,9 @@ DEFAULT_CHAPTERS = [
 ]
 
 
-def generate_chapter(chapter_key: str, prompt_data: Dict, model_name: str, output_dir: Path) -> Dict:
-    """Generate a single chapter"""
+def generate_chapter(chapter_key: str, prompt_data: Dict, model_name: str, output_dir: Path,
+                     fallback_model: str = None, timeout: float = None) -> Dict:
+    """Generate a single chapter (timeout: request timeout in deadline mode)"""
     print(f"    📝 {chapter_key}")
 
     messages = prompt_data.get("messages", [])
@@ -59,31 +65,63 @@ def generate_chapter(chapter_key: str, prompt_data: Dict, model_name: str, outpu
 
     start_time = time.time()
     try:
-        response = llm_call_with_structured_output(
-            messages=messages,
-            model=model_name,
-            temperature=params.get("temperature", 0.3),
-            max_tokens=params.get("max_tokens", 35000)
-        )
-
-        duration = time.time() - start_time
+        with usage_scope(stage="generation", requested_model=model_name, chapter_key=chapter_key) as usage:
+            outcome = call_with_classification(
+                lambda model: llm_call_with_structured_output(
+                    messages=messages,
+                    model=model,
+                    temperature=params.get("temperature", 0.3),
+                    max_tokens=params.get("max_tokens", 35000),
+                    **({"timeout": timeout} if timeout else {})
+                ),
+                model_name,
+                fallback_model=fallback_model
+            )
+        response = outcome["text"]
+        classification = outcome["classification"]
+
+        cold_start = outcome["cold_start_seconds"]
+        duration = time.time() - start_time - cold_start
+
+        if not classification["usable"]:
+            print(f"       ❌ REJECTED: {classification['label']} after {len(outcome['attempts'])} attempt(s)")
+            return {
+                "success": False,
+                "chapter_key": chapter_key,
+                "error": f"rejected: {classification['label']}",
+                "response_label": classification["label"],
+                "attempts": outcome["attempts"],
+                "usage": usage.usage
+            }
+
         word_count = len(response.split())
 
-        # Save
-        output_file = output_dir / f"{chapter_key}.txt"
-        output_file.write_text(response, encoding='utf-8')
-
-        metadata_file = output_dir / f"{chapter_key}_metadata.json"
-        metadata = {
-            "chapter_key": chapter_key,
-            "model": model_name,
-            "tier": "premium",
-            "generated_at": datetime.now().isoformat(),
-            "duration_seconds": duration,
-            "word_count": word_count,
-            "params": params
-        }
-        metadata_file.write_text(json.dumps(metadata, indent=2), encoding='utf-8')
+        # Chapter, reasoning trace and metadata become visible to readers together
+        with WriteBatch() as batch:
+            output_file = output_dir / f"{chapter_key}.txt"
+            batch.write_text(output_file, response)
+
+            # Reasoning traces (<think>...</think>) are kept out of the chapter text
+            reasoning_stats = save_reasoning(output_dir, chapter_key, outcome["reasoning"],
+                                             write=batch.write_text)
+
+            metadata_file = output_dir / f"{chapter_key}_metadata.json"
+            metadata = {
+                "chapter_key": chapter_key,
+                "model": outcome["model"],
+                "fallback_used": outcome["fallback_used"],
+                "response_label": classification["label"],
+                "attempts": outcome["attempts"],
+                "tier": "premium",
+                "generated_at": datetime.now().isoformat(),
+                "duration_seconds": duration,
+                "cold_start_seconds": cold_start,
+                "word_count": word_count,
+                **reasoning_stats,
+                "usage": usage.usage,
+                "params": params
+            }
+            batch.write_json(metadata_file, metadata)
 
         print(f"       ✅ {word_count:,} words in {duration:.1f}s")
 
@@ -92,6 +130,10 @@ def generate_chapter(chapter_key: str, prompt_data: Dict, model_name: str, outpu
             "chapter_key": chapter_key,
             "word_count": word_count,
             "duration": duration,
+            "cold_start_seconds": cold_start,
+            "response_label": classification["label"],
+            "reasoning_tokens": reasoning_stats["reasoning_tokens"],
+            "usage": usage.usage,
             "output_file": str(output_file)
         }
 
@@ -106,8 +148,16 @@ def generate_chapter(chapter_key: str, prompt_data: Dict, model_name: str, outpu
 
 
 def generate_model(model_id: str, model_name: str, prompts_data: Dict,
-                  output_dir: Path, chapters: List[str]) -> Dict:
-    """Generate chapters for one model"""
+                  output_dir: Path, chapters: List[str], warmup: Dict = None,
+                  fallback_model: str = None, eta: ETAEstimator = None, journal: RunJournal = None) -> Dict:
+    """Generate chapters for one model
+
+    Args:
+        warmup: HFWarmup result for HuggingFace-hosted models (cold start reported separately)
+        fallback_model: Model used when this model's responses keep failing classification
+        eta: Run-wide ETA estimator, updated and printed as each chapter completes
+        journal: Run journal - chapters it has as done are reused, new results are appended
+    """
 
     print(f"\n{'='*80}")
     print(f"PREMIUM MODEL: {model_id}")
@@ -123,15 +173,35 @@ def generate_model(model_id: str, model_name: str, prompts_data: Dict,
             print(f"    ⚠️  Skipping {chapter_key} - not in prompts")
             continue
 
-        result = generate_chapter(chapter_key, prompts_data[chapter_key], model_name, model_output_dir)
+        done = journal.completed(model_id, model_name, chapter_key) if journal else None
+        if done:
+            print(f"    ↩️  {chapter_key} - already generated")
+            results.append(done)
+            continue
+
+        result = generate_chapter(chapter_key, prompts_data[chapter_key], model_name, model_output_dir,
+                                  fallback_model=fallback_model)
         results.append(result)
+        if journal:
+            journal.record(model_id, model_name, chapter_key, result)
+        if eta:
+            eta.complete(model_name, chapter_key, result.get("duration"))
+            print(eta.status_line(model_name))
         time.sleep(2)  # Rate limiting for premium
 
-    # Summary
+    return summarize_model(model_id, model_name, results, model_output_dir, warmup)
+
+
+def summarize_model(model_id: str, model_name: str, results: List[Dict], model_output_dir: Path,
+                    warmup: Dict = None) -> Dict:
+    """Build and save generation_summary.json for one model's chapter results"""
     successful = [r for r in results if r.get("success")]
     failed = [r for r in results if not r.get("success")]
     total_words = sum(r.get("word_count", 0) for r in successful)
     total_time = sum(r.get("duration", 0) for r in successful)
+    cold_start_time = sum(r.get("cold_start_seconds", 0) for r in results)
+    if warmup:
+        cold_start_time += warmup["cold_start_seconds"]
 
     summary = {
         "model_id": model_id,
@@ -140,21 +210,84 @@ def generate_model(model_id: str, model_name: str, prompts_data: Dict,
         "total_chapters": len(results),
         "successful": len(successful),
         "failed": len(failed),
+        "skipped": sum(1 for r in failed if r.get("skipped")),
+        "resumed": sum(1 for r in successful if r.get("resumed")),
         "total_words": total_words,
         "total_time": total_time,
+        "cold_start_time": cold_start_time,
+        "warmup": warmup,
         "avg_words": total_words / len(successful) if successful else 0,
+        "usage": summarize_usage(results, total_words),
         "results": results
     }
 
     summary_file = model_output_dir / "generation_summary.json"
-    summary_file.write_text(json.dumps(summary, indent=2), encoding='utf-8')
+    atomic_write_json(summary_file, summary)
 
-    status = "✅" if failed == 0 else "⚠️"
-    print(f"  {status} {len(successful)}/{len(results)} successful, {total_words:,} words, {total_time:.1f}s")
+    status = "✅" if not failed else "⚠️"
+    print(f"  {status} {model_id}: {len(successful)}/{len(results)} successful, {total_words:,} words, {total_time:.1f}s")
 
     return summary
 
 
+def generate_matrix_deadline(prompts_data: Dict, output_dir: Path, chapters: List[str], warmup: HFWarmup,
+                             deadline_seconds: float, fallback_model: str = None, eta: ETAEstimator = None,
+                             journal: RunJournal = None):
+    """Generate only the cells predicted to finish before the deadline
+
+    Complete chapters across all models are planned first; providers run side by
+    side, one request at a time each, longest predicted chapter first. Cells the
+    journal already has as done are reused rather than scheduled.
+
+    Returns:
+        (summaries by model_id, makespan report including skipped cells and why)
+    """
+    tasks = []
+    resumed = {}
+    for model_id, model_name in PREMIUM_MODELS.items():
+        (output_dir / model_id).mkdir(parents=True, exist_ok=True)
+        for chapter_key in chapters:
+            if chapter_key not in prompts_data:
+                continue
+            done = journal.completed(model_id, model_name, chapter_key) if journal else None
+            if done:
+                resumed[(model_id, chapter_key)] = done
+            else:
+                tasks.append({"model_id": model_id, "model_name": model_name, "chapter_key": chapter_key})
+
+    scheduler = MatrixScheduler(
+        predict=eta.predict if eta else None,
+        on_skip=(lambda task: eta.complete(task["model_name"], task["chapter_key"], None)) if eta else None
+    )
+
+    def run_task(task: Dict) -> Dict:
+        model_name = task["model_name"]
+        waited_from = time.time()
+        warmup.wait(model_name)
+        timeout = max(1.0, task["timeout"] - (time.time() - waited_from))
+        print(f"  ▶️  {task['model_id']}")
+        result = generate_chapter(task["chapter_key"], prompts_data[task["chapter_key"]], model_name,
+                                  output_dir / task["model_id"], fallback_model=fallback_model, timeout=timeout)
+        if journal:
+            journal.record(task["model_id"], model_name, task["chapter_key"], result)
+        if eta:
+            eta.complete(model_name, task["chapter_key"], result.get("duration"))
+            print(eta.status_line(model_name))
+        return result
+
+    results = scheduler.run(tasks, run_task, deadline_seconds=deadline_seconds)
+
+    new_results = {(t["model_id"], t["chapter_key"]): r for t, r in zip(tasks, results)}
+    summaries_by_model = {}
+    for model_id, model_name in PREMIUM_MODELS.items():
+        model_results = [resumed.get((model_id, c)) or new_results[(model_id, c)] for c in chapters
+                         if (model_id, c) in resumed or (model_id, c) in new_results]
+        summaries_by_model[model_id] = summarize_model(model_id, model_name, model_results,
+                                                       output_dir / model_id, warmup.wait(model_name))
+
+    return summaries_by_model, scheduler.makespan_report()
+
+
 def compile_markdown_book(model_id: str, model_dir: Path, chapters: List[str]) -> str:
     """Compile chapters into markdown book"""
 
@@ -175,7 +308,7 @@ def compile_markdown_book(model_id: str, model_dir: Path, chapters: List[str]) -
         book_md += "\n\n---\n\n"
 
     book_file = model_dir / f"AR7_PREMIUM_{model_id.upper()}.md"
-    book_file.write_text(book_md, encoding='utf-8')
+    atomic_write_text(book_file, book_md)
 
     return str(book_file)
 
@@ -211,11 +344,43 @@ def generate_pdf(markdown_file: Path, pdf_dir: Path) -> bool:
         return False
 
 
+def flush_interrupted(output_dir: Path, chapters: List[str], journal: RunJournal, eta: ETAEstimator) -> int:
+    """Write per-model and master summaries of the journaled work after Ctrl-C/SIGTERM"""
+    summaries = [summarize_model(model_id, model_name, journal.results(model_id, chapters), output_dir / model_id)
+                 for model_id, model_name in PREMIUM_MODELS.items()]
+    master_summary = {
+        "generated_at": datetime.now().isoformat(),
+        "test_type": "premium_tier_technical_summary_plus_chapter2",
+        "tier": "premium",
+        "interrupted": True,
+        "chapters": chapters,
+        "models": summaries,
+        "journal": journal.counts(),
+        "total_words": sum(s["total_words"] for s in summaries),
+        "total_cost": sum(s["usage"]["cost"] for s in summaries),
+        "eta_accuracy": eta.accuracy_report()
+    }
+    atomic_write_json(output_dir / "PREMIUM_TEST_SUMMARY.json", master_summary)
+    get_usage_tracker().save(output_dir / "usage_log.json")
+
+    counts = journal.counts()
+    print(f"\n⏸️  Interrupted: {counts['successful']} chapters done, partial summary in {output_dir}/")
+    print(f"   Rerun the same command to resume")
+    return 130
+
+
 def main():
     parser = argparse.ArgumentParser(description="Premium Tier AR7 Test")
     parser.add_argument("--chapters", default="technical_summary,chapter_2_vulnerabilities_impacts_risks")
     parser.add_argument("--output-dir", default="output/ar7_premium_test")
     parser.add_argument("--prompts-file", default="prompts/ar7_model_comparison_prompts.json")
+    parser.add_argument("--fallback-model",
+                       help="Model to use when a response is refused/empty/short after retries")
+    parser.add_argument("--deadline",
+                       help="Finish by this time (2h, 90m or 14:30): run only the cells predicted to fit, "
+                            "complete chapters across models first")
+    parser.add_argument("--no-resume", action="store_true",
+                       help="Regenerate every chapter instead of resuming from the run journal")
 
     args = parser.parse_args()
 
@@ -237,12 +402,52 @@ def main():
     print(f"Total outputs: {len(PREMIUM_MODELS) * len(chapters)}")
     print(f"{'='*80}\n")
 
+    deadline_at = time.time() + parse_deadline(args.deadline) if args.deadline else None
+
+    install_signal_handlers()
+    try:
+        # One generation run per output directory; evaluators claim their own stages
+        claim_run(output_dir, "generation")
+    except RunLockedError as e:
+        print(f"❌ {e}")
+        return 1
+    journal = RunJournal(output_dir, resume=not args.no_resume)
+
     # PHASE 1: Generate all models
     print("PHASE 1: GENERATION")
-    all_summaries = []
-    for model_id, model_name in PREMIUM_MODELS.items():
-        summary = generate_model(model_id, model_name, prompts_data, output_dir, chapters)
-        all_summaries.append(summary)
+    # HuggingFace serverless endpoints warm up in the background while the other
+    # models generate; their requests are only scheduled once warmup completes
+    warmup = HFWarmup(list(PREMIUM_MODELS.values()))
+    warmup.start()
+
+    # ETA seeded from the durations of earlier runs, refined as chapters complete
+    eta = ETAEstimator(load_history())
+    eta.plan([(name, c) for model_id, name in PREMIUM_MODELS.items() for c in chapters
+              if c in prompts_data and not journal.completed(model_id, name, c)])
+    print(f"⏳ Estimated generation time: {format_duration(eta.remaining())}\n")
+
+    makespan_report = None
+    try:
+        if deadline_at:
+            summaries_by_model, makespan_report = generate_matrix_deadline(
+                prompts_data, output_dir, chapters, warmup, deadline_at - time.time(),
+                fallback_model=args.fallback_model, eta=eta, journal=journal
+            )
+            print_makespan_report(makespan_report)
+        else:
+            summaries_by_model = {}
+            generation_order = sorted(PREMIUM_MODELS.items(), key=lambda item: is_huggingface_model(item[1]))
+            for model_id, model_name in generation_order:
+                warmup_result = warmup.wait(model_name)
+                summaries_by_model[model_id] = generate_model(
+                    model_id, model_name, prompts_data, output_dir, chapters, warmup=warmup_result,
+                    fallback_model=args.fallback_model, eta=eta, journal=journal
+                )
+    except ShutdownRequested:
+        return flush_interrupted(output_dir, chapters, journal, eta)
+    eta_accuracy = eta.accuracy_report()
+    print_accuracy(eta_accuracy)
+    all_summaries = [summaries_by_model[model_id] for model_id in PREMIUM_MODELS]
 
     # PHASE 2: Compile markdown books
     print(f"\n{'='*80}")
@@ -290,7 +495,9 @@ def main():
 
     for summary in all_summaries:
         status = "✅" if summary["failed"] == 0 else "⚠️"
-        print(f"{status} {summary['model_id']:<25} {summary['successful']}/{summary['total_chapters']} chapters, {summary['total_words']:,} words")
+        print(f"{status} {summary['model_id']:<25} {summary['successful']}/{summary['total_chapters']} chapters, {summary['total_words']:,} words, ${summary['usage']['cost']:.4f}")
+        if summary["cold_start_time"] > 0:
+            print(f"   {'':<25} cold start {summary['cold_start_time']:.1f}s (excluded from generation time)")
 
     # Save master summary
     master_summary = {
@@ -302,11 +509,20 @@ def main():
         "total_models": len(all_summaries),
         "total_chapters": sum(s["successful"] for s in all_summaries),
         "total_words": sum(s["total_words"] for s in all_summaries),
-        "pdfs_generated": pdf_count
+        "total_input_tokens": sum(s["usage"]["input_tokens"] for s in all_summaries),
+        "total_output_tokens": sum(s["usage"]["output_tokens"] for s in all_summaries),
+        "total_cost": sum(s["usage"]["cost"] for s in all_summaries),
+        "total_cold_start_time": sum(s["cold_start_time"] for s in all_summaries),
+        "pdfs_generated": pdf_count,
+        "eta_accuracy": eta_accuracy,
+        "deadline": args.deadline,
+        "makespan": makespan_report
     }
 
     master_file = output_dir / "PREMIUM_TEST_SUMMARY.json"
-    master_file.write_text(json.dumps(master_summary, indent=2), encoding='utf-8')
+    atomic_write_json(master_file, master_summary)
+
+    get_usage_tracker().save(output_dir / "usage_log.json")
 
     print(f"\n📊 Summary: {master_file}")
     print(f"📁 PDFs: {pdf_dir}/")
@@ -7,11 +7,19 @@ Evaluates accuracy, style, intelligence, and IPCC compliance.
 """
 
 import argparse
-import json
 import sys
 from pathlib import Path
 from datetime import datetime
-from typing import Dict, List
+from typing import Dict, List, Optional
+
+import llm_client
+from calibrated_language import analyze_calibrated_language, calibrated_note
+from citation_checker import check_chapter_citations, citation_note, requirements_for_model
+from json_repair import (DEFAULT_FIXER_MODEL, JSONRepairError, format_parse_stats, get_parse_stats,
+                         parse_evaluator_json)
+from reasoning_traces import strip_reasoning
+from usage_accounting import add_usage, empty_usage, get_usage_tracker, usage_scope
+from output_writer import RunLockedError, atomic_write_json, atomic_write_text, claim_run
 
 try:
     import litellm
@@ -29,6 +37,13 @@ CHAPTER: {chapter_name}
 MODEL: {model_name}
 WORD COUNT: {word_count}
 
+{citation_note}Use the automated citation check above when rating CITATION QUALITY - it covers the whole
+chapter, including a References section the content below may not reach.
+
+{calibrated_note}Use the automated calibrated-language check above when rating UNCERTAINTY LANGUAGE - it
+covers the whole chapter. Start from the rule-based score and move it by at most {max_adjustment:g} point,
+only according to whether the flagged passages are genuine misuses.
+
 CONTENT:
 {content}
 
@@ -99,17 +114,48 @@ Provide scores and brief justifications in JSON:
 }}
 """
 
+SCORE_FIELDS = ["accuracy", "ipcc_style", "intelligence", "comprehensiveness", "uncertainty_language",
+                "citation_quality", "synthesis_quality"]
+MAX_UNCERTAINTY_ADJUSTMENT = 1.0  # How far the judge may move the rule-based uncertainty_language score
+QUALITY_SCORING_SCHEMA = {
+    **{field: (int, float) for field in SCORE_FIELDS},
+    **{f"{field}_justification?": str for field in SCORE_FIELDS},
+    "overall_score": (int, float),
+    "strengths?": [str],
+    "weaknesses?": [str],
+    "overall_assessment?": str
+}
+
+
+def uncertainty_language_score(rule_score: float, judge_score: Optional[float], flagged: bool) -> float:
+    """
+    The rule-based sub-score, adjusted by the judge by at most MAX_UNCERTAINTY_ADJUSTMENT
+
+    The judge only reviews the passages the analyzer flagged, so with none flagged
+    the rule-based score stands.
+    """
+    if judge_score is None or not flagged:
+        return rule_score
+    adjusted = min(rule_score + MAX_UNCERTAINTY_ADJUSTMENT, max(rule_score - MAX_UNCERTAINTY_ADJUSTMENT, judge_score))
+    return round(min(7.0, max(1.0, adjusted)), 1)
+
 
 def score_chapter(chapter_file: Path, model_name: str,
-                 evaluator_model: str = "gemini/gemini-2.5-pro") -> Dict:
+                 evaluator_model: str = "gemini/gemini-2.5-pro",
+                 citation_requirements: Optional[Dict] = None,
+                 json_fixer_model: str = DEFAULT_FIXER_MODEL) -> Dict:
     """Score a single chapter"""
 
     print(f"  📊 Scoring: {chapter_file.name}")
 
     # Read chapter
     try:
-        content = chapter_file.read_text(encoding='utf-8')
+        # Only the final answer is evaluated, never a <think> reasoning trace
+        content = strip_reasoning(chapter_file.read_text(encoding='utf-8'))
         word_count = len(content.split())
+        # Before truncation - the reference list is at the end
+        citation_check = check_chapter_citations(content, citation_requirements)
+        calibrated_language = analyze_calibrated_language(content)
 
         # Truncate for evaluation (first 3000 words)
         if word_count > 3000:
@@ -131,12 +177,15 @@ def score_chapter(chapter_file: Path, model_name: str,
             "chapter": chapter_name,
             "model": model_name,
             "word_count": word_count,
+            "citation_check": citation_check,
+            "calibrated_language": calibrated_language,
             "simulated": True,
             "accuracy": random.randint(5, 7),
             "ipcc_style": random.randint(5, 7),
             "intelligence": random.randint(4, 6),
             "comprehensiveness": random.randint(5, 7),
-            "uncertainty_language": random.randint(5, 6),
+            "uncertainty_language": calibrated_language["uncertainty_language_score"],
+            "uncertainty_language_rule": calibrated_language["uncertainty_language_score"],
             "citation_quality": random.randint(4, 6),
             "synthesis_quality": random.randint(4, 6),
             "overall_score": random.uniform(5.0, 6.5),
@@ -151,17 +200,41 @@ def score_chapter(chapter_file: Path, model_name: str,
             chapter_name=chapter_name,
             model_name=model_name,
             word_count=word_count,
+            citation_note=citation_note(citation_check),
+            calibrated_note=calibrated_note(calibrated_language),
+            max_adjustment=MAX_UNCERTAINTY_ADJUSTMENT,
             content=content
         )
 
-        response = litellm.completion(
-            model=evaluator_model,
-            messages=[{"role": "user", "content": prompt}],
-            temperature=0.2,
-            response_format={"type": "json_object"}
-        )
-
-        result = json.loads(response.choices[0].message.content)
+        with usage_scope(stage="scoring", model_id=model_name, chapter_key=chapter_file.stem) as usage:
+            response = llm_client.completion(
+                model=evaluator_model,
+                messages=[{"role": "user", "content": prompt}],
+                temperature=0.2,
+                response_format={"type": "json_object"}
+            )
+
+        def fix_json(fix_prompt: str) -> str:
+            with usage_scope(stage="scoring", model_id=model_name, chapter_key=chapter_file.stem):
+                return llm_client.completion(
+                    model=json_fixer_model,
+                    messages=[{"role": "user", "content": fix_prompt}],
+                    temperature=0,
+                    response_format={"type": "json_object"}
+                ).choices[0].message.content
+
+        result = parse_evaluator_json(response.choices[0].message.content, QUALITY_SCORING_SCHEMA,
+                                      model=evaluator_model, fixer=fix_json)
+
+        # The rule-based analysis covers the whole chapter, the judge only the first 3000 words -
+        # the sub-score is the rule-based one, moved by the judge at most for the flagged passages
+        rule_score = calibrated_language["uncertainty_language_score"]
+        result["uncertainty_language_judge"] = result["uncertainty_language"]
+        result["uncertainty_language_rule"] = rule_score
+        result["uncertainty_language"] = uncertainty_language_score(
+            rule_score, result["uncertainty_language"], bool(calibrated_language["flagged_passages"]))
+        result["overall_score_judge"] = result["overall_score"]
+        result["overall_score"] = sum(result[field] for field in SCORE_FIELDS) / len(SCORE_FIELDS)
 
         print(f"    ✅ Overall score: {result.get('overall_score', 0):.1f}/7.0")
 
@@ -171,7 +244,20 @@ def score_chapter(chapter_file: Path, model_name: str,
             "model": model_name,
             "word_count": word_count,
             "simulated": False,
-            **result
+            **result,
+            "citation_check": citation_check,
+            "calibrated_language": calibrated_language,
+            "usage": usage.usage
+        }
+
+    except JSONRepairError as e:
+        print(f"    ❌ Unparseable evaluator response: {e}")
+        return {
+            "success": False,
+            "chapter": chapter_name,
+            "model": model_name,
+            "error": str(e),
+            "raw_response": e.raw
         }
 
     except Exception as e:
@@ -191,8 +277,13 @@ def main():
                        help="Number of sample chapters to score per model")
     parser.add_argument("--evaluator", default="gemini/gemini-2.5-pro",
                        help="Model to use for scoring")
+    parser.add_argument("--json-fixer-model", default=DEFAULT_FIXER_MODEL,
+                       help="Cheap model asked to repair malformed evaluator JSON when local repair fails")
     parser.add_argument("--chapters",
                        help="Specific chapters to score (comma-separated)")
+    parser.add_argument("--citation-requirements",
+                       help="Prompts file whose citation_requirements set the literature window and minimum "
+                       "(default: the prompts file recorded in each model's generation_summary.json)")
 
     args = parser.parse_args()
 
@@ -202,6 +293,12 @@ def main():
         print(f"ERROR: Output directory not found: {output_dir}")
         return 1
 
+    try:
+        claim_run(output_dir, "scoring")
+    except RunLockedError as e:
+        print(f"❌ {e}")
+        return 1
+
     print(f"\n{'='*80}")
     print(f"AR7 QUALITY SCORING - SAMPLE CHAPTERS")
     print(f"{'='*80}")
@@ -233,6 +330,7 @@ def main():
             continue
 
         model_name = model_dir.name
+        citation_requirements = requirements_for_model(model_dir, args.citation_requirements)
         print(f"\n{'='*80}")
         print(f"MODEL: {model_name}")
         print(f"{'='*80}")
@@ -246,7 +344,9 @@ def main():
                 print(f"  ⚠️  Skipping {chapter_key} - file not found")
                 continue
 
-            result = score_chapter(chapter_file, model_name, args.evaluator)
+            result = score_chapter(chapter_file, model_name, args.evaluator,
+                                   citation_requirements=citation_requirements,
+                                   json_fixer_model=args.json_fixer_model)
             model_results.append(result)
 
         all_results[model_name] = model_results
@@ -274,15 +374,18 @@ def main():
         "generated_at": datetime.now().isoformat(),
         "evaluator_model": args.evaluator,
         "chapters_scored": target_chapters,
-        "models": all_results
+        "models": all_results,
+        "usage": get_usage_tracker().totals(stage="scoring"),
+        "json_parsing": get_parse_stats()
     }
 
-    with open(results_file, 'w') as f:
-        json.dump(full_results, f, indent=2)
+    atomic_write_json(results_file, full_results)
 
     print(f"\n{'='*80}")
     print(f"QUALITY SCORING COMPLETE")
     print(f"{'='*80}")
+    for line in format_parse_stats(get_parse_stats()):
+        print(f"JSON parsing - {line}")
     print(f"Results saved to: {results_file}")
 
     # Generate report
@@ -345,6 +448,12 @@ def main():
 
             report += f"| {metric_name} | {avg:.2f}/7.0 | {rating} |\n"
 
+        usage = empty_usage()
+        for r in successful:
+            add_usage(usage, r.get("usage"))
+        report += (f"\nEvaluator usage: {usage['input_tokens']:,} input / {usage['output_tokens']:,} output tokens, "
+                   f"${usage['cost']:.4f}\n")
+
         report += "\n"
 
         # Strengths and weaknesses
@@ -383,7 +492,7 @@ def main():
 
     report += f"\n## Detailed Results\n\nSee `quality_scores.json` for complete details and justifications.\n"
 
-    report_file.write_text(report)
+    atomic_write_text(report_file, report)
     print(f"Report saved to: {report_file}")
     print(f"{'='*80}\n")
 
@@ -0,0 +1,330 @@
+#!/usr/bin/env python3
+"""
+scheduler.py
+
+Longest-processing-time-first (LPT) execution of a models × chapters matrix.
+
+Chapters differ widely in length (SPM and technical summary run 4-6k words,
+annexes are short) and models by up to 10× in speed. Dispatching in matrix order
+can leave a long premium chapter to start last and dominate the makespan.
+
+MatrixScheduler predicts each task's duration (ETAEstimator.predict, i.e. from the
+history of prior runs) and submits every provider's tasks longest-first to a pool
+sized to that provider's concurrency limit. Providers run independently of each
+other. After the run, the measured durations are replayed through the naive
+(matrix) order on the same slots so the achieved makespan can be compared with
+what the naive order would have taken.
+
+With a deadline, plan_deadline() first picks the cells predicted to finish in time,
+filling complete chapter columns (every model) before single cells so the
+cross-model comparison is as complete as possible. Tasks that can no longer finish
+when their turn comes are cancelled instead of started, and running calls get a
+request timeout at the deadline. Every skipped cell is reported with its reason.
+
+On Ctrl-C/SIGTERM (graceful_shutdown), queued tasks are cancelled and reported as
+skipped, and ShutdownRequested is re-raised to the runner without waiting for the
+in-flight calls. Streaming calls stop at their next chunk (stream_text checks
+shutdown_requested()); a non-streaming call cannot be interrupted, so it runs to
+completion in the background and is still billed - its result is not journaled.
+"""
+
+import heapq
+import re
+import threading
+import time
+from datetime import datetime, timedelta
+from concurrent.futures import ThreadPoolExecutor
+from typing import Callable, Dict, List, Optional, Tuple
+
+from graceful_shutdown import ShutdownRequested, shutdown_requested
+
+DEADLINE_SAFETY = 0.9  # Plan to fill this share of the window - predictions are noisy
+
+
+def provider_of(model_name: str) -> str:
+    """LiteLLM provider prefix (openai, anthropic, gemini, deepinfra, ...)"""
+    return model_name.split("/", 1)[0]
+
+
+def parse_limits(values: Optional[List[str]]) -> Dict[str, float]:
+    """Parse provider=value pairs (e.g. gemini=30 openai=60)"""
+    limits = {}
+    for item in values or []:
+        provider, _, value = item.partition("=")
+        limits[provider.strip()] = float(value)
+    return limits
+
+
+def list_schedule_makespan(durations: List[float], slots: int) -> float:
+    """Makespan of greedy list scheduling: each task goes to the earliest free slot, in order"""
+    if not durations:
+        return 0.0
+    free_at = [0.0] * max(1, slots)
+    for duration in durations:
+        start = heapq.heappop(free_at)
+        heapq.heappush(free_at, start + duration)
+    return max(free_at)
+
+
+def parse_deadline(value: str, now: Optional[datetime] = None) -> float:
+    """
+    Seconds until a deadline given as a duration ("2h", "90m", "45s", "1h30m")
+    or a wall-clock time today/tomorrow ("14:30")
+    """
+    now = now or datetime.now()
+    value = value.strip().lower()
+
+    clock = re.fullmatch(r"(\d{1,2}):(\d{2})", value)
+    if clock:
+        target = now.replace(hour=int(clock.group(1)), minute=int(clock.group(2)), second=0, microsecond=0)
+        if target <= now:
+            target += timedelta(days=1)
+        return (target - now).total_seconds()
+
+    parts = re.findall(r"(\d+(?:\.\d+)?)\s*([hms]?)", value)
+    if not parts or "".join(n + u for n, u in parts) != value.replace(" ", ""):
+        raise ValueError(f"Unrecognized deadline: {value!r} (use e.g. 2h, 90m, 1h30m or 14:30)")
+    scale = {"h": 3600, "m": 60, "s": 1, "": 60}  # Bare numbers are minutes
+    return sum(float(n) * scale[u] for n, u in parts)
+
+
+def plan_deadline(tasks: List[Dict], budget_seconds: float,
+                  limit: Callable[[str], int]) -> Tuple[List[Dict], List[Dict]]:
+    """
+    Choose the tasks predicted to finish within the budget
+
+    Whole chapter columns (the chapter for every model) are added cheapest-first
+    while every provider's LPT schedule still fits; remaining single cells are then
+    added shortest-first. Tasks need "provider", "chapter_key" and "predicted_seconds".
+
+    Returns:
+        (selected tasks, skipped tasks each with a "skip_reason")
+    """
+
+    def fits(selection: List[Dict]) -> bool:
+        by_provider = {}
+        for task in selection:
+            by_provider.setdefault(task["provider"], []).append(task["predicted_seconds"])
+        return all(list_schedule_makespan(sorted(d, reverse=True), limit(p)) <= budget_seconds
+                   for p, d in by_provider.items())
+
+    columns = {}
+    for task in tasks:
+        columns.setdefault(task["chapter_key"], []).append(task)
+
+    selected = []
+    for chapter_key in sorted(columns, key=lambda c: sum(t["predicted_seconds"] for t in columns[c])):
+        if fits(selected + columns[chapter_key]):
+            selected.extend(columns[chapter_key])
+
+    chosen = {id(t) for t in selected}
+    for task in sorted(tasks, key=lambda t: t["predicted_seconds"]):
+        if id(task) not in chosen and fits(selected + [task]):
+            selected.append(task)
+            chosen.add(id(task))
+
+    skipped = []
+    for task in tasks:
+        if id(task) in chosen:
+            continue
+        if task["predicted_seconds"] > budget_seconds:
+            reason = f"predicted {task['predicted_seconds']:.0f}s exceeds the {budget_seconds:.0f}s window"
+        else:
+            reason = f"{task['provider']} is fully booked until the deadline"
+        skipped.append({**task, "skip_reason": reason})
+
+    return selected, skipped
+
+
+class MatrixScheduler:
+    """Run (model, chapter) tasks longest-first within per-provider concurrency limits"""
+
+    def __init__(self, provider_limits: Optional[Dict[str, int]] = None, default_limit: int = 1,
+                 predict: Optional[Callable[[str, str], float]] = None,
+                 provider_for: Callable[[str], str] = provider_of,
+                 on_skip: Optional[Callable[[Dict], None]] = None):
+        """
+        Args:
+            provider_limits: Concurrent requests per provider (e.g. {"gemini": 4})
+            default_limit: Limit for providers not listed
+            predict: (model_name, chapter_key) → expected seconds; None keeps matrix order
+            provider_for: model_name → provider key (e.g. "local" for local-backend models)
+            on_skip: Called with each task skipped or cancelled for the deadline
+        """
+        self.provider_limits = provider_limits or {}
+        self.default_limit = default_limit
+        self.predict = predict
+        self.provider_for = provider_for
+        self.on_skip = on_skip
+        self._lock = threading.Lock()
+        self.timings = []
+        self.skipped = []
+
+    def limit(self, provider: str) -> int:
+        return max(1, self.provider_limits.get(provider, self.default_limit))
+
+    def order(self, tasks: List[Dict]) -> List[Dict]:
+        """Tasks longest predicted duration first (stable for ties)"""
+        if not self.predict:
+            return list(tasks)
+        return sorted(tasks, key=lambda t: -t["predicted_seconds"])
+
+    def _skip(self, task: Dict, reason: str) -> Dict:
+        if self.on_skip:
+            self.on_skip(task)
+        with self._lock:
+            self.skipped.append({
+                "model_name": task["model_name"],
+                "chapter_key": task["chapter_key"],
+                "predicted_seconds": task["predicted_seconds"],
+                "reason": reason
+            })
+        return {"success": False, "skipped": True, "chapter_key": task["chapter_key"], "error": f"skipped: {reason}"}
+
+    def run(self, tasks: List[Dict], fn: Callable[[Dict], Dict],
+            deadline_seconds: Optional[float] = None) -> List[Dict]:
+        """
+        Execute every task and return their results in matrix (input) order
+
+        Args:
+            tasks: Dicts with at least "model_name" and "chapter_key"
+            fn: Called with each task, returns that task's result dict. With a
+                deadline, the task carries "timeout" (seconds left) for the request
+            deadline_seconds: Wall-clock budget from now; cells that won't fit are skipped
+        """
+        by_provider = {}
+        for index, task in enumerate(tasks):
+            task = {**task, "index": index, "provider": self.provider_for(task["model_name"])}
+            task["predicted_seconds"] = (self.predict(task["model_name"], task["chapter_key"])
+                                         if self.predict else 0.0)
+            by_provider.setdefault(task["provider"], []).append(task)
+
+        results = [None] * len(tasks)
+        self.started_at = time.time()
+        deadline = self.started_at + deadline_seconds if deadline_seconds else None
+
+        if deadline:
+            all_tasks = [t for provider_tasks in by_provider.values() for t in provider_tasks]
+            selected, skipped = plan_deadline(all_tasks, deadline_seconds * DEADLINE_SAFETY, self.limit)
+            for task in skipped:
+                results[task["index"]] = self._skip(task, task["skip_reason"])
+            print(f"  ⏰ Deadline in {deadline_seconds/60:.0f} min: {len(selected)}/{len(all_tasks)} cells planned, "
+                  f"{len(skipped)} skipped")
+            by_provider = {}
+            for task in selected:
+                by_provider.setdefault(task["provider"], []).append(task)
+
+        started = set()
+
+        def execute(task: Dict):
+            start = time.time()
+            with self._lock:
+                started.add(task["index"])
+            if shutdown_requested():
+                results[task["index"]] = self._skip(task, "cancelled: shutdown")
+                return
+            if deadline:
+                left = deadline - start
+                if task["predicted_seconds"] > left:
+                    results[task["index"]] = self._skip(
+                        task, f"cancelled: predicted {task['predicted_seconds']:.0f}s, {max(0, left):.0f}s left")
+                    return
+                task = {**task, "timeout": left}
+            try:
+                results[task["index"]] = fn(task)
+            except ShutdownRequested:
+                results[task["index"]] = self._skip(task, "cancelled: shutdown")
+                return
+            except Exception as e:
+                results[task["index"]] = {"success": False, "chapter_key": task["chapter_key"], "error": str(e)}
+            end = time.time()
+            with self._lock:
+                self.timings.append({
+                    "provider": task["provider"],
+                    "model_name": task["model_name"],
+                    "chapter_key": task["chapter_key"],
+                    "index": task["index"],
+                    "predicted_seconds": task["predicted_seconds"],
+                    "start": start - self.started_at,
+                    "seconds": end - start
+                })
+
+        executors = []
+        for provider, provider_tasks in by_provider.items():
+            if not provider_tasks:
+                continue
+            ordered = self.order(provider_tasks)
+            print(f"  🗂️  {provider}: {len(ordered)} tasks, {self.limit(provider)} concurrent, "
+                  f"longest first: {ordered[0]['chapter_key'][:30]} ({ordered[0]['predicted_seconds']:.0f}s predicted)")
+            executor = ThreadPoolExecutor(max_workers=self.limit(provider))
+            for task in ordered:
+                executor.submit(execute, task)
+            executors.append(executor)
+
+        try:
+            for executor in executors:
+                executor.shutdown(wait=True)
+        except ShutdownRequested:
+            # Drop the queue and return at once; streams close at their next chunk,
+            # non-streaming requests already sent finish (and are billed) in the background
+            print("  ⏸️  Cancelling queued tasks, abandoning in-flight requests...")
+            for executor in executors:
+                executor.shutdown(wait=False, cancel_futures=True)
+            with self._lock:
+                never_started = [task for provider_tasks in by_provider.values()
+                                 for task in provider_tasks if task["index"] not in started]
+            for task in never_started:
+                results[task["index"]] = self._skip(task, "cancelled: shutdown")
+            self.finished_at = time.time()
+            raise
+
+        self.finished_at = time.time()
+        return results
+
+    def makespan_report(self) -> Dict:
+        """Achieved makespan vs the same measured durations replayed in naive matrix order"""
+        by_provider = {}
+        for timing in self.timings:
+            by_provider.setdefault(timing["provider"], []).append(timing)
+
+        naive = {}
+        lpt = {}
+        predicted_naive = {}
+        predicted_lpt = {}
+        for provider, timings in by_provider.items():
+            slots = self.limit(provider)
+            matrix_order = sorted(timings, key=lambda t: t["index"])
+            longest_first = sorted(timings, key=lambda t: -t["predicted_seconds"])
+            naive[provider] = list_schedule_makespan([t["seconds"] for t in matrix_order], slots)
+            lpt[provider] = list_schedule_makespan([t["seconds"] for t in longest_first], slots)
+            predicted_naive[provider] = list_schedule_makespan([t["predicted_seconds"] for t in matrix_order], slots)
+            predicted_lpt[provider] = list_schedule_makespan([t["predicted_seconds"] for t in longest_first], slots)
+
+        achieved = self.finished_at - self.started_at if self.timings else 0.0
+        naive_makespan = max(naive.values(), default=0.0)
+        return {
+            "achieved_makespan_seconds": achieved,
+            "naive_order_makespan_seconds": naive_makespan,
+            "lpt_replayed_makespan_seconds": max(lpt.values(), default=0.0),
+            "predicted_naive_makespan_seconds": max(predicted_naive.values(), default=0.0),
+            "predicted_lpt_makespan_seconds": max(predicted_lpt.values(), default=0.0),
+            "saving_vs_naive_pct": (naive_makespan - achieved) / naive_makespan * 100 if naive_makespan else 0.0,
+            "per_provider": {p: {"slots": self.limit(p), "naive_seconds": naive[p], "lpt_seconds": lpt[p]}
+                             for p in by_provider},
+            "skipped": self.skipped,
+            "tasks": sorted(self.timings, key=lambda t: t["start"])
+        }
+
+
+def print_makespan_report(report: Dict):
+    """Print achieved vs naive-order makespan"""
+    print(f"\n🗂️  LPT schedule: achieved makespan {report['achieved_makespan_seconds']/60:.1f} min, "
+          f"naive order would take {report['naive_order_makespan_seconds']/60:.1f} min "
+          f"({report['saving_vs_naive_pct']:.1f}% saved)")
+    for provider, stats in sorted(report["per_provider"].items()):
+        print(f"     {provider:<15} {stats['slots']} slots: LPT {stats['lpt_seconds']/60:.1f} min "
+              f"vs naive {stats['naive_seconds']/60:.1f} min")
+    if report.get("skipped"):
+        print(f"\n⏰ Skipped {len(report['skipped'])} cells:")
+        for skipped in report["skipped"]:
+            print(f"     {skipped['model_name']:<50} {skipped['chapter_key']:<40} {skipped['reason']}")
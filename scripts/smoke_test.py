@@ -0,0 +1,213 @@
+#!/usr/bin/env python3
+"""
+smoke_test.py
+
+Fast smoke test of every (model, chapter) path.
+
+Sends each real chapter prompt to each model with its actual params but a tiny
+max_tokens, concurrently, and reports a pass/fail matrix. Catches auth, param and
+context-length errors in seconds instead of hours into a full run.
+
+Used by the --smoke flag of run_ar7_full_comparison.py, run_7model_test.py and
+test_api_keys.py.
+"""
+
+import time
+from concurrent.futures import ThreadPoolExecutor, as_completed
+from pathlib import Path
+from datetime import datetime
+from typing import Dict, List
+
+import llm_client
+from output_writer import atomic_write_json
+
+SMOKE_MAX_TOKENS = 16
+SMOKE_TIMEOUT = 60  # seconds per call
+SMOKE_WORKERS = 16
+
+
+def classify_error(error_str: str) -> str:
+    """Bucket a provider error into the categories the smoke matrix reports"""
+    lowered = error_str.lower()
+
+    if "401" in error_str or "403" in error_str or "authentication" in lowered or "api key" in lowered:
+        return "auth"
+    if "context length" in lowered or "context_length" in lowered or "too many tokens" in lowered \
+            or "maximum context" in lowered or "prompt is too long" in lowered:
+        return "context_length"
+    if "unsupportedparams" in lowered or "does not support" in lowered or "temperature" in lowered \
+            or "max_tokens" in lowered or "response_format" in lowered:
+        return "param"
+    if "429" in error_str or "rate limit" in lowered or "quota" in lowered:
+        return "rate_limit"
+    if "404" in error_str or "not found" in lowered or "does not exist" in lowered:
+        return "model_not_found"
+    if "timeout" in lowered or "timed out" in lowered:
+        return "timeout"
+    return "unknown"
+
+
+def check_static_limits(model_name: str, messages: List[Dict], params: Dict) -> List[str]:
+    """
+    Check prompt size and max_tokens against LiteLLM's model metadata
+
+    The smoke call itself uses a tiny max_tokens, so an oversized max_tokens in the
+    real params would never be exercised - catch it here without a network call.
+    """
+    problems = []
+    if not llm_client.LITELLM_AVAILABLE:
+        return problems
+
+    litellm = llm_client.litellm
+    try:
+        info = litellm.get_model_info(model_name)
+    except Exception:
+        return problems  # Unknown to LiteLLM (e.g. some HF/DeepInfra ids)
+
+    max_output = info.get("max_output_tokens")
+    requested = params.get("max_tokens")
+    if max_output and requested and requested > max_output:
+        problems.append(f"param: max_tokens {requested} > model limit {max_output}")
+
+    max_input = info.get("max_input_tokens")
+    if max_input:
+        try:
+            prompt_tokens = litellm.token_counter(model=model_name, messages=messages)
+            if prompt_tokens + (requested or 0) > max_input:
+                problems.append(f"context_length: {prompt_tokens} prompt + {requested} completion > {max_input}")
+        except Exception:
+            pass
+
+    return problems
+
+
+def smoke_call(model_id: str, model_name: str, chapter_key: str, prompt_data: Dict,
+               max_tokens: int = SMOKE_MAX_TOKENS) -> Dict:
+    """Send one real chapter prompt with a tiny max_tokens"""
+    messages = prompt_data.get("messages", [])
+    params = dict(prompt_data.get("params", {}))
+
+    result = {
+        "model_id": model_id,
+        "model_name": model_name,
+        "chapter_key": chapter_key,
+        "status": "failed",
+        "error": None,
+        "error_type": None,
+        "warnings": []
+    }
+
+    if not messages:
+        result.update({"error": "No messages in prompt data", "error_type": "prompt"})
+        return result
+
+    result["warnings"] = check_static_limits(model_name, messages, params)
+
+    params["max_tokens"] = max_tokens
+    start_time = time.time()
+    try:
+        llm_client.completion(model=model_name, messages=messages, timeout=SMOKE_TIMEOUT, **params)
+        result["status"] = "passed"
+    except Exception as e:
+        result["error"] = str(e)[:300]
+        result["error_type"] = classify_error(str(e))
+    result["duration"] = time.time() - start_time
+
+    return result
+
+
+def run_smoke_test(models: Dict[str, str], prompts_data: Dict, chapters: List[str],
+                   max_tokens: int = SMOKE_MAX_TOKENS, workers: int = SMOKE_WORKERS) -> Dict:
+    """
+    Run the smoke matrix concurrently
+
+    Args:
+        models: model_id -> LiteLLM model name
+        prompts_data: Loaded prompts JSON (chapter_key -> {"messages", "params"})
+        chapters: Chapter keys to exercise
+        max_tokens: Completion budget per call
+        workers: Concurrent calls
+
+    Returns:
+        Dict with per-cell results and pass/fail counts
+    """
+    chapters = [c for c in chapters if c in prompts_data]
+
+    print(f"\n{'='*80}")
+    print(f"SMOKE TEST")
+    print(f"{'='*80}")
+    print(f"Models: {len(models)}")
+    print(f"Chapters: {len(chapters)}")
+    print(f"Calls: {len(models) * len(chapters)} (max_tokens={max_tokens}, workers={workers})")
+    print(f"{'='*80}\n")
+
+    start_time = time.time()
+    cells = []
+    with ThreadPoolExecutor(max_workers=workers) as executor:
+        futures = [
+            executor.submit(smoke_call, model_id, model_name, chapter_key, prompts_data[chapter_key], max_tokens)
+            for model_id, model_name in models.items()
+            for chapter_key in chapters
+        ]
+        for future in as_completed(futures):
+            cells.append(future.result())
+
+    passed = [c for c in cells if c["status"] == "passed" and not c["warnings"]]
+    return {
+        "tested_at": datetime.now().isoformat(),
+        "duration": time.time() - start_time,
+        "max_tokens": max_tokens,
+        "models": models,
+        "chapters": chapters,
+        "total_calls": len(cells),
+        "passed": len(passed),
+        "failed": len(cells) - len(passed),
+        "cells": sorted(cells, key=lambda c: (c["model_id"], c["chapter_key"]))
+    }
+
+
+def print_smoke_matrix(smoke_results: Dict):
+    """Print a model x chapter pass/fail matrix and the distinct errors"""
+    models = list(smoke_results["models"].keys())
+    chapters = smoke_results["chapters"]
+    by_cell = {(c["model_id"], c["chapter_key"]): c for c in smoke_results["cells"]}
+
+    # Columns are numbered chapters to keep the matrix readable
+    print(f"{'Model':<25}" + "".join(f"{i:>4}" for i in range(1, len(chapters) + 1)))
+    for model_id in models:
+        row = f"{model_id:<25}"
+        for chapter_key in chapters:
+            cell = by_cell.get((model_id, chapter_key))
+            if cell is None:
+                mark = "-"
+            elif cell["status"] == "failed":
+                mark = "❌"
+            elif cell["warnings"]:
+                mark = "⚠️"
+            else:
+                mark = "✅"
+            row += f"{mark:>4}"
+        print(row)
+
+    print()
+    for i, chapter_key in enumerate(chapters, 1):
+        print(f"  {i:>2}. {chapter_key}")
+
+    problems = [c for c in smoke_results["cells"] if c["status"] == "failed" or c["warnings"]]
+    if problems:
+        print(f"\nProblems:")
+        for cell in problems:
+            detail = cell["error"] if cell["error"] else "; ".join(cell["warnings"])
+            category = cell["error_type"] or "warning"
+            print(f"  ❌ {cell['model_id']}/{cell['chapter_key']} [{category}]: {detail[:150]}")
+
+    print(f"\n{'='*80}")
+    print(f"SMOKE TEST: {smoke_results['passed']}/{smoke_results['total_calls']} passed "
+          f"in {smoke_results['duration']:.1f}s")
+    print(f"{'='*80}\n")
+
+
+def save_smoke_results(smoke_results: Dict, output_file: Path):
+    """Write smoke results JSON"""
+    atomic_write_json(output_file, smoke_results)
+    print(f"Smoke results saved to: {output_file}")
@@ -3,8 +3,17 @@
 test_api_keys.py
 
 Test that all API providers are properly configured and accessible.
+
+Usage:
+    # Trivial one-sentence prompt per model
+    uv run python test_api_keys.py
+
+    # Real chapter prompts and params, a few tokens each, all models concurrently
+    uv run python test_api_keys.py --smoke
 """
 
+import argparse
+import json
 import sys
 from pathlib import Path
 
@@ -12,10 +21,10 @@ from pathlib import Path
 from load_env import load_parent_env
 load_parent_env()
 
-try:
-    import litellm
-    litellm.drop_params = True  # Auto-drop unsupported params
-except ImportError:
+import llm_client
+from smoke_test import run_smoke_test, print_smoke_matrix, save_smoke_results
+
+if not llm_client.LITELLM_AVAILABLE:
     print("ERROR: litellm not available")
     sys.exit(1)
 
@@ -42,7 +51,7 @@ def test_model(model_name: str, model_id: str) -> dict:
     print(f"{'='*60}")
 
     try:
-        response = litellm.completion(
+        response = llm_client.completion(
             model=model_id,
             messages=[{"role": "user", "content": TEST_PROMPT}],
             max_tokens=50,
@@ -89,6 +98,27 @@ def test_model(model_name: str, model_id: str) -> dict:
 
 
 def main():
+    parser = argparse.ArgumentParser(description="Verify AR7 model provider API access")
+    parser.add_argument("--smoke", action="store_true",
+                        help="Send the real chapter prompts (tiny max_tokens) instead of a trivial prompt")
+    parser.add_argument("--prompts-file", default="prompts/ar7_model_comparison_prompts.json")
+    parser.add_argument("--chapters", help="Comma-separated chapters for --smoke (default: all)")
+    args = parser.parse_args()
+
+    if args.smoke:
+        with open(args.prompts_file) as f:
+            prompts_data = json.load(f)
+
+        if args.chapters:
+            chapters = [c.strip() for c in args.chapters.split(',')]
+        else:
+            chapters = prompts_data.get("prompt_keys", [])
+
+        smoke_results = run_smoke_test(MODELS_TO_TEST, prompts_data, chapters)
+        print_smoke_matrix(smoke_results)
+        save_smoke_results(smoke_results, Path("output/api_smoke_test_results.json"))
+        return 0 if smoke_results["failed"] == 0 else 1
+
     print(f"\n{'='*60}")
     print(f"AR7 MODEL PROVIDER API KEY VERIFICATION TEST")
     print(f"{'='*60}")
@@ -155,13 +185,12 @@ def main():
         if r['error_type'] == "Authentication/API Key":
             print(f"⚠️  {r['model_name']}: Check API key configuration")
         elif r['error_type'] == "Parameter Restriction":
-            print(f"⚠️  {r['model_name']}: Use litellm.drop_params = True")
+            print(f"⚠️  {r['model_name']}: Re-run to let the param capability cache learn the limits")
 
     print()
     print("="*60)
 
     # Save results
-    import json
     from datetime import datetime
 
     Path("output").mkdir(exist_ok=True)
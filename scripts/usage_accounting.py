@@ -0,0 +1,263 @@
+#!/usr/bin/env python3
+"""
+usage_accounting.py
+
+Token usage and cost accounting per call, chapter, model and run.
+
+llm_client.completion() records the usage block of every response here. Callers
+tag what the call was for with usage_scope(stage=..., model_id=..., chapter_key=...)
+and read back the totals for that scope, so generation, fact-check and scoring
+summaries can report input/output/cached tokens and dollars alongside words.
+"""
+
+import contextvars
+import json
+import threading
+from contextlib import contextmanager
+from pathlib import Path
+from datetime import datetime
+from typing import Dict, Optional
+
+from output_writer import atomic_write_json
+
+try:
+    import litellm
+    LITELLM_AVAILABLE = True
+except ImportError:
+    LITELLM_AVAILABLE = False
+
+USAGE_FIELDS = ["input_tokens", "output_tokens", "cached_tokens", "reasoning_tokens", "cost", "calls"]
+
+_active_scopes = contextvars.ContextVar("usage_scopes", default=())
+
+
+def empty_usage() -> Dict:
+    """Zeroed usage totals"""
+    return {"input_tokens": 0, "output_tokens": 0, "cached_tokens": 0,
+            "reasoning_tokens": 0, "cost": 0.0, "calls": 0}
+
+
+def add_usage(total: Dict, usage: Optional[Dict]) -> Dict:
+    """Add one usage dict into a running total (in place) and return it"""
+    if usage:
+        for field in USAGE_FIELDS:
+            total[field] = total.get(field, 0) + (usage.get(field) or 0)
+    return total
+
+
+def cost_per_1000_words(usage: Dict, words: int) -> Optional[float]:
+    """Dollars per 1000 generated words (None if no words or no cost data)"""
+    if not words or not usage.get("cost"):
+        return None
+    return usage["cost"] / words * 1000
+
+
+def summarize_usage(results, total_words: int) -> Dict:
+    """Sum the usage blocks of per-chapter results (rejected attempts included - they were paid for)"""
+    total = empty_usage()
+    for result in results:
+        add_usage(total, result.get("usage"))
+    total["cost_per_1000_words"] = cost_per_1000_words(total, total_words)
+    return total
+
+
+def estimate_cost(model_name: str, input_tokens: int = 0, output_tokens: int = 0) -> Optional[float]:
+    """Dollar cost from LiteLLM's price table for token counts measured outside a call"""
+    if not LITELLM_AVAILABLE:
+        return None
+    try:
+        prompt_cost, completion_cost = litellm.cost_per_token(
+            model=model_name, prompt_tokens=input_tokens, completion_tokens=output_tokens
+        )
+    except Exception:
+        return None
+    return float(prompt_cost + completion_cost)
+
+
+def _get(obj, name, default=None):
+    """Attribute or key access - LiteLLM usage objects behave like both"""
+    if obj is None:
+        return default
+    if isinstance(obj, dict):
+        return obj.get(name, default)
+    return getattr(obj, name, default)
+
+
+def extract_usage(response, model_name: str = "") -> Dict:
+    """
+    Pull token counts and cost out of a LiteLLM response
+
+    Cached tokens come from prompt_tokens_details (OpenAI/Gemini) or
+    cache_read_input_tokens (Anthropic); reasoning tokens from
+    completion_tokens_details.
+    """
+    usage = _get(response, "usage")
+    record = empty_usage()
+    record["calls"] = 1
+    if usage is None:
+        return record
+
+    record["input_tokens"] = _get(usage, "prompt_tokens", 0) or 0
+    record["output_tokens"] = _get(usage, "completion_tokens", 0) or 0
+    record["cached_tokens"] = (_get(_get(usage, "prompt_tokens_details"), "cached_tokens", 0)
+                               or _get(usage, "cache_read_input_tokens", 0) or 0)
+    record["reasoning_tokens"] = _get(_get(usage, "completion_tokens_details"), "reasoning_tokens", 0) or 0
+
+    if LITELLM_AVAILABLE:
+        try:
+            record["cost"] = float(litellm.completion_cost(completion_response=response) or 0.0)
+        except Exception:
+            # Model not in LiteLLM's price table (some HF/DeepInfra/local ids)
+            try:
+                prompt_cost, completion_cost = litellm.cost_per_token(
+                    model=model_name,
+                    prompt_tokens=record["input_tokens"],
+                    completion_tokens=record["output_tokens"]
+                )
+                record["cost"] = float(prompt_cost + completion_cost)
+            except Exception:
+                record["cost"] = 0.0
+
+    return record
+
+
+class UsageScope:
+    """Totals for the calls made inside one usage_scope() block"""
+
+    def __init__(self, tags: Dict):
+        self.tags = tags
+        self.usage = empty_usage()
+        self._lock = threading.Lock()
+
+    def add(self, usage: Dict):
+        # Calls inside one scope may run on several threads (e.g. fact-check windows)
+        with self._lock:
+            add_usage(self.usage, usage)
+
+
+class UsageTracker:
+    """Thread-safe log of every call's usage for a run"""
+
+    def __init__(self):
+        self._lock = threading.Lock()
+        self.calls = []
+
+    def record(self, model_name: str, usage: Dict, tags: Dict):
+        with self._lock:
+            self.calls.append({
+                "model": model_name,
+                "recorded_at": datetime.now().isoformat(),
+                **tags,
+                **usage
+            })
+
+    def totals(self, **filters) -> Dict:
+        """Usage summed over calls matching every filter (e.g. stage="generation")"""
+        total = empty_usage()
+        with self._lock:
+            for call in self.calls:
+                if all(call.get(k) == v for k, v in filters.items()):
+                    add_usage(total, call)
+        return total
+
+    def breakdown(self, key: str) -> Dict[str, Dict]:
+        """Usage totals grouped by a tag or field (model, model_id, stage, chapter_key)"""
+        groups = {}
+        with self._lock:
+            for call in self.calls:
+                add_usage(groups.setdefault(str(call.get(key)), empty_usage()), call)
+        return groups
+
+    def get_total_statistics(self) -> Dict:
+        """Same shape as codexes TokenUsageTracker.get_total_statistics()"""
+        total = self.totals()
+        return {
+            "total_calls": total["calls"],
+            "total_input_tokens": total["input_tokens"],
+            "total_output_tokens": total["output_tokens"],
+            "total_tokens": total["input_tokens"] + total["output_tokens"],
+            "total_cost": total["cost"]
+        }
+
+    def save(self, output_file: Path):
+        """Write the per-call log plus per-stage/per-model totals"""
+        atomic_write_json(output_file, {
+            "generated_at": datetime.now().isoformat(),
+            "totals": self.totals(),
+            "by_stage": self.breakdown("stage"),
+            "by_model": self.breakdown("model"),
+            "calls": self.calls
+        })
+
+
+_tracker = UsageTracker()
+
+
+def get_usage_tracker() -> UsageTracker:
+    """Process-wide tracker fed by llm_client"""
+    return _tracker
+
+
+@contextmanager
+def usage_scope(**tags):
+    """
+    Tag and total the LLM calls made inside the block
+
+    Example:
+        with usage_scope(stage="generation", model_id="qwen_7b", chapter_key=key) as scope:
+            text = llm_call_with_structured_output(...)
+        metadata["usage"] = scope.usage
+    """
+    scope = UsageScope(tags)
+    token = _active_scopes.set(_active_scopes.get() + (scope,))
+    try:
+        yield scope
+    finally:
+        _active_scopes.reset(token)
+
+
+def record_response_usage(model_name: str, response) -> Dict:
+    """Record a response's usage against the tracker and every active scope"""
+    usage = extract_usage(response, model_name)
+    return record_usage(model_name, usage)
+
+
+def record_usage(model_name: str, usage: Dict) -> Dict:
+    """Record an already-extracted usage dict"""
+    scopes = _active_scopes.get()
+    tags = {}
+    for scope in scopes:
+        tags.update(scope.tags)
+        scope.add(usage)
+    _tracker.record(model_name, usage, tags)
+    return usage
+
+
+def load_model_usage(model_dir: Path) -> Optional[Dict]:
+    """
+    Usage totals for one model's output directory
+
+    Prefers generation_summary.json; otherwise sums the usage blocks of the
+    per-chapter *_metadata.json files. None if no usage was recorded.
+    """
+    summary_file = model_dir / "generation_summary.json"
+    if summary_file.exists():
+        try:
+            summary = json.loads(summary_file.read_text(encoding='utf-8'))
+            if summary.get("usage"):
+                return summary["usage"]
+        except (json.JSONDecodeError, OSError):
+            pass
+
+    total = empty_usage()
+    found = False
+    for metadata_file in model_dir.rglob("*_metadata.json"):
+        try:
+            usage = json.loads(metadata_file.read_text(encoding='utf-8')).get("usage")
+        except (json.JSONDecodeError, OSError):
+            continue
+        if usage:
+            add_usage(total, usage)
+            found = True
+
+    return total if found else None